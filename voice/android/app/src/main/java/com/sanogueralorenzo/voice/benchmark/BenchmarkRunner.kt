@@ -18,7 +18,8 @@ object BenchmarkRunner {
         promptInstructionsSnapshot: String,
         runtimeConfigSnapshot: String,
         composePromptTemplateOverride: String? = null,
-        onProgress: ((BenchmarkProgress) -> Unit)? = null
+        onProgress: ((BenchmarkProgress) -> Unit)? = null,
+        onCaseCompleted: ((BenchmarkCaseResult) -> Unit)? = null
     ): BenchmarkSessionResult {
         require(repeats > 0) { "repeats must be > 0" }
         val startedAt = System.currentTimeMillis()
@@ -56,7 +57,9 @@ object BenchmarkRunner {
                 runs += rewriteResult.toRunResult(runIndex = runIndex)
             }
 
-            caseResults += aggregateCase(caseDef, runs)
+            val caseResult = aggregateCase(caseDef, runs)
+            caseResults += caseResult
+            onCaseCompleted?.invoke(caseResult)
         }
 
         val totalElapsedMs = (System.currentTimeMillis() - startedAt).coerceAtLeast(0L)
@@ -1,6 +1,7 @@
 package com.sanogueralorenzo.voice.benchmark.adb
 
 import com.sanogueralorenzo.voice.benchmark.BenchmarkProgress
+import org.json.JSONArray
 import org.json.JSONObject
 
 object BenchmarkAdbContracts {
@@ -11,17 +12,82 @@ object BenchmarkAdbContracts {
     const val EXTRA_DATASET_REL_PATH = "dataset_rel_path"
     const val EXTRA_OUTPUT_REL_PATH = "output_rel_path"
 
+    /** JSON manifest listing several prompts to evaluate in one session; overrides the prompt extra. */
+    const val EXTRA_MANIFEST_REL_PATH = "manifest_rel_path"
+
     const val DEFAULT_RESULTS_DIR = "benchmark_runs"
+
+    /** Every status write is also logged on one line under this tag so hosts can stream it. */
+    const val STATUS_LOG_TAG = "BenchmarkStatus"
     const val APP_DEFAULT_PROMPT_SENTINEL = "__APP_DEFAULT__"
 }
 
 data class BenchmarkRunRequest(
     val runId: String,
-    val promptRelPath: String,
     val datasetRelPath: String,
-    val outputRelPath: String
+    val prompts: List<BenchmarkPromptRun>
 )
 
+data class BenchmarkPromptRun(
+    val promptId: String,
+    val promptRelPath: String,
+    val outputRelPath: String,
+    val reportRelPath: String,
+    val casesRelPath: String
+) {
+    fun toJson(): JSONObject {
+        return JSONObject().apply {
+            put("prompt_id", promptId)
+            put("prompt_rel_path", promptRelPath)
+            put("result_rel_path", outputRelPath)
+            put("report_rel_path", reportRelPath)
+            put("cases_rel_path", casesRelPath)
+        }
+    }
+
+    companion object {
+        private val PROMPT_ID_PATTERN = Regex("[A-Za-z0-9._-]+")
+
+        /** The single-prompt layout used when no manifest is sent. */
+        fun single(runId: String, promptRelPath: String, outputRelPath: String): BenchmarkPromptRun {
+            val resultsDir = BenchmarkAdbContracts.DEFAULT_RESULTS_DIR
+            return BenchmarkPromptRun(
+                promptId = "default",
+                promptRelPath = promptRelPath,
+                outputRelPath = outputRelPath.ifBlank { "$resultsDir/$runId.result.json" },
+                reportRelPath = "$resultsDir/$runId.report.txt",
+                casesRelPath = "$resultsDir/$runId.cases.jsonl"
+            )
+        }
+
+        /**
+         * Parses `{"prompts": [{"prompt_id", "prompt_rel_path", ...}]}`. Output paths default to
+         * `benchmark_runs/<run_id>.<prompt_id>.{result.json,report.txt,cases.jsonl}`.
+         */
+        fun parseManifest(manifestJson: String, runId: String): List<BenchmarkPromptRun> {
+            val resultsDir = BenchmarkAdbContracts.DEFAULT_RESULTS_DIR
+            val entries = JSONObject(manifestJson).optJSONArray("prompts") ?: JSONArray()
+            require(entries.length() > 0) { "Manifest lists no prompts" }
+            val prompts = (0 until entries.length()).map { index ->
+                val entry = entries.getJSONObject(index)
+                val promptId = entry.optString("prompt_id").trim().ifBlank { "p${index + 1}" }
+                require(PROMPT_ID_PATTERN.matches(promptId)) { "Invalid prompt_id: $promptId" }
+                val prefix = "$resultsDir/$runId.$promptId"
+                BenchmarkPromptRun(
+                    promptId = promptId,
+                    promptRelPath = entry.optString("prompt_rel_path").trim(),
+                    outputRelPath = entry.optString("output_rel_path").trim().ifBlank { "$prefix.result.json" },
+                    reportRelPath = entry.optString("report_rel_path").trim().ifBlank { "$prefix.report.txt" },
+                    casesRelPath = entry.optString("cases_rel_path").trim().ifBlank { "$prefix.cases.jsonl" }
+                )
+            }
+            val duplicates = prompts.groupBy { it.promptId }.filterValues { it.size > 1 }.keys
+            require(duplicates.isEmpty()) { "Duplicate prompt_id: ${duplicates.joinToString()}" }
+            return prompts
+        }
+    }
+}
+
 data class BenchmarkRunStatus(
     val runId: String,
     val state: String,
@@ -31,7 +97,12 @@ data class BenchmarkRunStatus(
     val error: String? = null,
     val progress: BenchmarkProgress? = null,
     val resultRelPath: String? = null,
-    val reportRelPath: String? = null
+    val reportRelPath: String? = null,
+    val casesRelPath: String? = null,
+    val promptId: String? = null,
+    val promptIndex: Int? = null,
+    val totalPrompts: Int? = null,
+    val prompts: List<BenchmarkPromptRun> = emptyList()
 ) {
     fun toJson(): JSONObject {
         return JSONObject().apply {
@@ -43,6 +114,11 @@ data class BenchmarkRunStatus(
             if (!error.isNullOrBlank()) put("error", error)
             if (!resultRelPath.isNullOrBlank()) put("result_rel_path", resultRelPath)
             if (!reportRelPath.isNullOrBlank()) put("report_rel_path", reportRelPath)
+            if (!casesRelPath.isNullOrBlank()) put("cases_rel_path", casesRelPath)
+            if (!promptId.isNullOrBlank()) put("prompt_id", promptId)
+            if (promptIndex != null) put("prompt_index", promptIndex)
+            if (totalPrompts != null) put("total_prompts", totalPrompts)
+            if (prompts.isNotEmpty()) put("prompts", JSONArray(prompts.map { it.toJson() }))
             if (progress != null) {
                 put(
                     "progress",
@@ -27,6 +27,10 @@ class BenchmarkAdbReceiver : BroadcastReceiver() {
                 BenchmarkAdbContracts.EXTRA_OUTPUT_REL_PATH,
                 intent.getStringExtra(BenchmarkAdbContracts.EXTRA_OUTPUT_REL_PATH)
             )
+            putExtra(
+                BenchmarkAdbContracts.EXTRA_MANIFEST_REL_PATH,
+                intent.getStringExtra(BenchmarkAdbContracts.EXTRA_MANIFEST_REL_PATH)
+            )
         }
         runCatching {
             ContextCompat.startForegroundService(context, serviceIntent)
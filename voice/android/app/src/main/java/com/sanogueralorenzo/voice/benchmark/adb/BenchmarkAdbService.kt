@@ -13,6 +13,9 @@ import com.sanogueralorenzo.voice.di.appGraph
 import com.sanogueralorenzo.voice.models.ModelCatalog
 import com.sanogueralorenzo.voice.models.ModelStore
 import com.sanogueralorenzo.voice.benchmark.LiteRtBenchmarkGateway
+import com.sanogueralorenzo.voice.benchmark.BenchmarkCaseResult
+import com.sanogueralorenzo.voice.benchmark.BenchmarkProgress
+import com.sanogueralorenzo.voice.benchmark.BenchmarkSessionResult
 import com.sanogueralorenzo.voice.benchmark.BenchmarkDatasetLoader
 import com.sanogueralorenzo.voice.benchmark.BenchmarkReportFormatter
 import com.sanogueralorenzo.voice.benchmark.BenchmarkRunner
@@ -78,135 +81,129 @@ class BenchmarkAdbService : Service() {
             .orEmpty()
         val outputRelPath = intent.getStringExtra(BenchmarkAdbContracts.EXTRA_OUTPUT_REL_PATH)
             ?.trim()
-            ?.ifBlank { null }
-            ?: "${BenchmarkAdbContracts.DEFAULT_RESULTS_DIR}/$runId.result.json"
+            .orEmpty()
+        val manifestRelPath = intent.getStringExtra(BenchmarkAdbContracts.EXTRA_MANIFEST_REL_PATH)
+            ?.trim()
+            .orEmpty()
+        val isManifestRun = manifestRelPath.isNotBlank()
+
+        val statusRelPath = "${BenchmarkAdbContracts.DEFAULT_RESULTS_DIR}/$runId.status.json"
+        val statusFile = resolveAppFile(statusRelPath) ?: return
+        val startedAt = System.currentTimeMillis()
 
+        val prompts = if (isManifestRun) {
+            val manifestFile = resolveAppFile(manifestRelPath)?.takeIf { it.exists() }
+            val parsed = manifestFile?.let { file ->
+                runCatching { BenchmarkPromptRun.parseManifest(file.readText(), runId) }
+            }
+            parsed?.getOrNull() ?: run {
+                writeStatus(
+                    statusFile = statusFile,
+                    status = BenchmarkRunStatus(
+                        runId = runId,
+                        state = "failed",
+                        updatedAtMs = System.currentTimeMillis(),
+                        startedAtMs = startedAt,
+                        error = if (manifestFile == null) {
+                            "Manifest file not found: $manifestRelPath"
+                        } else {
+                            "Failed parsing manifest: ${parsed?.exceptionOrNull()?.message}"
+                        }
+                    )
+                )
+                return
+            }
+        } else {
+            listOf(BenchmarkPromptRun.single(runId, promptRelPath, outputRelPath))
+        }
         val request = BenchmarkRunRequest(
             runId = runId,
-            promptRelPath = promptRelPath,
             datasetRelPath = datasetRelPath,
-            outputRelPath = outputRelPath
+            prompts = prompts
         )
 
-        val statusRelPath = "${BenchmarkAdbContracts.DEFAULT_RESULTS_DIR}/$runId.status.json"
-        val reportRelPath = "${BenchmarkAdbContracts.DEFAULT_RESULTS_DIR}/$runId.report.txt"
-        val statusFile = resolveAppFile(statusRelPath) ?: return
-        val resultFile = resolveAppFile(request.outputRelPath)
-        val reportFile = resolveAppFile(reportRelPath)
-
-        val startedAt = System.currentTimeMillis()
-        writeStatus(
-            statusFile = statusFile,
-            status = BenchmarkRunStatus(
-                runId = runId,
-                state = "running",
-                updatedAtMs = startedAt,
-                startedAtMs = startedAt,
-                message = "Starting benchmark run",
-                resultRelPath = request.outputRelPath,
-                reportRelPath = reportRelPath
-            )
+        fun runStatus(
+            state: String,
+            prompt: BenchmarkPromptRun = request.prompts.first(),
+            message: String? = null,
+            error: String? = null,
+            progress: BenchmarkProgress? = null
+        ) = BenchmarkRunStatus(
+            runId = runId,
+            state = state,
+            updatedAtMs = System.currentTimeMillis(),
+            startedAtMs = startedAt,
+            message = message,
+            error = error,
+            progress = progress,
+            resultRelPath = prompt.outputRelPath,
+            reportRelPath = prompt.reportRelPath,
+            casesRelPath = prompt.casesRelPath,
+            promptId = prompt.promptId.takeIf { isManifestRun },
+            promptIndex = (request.prompts.indexOf(prompt) + 1).takeIf { isManifestRun },
+            totalPrompts = request.prompts.size.takeIf { isManifestRun },
+            prompts = if (isManifestRun && state == "completed") request.prompts else emptyList()
         )
 
+        writeStatus(statusFile, runStatus(state = "running", message = "Starting benchmark run"))
+
         if (!ModelStore.isModelReadyStrict(applicationContext, ModelCatalog.liteRtLm)) {
-            writeStatus(
-                statusFile = statusFile,
-                status = BenchmarkRunStatus(
-                    runId = runId,
-                    state = "failed",
-                    updatedAtMs = System.currentTimeMillis(),
-                    startedAtMs = startedAt,
-                    error = "LiteRT model is not ready",
-                    resultRelPath = request.outputRelPath,
-                    reportRelPath = reportRelPath
-                )
-            )
+            writeStatus(statusFile, runStatus(state = "failed", error = "LiteRT model is not ready"))
             return
         }
-        if (request.promptRelPath.isBlank() && !PromptTemplateStore(applicationContext).isPromptReady()) {
-            writeStatus(
-                statusFile = statusFile,
-                status = BenchmarkRunStatus(
-                    runId = runId,
-                    state = "failed",
-                    updatedAtMs = System.currentTimeMillis(),
-                    startedAtMs = startedAt,
-                    error = "Prompt is not ready",
-                    resultRelPath = request.outputRelPath,
-                    reportRelPath = reportRelPath
-                )
-            )
+        if (
+            request.prompts.any { it.promptRelPath.isBlank() } &&
+            !PromptTemplateStore(applicationContext).isPromptReady()
+        ) {
+            writeStatus(statusFile, runStatus(state = "failed", error = "Prompt is not ready"))
             return
         }
 
-        val datasetFile = resolveAppFile(request.datasetRelPath)
-        val promptFile = request.promptRelPath.takeIf { it.isNotBlank() }?.let { resolveAppFile(it) }
-        if (request.promptRelPath.isNotBlank() && (promptFile == null || !promptFile.exists())) {
-            writeStatus(
-                statusFile = statusFile,
-                status = BenchmarkRunStatus(
-                    runId = runId,
-                    state = "failed",
-                    updatedAtMs = System.currentTimeMillis(),
-                    startedAtMs = startedAt,
-                    error = "Prompt file not found: ${request.promptRelPath}",
-                    resultRelPath = request.outputRelPath,
-                    reportRelPath = reportRelPath
+        // Every prompt is read and every output path resolved before the model loads.
+        val promptTemplates = ArrayList<String?>(request.prompts.size)
+        for (prompt in request.prompts) {
+            val promptFile = prompt.promptRelPath.takeIf { it.isNotBlank() }?.let { resolveAppFile(it) }
+            if (prompt.promptRelPath.isNotBlank() && (promptFile == null || !promptFile.exists())) {
+                writeStatus(
+                    statusFile,
+                    runStatus(state = "failed", prompt = prompt, error = "Prompt file not found: ${prompt.promptRelPath}")
                 )
-            )
-            return
+                return
+            }
+            if (
+                resolveAppFile(prompt.outputRelPath) == null ||
+                resolveAppFile(prompt.reportRelPath) == null ||
+                resolveAppFile(prompt.casesRelPath) == null
+            ) {
+                writeStatus(statusFile, runStatus(state = "failed", prompt = prompt, error = "Invalid output path"))
+                return
+            }
+            promptTemplates += if (promptFile != null) {
+                runCatching { promptFile.readText() }.getOrElse { error ->
+                    writeStatus(
+                        statusFile,
+                        runStatus(
+                            state = "failed",
+                            prompt = prompt,
+                            error = "Failed reading prompt file: ${error.message}"
+                        )
+                    )
+                    return
+                }
+            } else {
+                null
+            }
         }
+
+        val datasetFile = resolveAppFile(request.datasetRelPath)
         if (datasetFile == null || !datasetFile.exists()) {
             writeStatus(
-                statusFile = statusFile,
-                status = BenchmarkRunStatus(
-                    runId = runId,
-                    state = "failed",
-                    updatedAtMs = System.currentTimeMillis(),
-                    startedAtMs = startedAt,
-                    error = "Dataset file not found: ${request.datasetRelPath}",
-                    resultRelPath = request.outputRelPath,
-                    reportRelPath = reportRelPath
-                )
-            )
-            return
-        }
-        if (resultFile == null || reportFile == null) {
-            writeStatus(
-                statusFile = statusFile,
-                status = BenchmarkRunStatus(
-                    runId = runId,
-                    state = "failed",
-                    updatedAtMs = System.currentTimeMillis(),
-                    startedAtMs = startedAt,
-                    error = "Invalid output path",
-                    resultRelPath = request.outputRelPath,
-                    reportRelPath = reportRelPath
-                )
+                statusFile,
+                runStatus(state = "failed", error = "Dataset file not found: ${request.datasetRelPath}")
             )
             return
         }
 
-        val promptTemplate = if (promptFile != null) {
-            runCatching { promptFile.readText() }.getOrElse { error ->
-                writeStatus(
-                    statusFile = statusFile,
-                    status = BenchmarkRunStatus(
-                        runId = runId,
-                        state = "failed",
-                        updatedAtMs = System.currentTimeMillis(),
-                        startedAtMs = startedAt,
-                        error = "Failed reading prompt file: ${error.message}",
-                        resultRelPath = request.outputRelPath,
-                        reportRelPath = reportRelPath
-                    )
-                )
-                return
-            }
-        } else {
-            null
-        }
-
         val datasetCases = runCatching {
             datasetFile.bufferedReader().useLines { lines ->
                 lines
@@ -220,122 +217,115 @@ class BenchmarkAdbService : Service() {
                 )
             }
         }.getOrElse { error ->
-            writeStatus(
-                statusFile = statusFile,
-                status = BenchmarkRunStatus(
-                    runId = runId,
-                    state = "failed",
-                    updatedAtMs = System.currentTimeMillis(),
-                    startedAtMs = startedAt,
-                    error = "Failed parsing dataset: ${error.message}",
-                    resultRelPath = request.outputRelPath,
-                    reportRelPath = reportRelPath
-                )
-            )
+            writeStatus(statusFile, runStatus(state = "failed", error = "Failed parsing dataset: ${error.message}"))
             return
         }
 
         if (datasetCases.isEmpty()) {
-            writeStatus(
-                statusFile = statusFile,
-                status = BenchmarkRunStatus(
-                    runId = runId,
-                    state = "failed",
-                    updatedAtMs = System.currentTimeMillis(),
-                    startedAtMs = startedAt,
-                    error = "Dataset is empty",
-                    resultRelPath = request.outputRelPath,
-                    reportRelPath = reportRelPath
-                )
-            )
+            writeStatus(statusFile, runStatus(state = "failed", error = "Dataset is empty"))
             return
         }
 
+        // One gateway for the whole manifest so the model is loaded and warmed up once.
         val gateway = LiteRtBenchmarkGateway(
             context = applicationContext
         )
-        val activePromptTemplate = if (promptTemplate.isNullOrBlank()) {
-            PromptTemplateStore(applicationContext).currentPromptTemplate()
-        } else {
-            promptTemplate
-        }
-        val session = runCatching {
-            BenchmarkRunner.runAll(
-                gateway = gateway,
-                cases = datasetCases,
-                suiteVersion = "v1+adb_device",
-                repeats = BenchmarkRunner.DEFAULT_REPEATS,
-                modelId = ModelCatalog.liteRtLm.id,
-                promptInstructionsSnapshot = LiteRtPromptTemplates.benchmarkInstructionSnapshot(
-                    rewriteInstructionOverride = activePromptTemplate?.trim()
-                ),
-                runtimeConfigSnapshot = LiteRtRuntimeConfig.reportSnapshot(),
-                composePromptTemplateOverride = promptTemplate,
-                onProgress = { progress ->
+        try {
+            for ((prompt, promptTemplate) in request.prompts.zip(promptTemplates)) {
+                val resultFile = resolveAppFile(prompt.outputRelPath) ?: return
+                val reportFile = resolveAppFile(prompt.reportRelPath) ?: return
+                val casesFile = resolveAppFile(prompt.casesRelPath) ?: return
+                val activePromptTemplate = if (promptTemplate.isNullOrBlank()) {
+                    PromptTemplateStore(applicationContext).currentPromptTemplate()
+                } else {
+                    promptTemplate
+                }
+                runCatching {
+                    casesFile.parentFile?.mkdirs()
+                    casesFile.writeText("")
+                }.onFailure { error ->
+                    Log.e(TAG, "Failed resetting cases file: ${casesFile.absolutePath}", error)
+                }
+                val session = runCatching {
+                    BenchmarkRunner.runAll(
+                        gateway = gateway,
+                        cases = datasetCases,
+                        suiteVersion = "v1+adb_device",
+                        repeats = BenchmarkRunner.DEFAULT_REPEATS,
+                        modelId = ModelCatalog.liteRtLm.id,
+                        promptInstructionsSnapshot = LiteRtPromptTemplates.benchmarkInstructionSnapshot(
+                            rewriteInstructionOverride = activePromptTemplate?.trim()
+                        ),
+                        runtimeConfigSnapshot = LiteRtRuntimeConfig.reportSnapshot(),
+                        composePromptTemplateOverride = promptTemplate,
+                        onProgress = { progress ->
+                            writeStatus(
+                                statusFile,
+                                runStatus(
+                                    state = "running",
+                                    prompt = prompt,
+                                    message = "Running benchmark",
+                                    progress = progress
+                                )
+                            )
+                        },
+                        onCaseCompleted = { caseResult ->
+                            appendCaseLine(casesFile, caseResultJson(caseResult))
+                        }
+                    )
+                }.onFailure { error ->
+                    Log.e(TAG, "ADB benchmark run failed", error)
+                }.getOrNull()
+
+                if (session == null) {
                     writeStatus(
-                        statusFile = statusFile,
-                        status = BenchmarkRunStatus(
-                            runId = runId,
-                            state = "running",
-                            updatedAtMs = System.currentTimeMillis(),
-                            startedAtMs = startedAt,
-                            message = "Running benchmark",
-                            progress = progress,
-                            resultRelPath = request.outputRelPath,
-                            reportRelPath = reportRelPath
-                        )
+                        statusFile,
+                        runStatus(state = "failed", prompt = prompt, error = "Benchmark execution failed")
                     )
+                    return
                 }
-            )
-        }.onFailure { error ->
-            Log.e(TAG, "ADB benchmark run failed", error)
-        }.getOrNull()
-        gateway.release()
 
-        if (session == null) {
-            writeStatus(
-                statusFile = statusFile,
-                status = BenchmarkRunStatus(
-                    runId = runId,
-                    state = "failed",
-                    updatedAtMs = System.currentTimeMillis(),
-                    startedAtMs = startedAt,
-                    error = "Benchmark execution failed",
-                    resultRelPath = request.outputRelPath,
-                    reportRelPath = reportRelPath
+                reportFile.parentFile?.mkdirs()
+                reportFile.writeText(BenchmarkReportFormatter.toPlainText(session))
+                resultFile.parentFile?.mkdirs()
+                resultFile.writeText(
+                    sessionResultJson(
+                        runId = runId,
+                        prompt = prompt.takeIf { isManifestRun },
+                        promptRelPath = prompt.promptRelPath,
+                        datasetRelPath = request.datasetRelPath,
+                        session = session
+                    ).toString(2)
                 )
-            )
-            return
+            }
+        } finally {
+            gateway.release()
         }
 
-        reportFile.parentFile?.mkdirs()
-        reportFile.writeText(BenchmarkReportFormatter.toPlainText(session))
+        writeStatus(
+            statusFile,
+            runStatus(state = "completed", prompt = request.prompts.last(), message = "Benchmark completed")
+        )
+    }
 
-        val summaryCases = session.cases.map { caseResult ->
-            val output = BenchmarkScoring.benchmarkOutputText(caseResult.runs)
-            val lastRun = caseResult.runs.lastOrNull()
-            JSONObject().apply {
-                put("id", caseResult.caseDef.id)
-                put("input", caseResult.caseDef.composeInput.orEmpty())
-                put("expected", caseResult.caseDef.expectedOutput.orEmpty())
-                put("actual", output)
-                put("passed", BenchmarkScoring.isCasePassed(caseResult))
-                put("success", caseResult.runs.all { it.success })
-                put("latency_ms", caseResult.avgLatencyMs)
-                put("backend", lastRun?.backend ?: "n/a")
-                put("error", lastRun?.errorMessage ?: "")
-                put("error_type", lastRun?.errorType ?: "")
-            }
-        }
+    private fun sessionResultJson(
+        runId: String,
+        prompt: BenchmarkPromptRun?,
+        promptRelPath: String,
+        datasetRelPath: String,
+        session: BenchmarkSessionResult
+    ): JSONObject {
+        val summaryCases = session.cases.map { caseResultJson(it) }
         val passCount = session.cases.count { BenchmarkScoring.isCasePassed(it) }
         val failCount = session.totalCases - passCount
-        val resultJson = JSONObject().apply {
+        return JSONObject().apply {
             put("run_id", runId)
+            if (prompt != null) put("prompt_id", prompt.promptId)
             put("suite_version", session.suiteVersion)
             put("model_id", session.modelId)
             put("timestamp_ms", session.timestampMs)
-            put("prompt_file", request.promptRelPath.ifBlank { "(app_default)" })
-            put("dataset_file", request.datasetRelPath)
+            put("prompt_file", promptRelPath.ifBlank { "(app_default)" })
+            put("dataset_file", datasetRelPath)
             put("prompt_instructions", session.promptInstructionsSnapshot)
             put("runtime_config", session.runtimeConfigSnapshot)
             put(
@@ -358,22 +348,31 @@ class BenchmarkAdbService : Service() {
             )
             put("cases", JSONArray(summaryCases))
         }
+    }
 
-        resultFile.parentFile?.mkdirs()
-        resultFile.writeText(resultJson.toString(2))
+    private fun caseResultJson(caseResult: BenchmarkCaseResult): JSONObject {
+        val output = BenchmarkScoring.benchmarkOutputText(caseResult.runs)
+        val lastRun = caseResult.runs.lastOrNull()
+        return JSONObject().apply {
+            put("id", caseResult.caseDef.id)
+            put("input", caseResult.caseDef.composeInput.orEmpty())
+            put("expected", caseResult.caseDef.expectedOutput.orEmpty())
+            put("actual", output)
+            put("passed", BenchmarkScoring.isCasePassed(caseResult))
+            put("success", caseResult.runs.all { it.success })
+            put("latency_ms", caseResult.avgLatencyMs)
+            put("backend", lastRun?.backend ?: "n/a")
+            put("error", lastRun?.errorMessage ?: "")
+            put("error_type", lastRun?.errorType ?: "")
+        }
+    }
 
-        writeStatus(
-            statusFile = statusFile,
-            status = BenchmarkRunStatus(
-                runId = runId,
-                state = "completed",
-                updatedAtMs = System.currentTimeMillis(),
-                startedAtMs = startedAt,
-                message = "Benchmark completed",
-                resultRelPath = request.outputRelPath,
-                reportRelPath = reportRelPath
-            )
-        )
+    private fun appendCaseLine(casesFile: File, caseJson: JSONObject) {
+        runCatching {
+            casesFile.appendText(caseJson.toString() + "\n")
+        }.onFailure { error ->
+            Log.e(TAG, "Failed appending case result: ${casesFile.absolutePath}", error)
+        }
     }
 
     private fun writeStatus(statusFile: File, status: BenchmarkRunStatus) {
@@ -383,6 +382,8 @@ class BenchmarkAdbService : Service() {
         }.onFailure { error ->
             Log.e(TAG, "Failed writing status file: ${statusFile.absolutePath}", error)
         }
+        // Written after the file so a host woken by this line can read the final state.
+        Log.i(BenchmarkAdbContracts.STATUS_LOG_TAG, status.toJson().toString())
     }
 
     private fun resolveAppFile(relativePath: String): File? {
@@ -115,6 +115,44 @@ class BenchmarkCoreTest {
         assertEquals(30L, caseResult.maxLatencyMs)
     }
 
+    @Test
+    fun caseCompletedCallback_firesOncePerCaseInOrder() = runBlocking {
+        val cases = listOf("C1", "C2", "C3").map { id ->
+            BenchmarkCase(
+                id = id,
+                title = "Compose $id",
+                category = "compose",
+                type = BenchmarkCaseType.COMPOSE,
+                composeInput = id.lowercase()
+            )
+        }
+        val gateway = object : BenchmarkGateway {
+            override fun runCompose(input: String, promptTemplateOverride: String?): RewriteResult {
+                return RewriteResult.Success(text = input, latencyMs = 5L, backend = Backend.CPU())
+            }
+
+            override fun runEdit(original: String, instruction: String): RewriteResult {
+                return RewriteResult.Success(text = original, latencyMs = 5L, backend = Backend.CPU())
+            }
+        }
+        val completed = ArrayList<BenchmarkCaseResult>()
+
+        val result = BenchmarkRunner.runAll(
+            gateway = gateway,
+            cases = cases,
+            suiteVersion = "test",
+            repeats = 2,
+            modelId = "model",
+            promptInstructionsSnapshot = "snapshot",
+            runtimeConfigSnapshot = "runtime",
+            onCaseCompleted = { completed += it }
+        )
+
+        assertEquals(listOf("C1", "C2", "C3"), completed.map { it.caseDef.id })
+        assertEquals(result.cases, completed)
+        assertTrue(completed.all { it.runs.size == 2 })
+    }
+
     @Test
     fun failureMapping_isCapturedInRunResults() = runBlocking {
         val case = BenchmarkCase(
@@ -0,0 +1,49 @@
+package com.sanogueralorenzo.voice.benchmark.adb
+
+import org.junit.Assert.assertEquals
+import org.junit.Assert.assertTrue
+import org.junit.Test
+
+class BenchmarkAdbContractsTest {
+    @Test
+    fun manifest_defaultsOutputPathsPerPrompt() {
+        val prompts = BenchmarkPromptRun.parseManifest(
+            manifestJson = """
+                {"prompts": [
+                  {"prompt_id": "a", "prompt_rel_path": "benchmark_cas/a.txt"},
+                  {"prompt_rel_path": "benchmark_cas/b.txt", "output_rel_path": "out/b.json"}
+                ]}
+            """.trimIndent(),
+            runId = "run_1"
+        )
+
+        assertEquals(listOf("a", "p2"), prompts.map { it.promptId })
+        assertEquals("benchmark_runs/run_1.a.result.json", prompts[0].outputRelPath)
+        assertEquals("benchmark_runs/run_1.a.report.txt", prompts[0].reportRelPath)
+        assertEquals("benchmark_runs/run_1.a.cases.jsonl", prompts[0].casesRelPath)
+        assertEquals("out/b.json", prompts[1].outputRelPath)
+        assertEquals("benchmark_cas/b.txt", prompts[1].promptRelPath)
+    }
+
+    @Test
+    fun manifest_rejectsEmptyDuplicateAndUnsafeIds() {
+        val invalid = listOf(
+            """{"prompts": []}""",
+            """{"prompts": [{"prompt_id": "a"}, {"prompt_id": "a"}]}""",
+            """{"prompts": [{"prompt_id": "../a"}]}"""
+        )
+        for (manifestJson in invalid) {
+            val result = runCatching { BenchmarkPromptRun.parseManifest(manifestJson, "run_1") }
+            assertTrue(manifestJson, result.exceptionOrNull() is IllegalArgumentException)
+        }
+    }
+
+    @Test
+    fun singlePrompt_keepsRunScopedPaths() {
+        val prompt = BenchmarkPromptRun.single(runId = "run_1", promptRelPath = "p.txt", outputRelPath = "")
+
+        assertEquals("benchmark_runs/run_1.result.json", prompt.outputRelPath)
+        assertEquals("benchmark_runs/run_1.report.txt", prompt.reportRelPath)
+        assertEquals("benchmark_runs/run_1.cases.jsonl", prompt.casesRelPath)
+    }
+}
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""Local stand-in for `adb` that emulates the benchmark receiver without a device.
+
+Point the Android scripts at it with the ADB environment variable:
+
+    ADB=scripts/fake_adb.py python3 scripts/prompt_eval_android.py --cases-file ...
+
+State lives under FAKE_ADB_ROOT (default: .cache/fake_adb), one directory per
+serial. `run-as <package> ...` runs the command with a real `sh` inside
+<serial>/data/<package>, so `files/...` paths behave like on a device. A benchmark
+broadcast starts a detached simulator that writes the status, result and report
+files (one set per prompt for a manifest broadcast) and logs status lines to the
+fake logcat buffer. `dumpsys` reports a device that warms up as a run progresses. The simulated output is the
+expected text for every case except each FAKE_ADB_FAIL_EVERY-th one; with
+FAKE_ADB_CRASH_AT=N the run fails after N cases.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(os.environ.get("FAKE_ADB_ROOT", ".cache/fake_adb")).resolve()
+SERIALS = [serial for serial in os.environ.get("FAKE_ADB_SERIALS", "fake-0001").split(",") if serial]
+CASE_DELAY_SEC = float(os.environ.get("FAKE_ADB_CASE_DELAY_SEC", "0.02"))
+FAIL_EVERY = int(os.environ.get("FAKE_ADB_FAIL_EVERY", "7"))
+CRASH_AT = int(os.environ.get("FAKE_ADB_CRASH_AT", "0"))
+STATUS_LOG_TAG = "BenchmarkStatus"
+RESULTS_DIR = "benchmark_runs"
+
+
+def serial_root(serial: str) -> Path:
+    return ROOT / serial
+
+
+def app_dir(serial: str, package_name: str) -> Path:
+    path = serial_root(serial) / "data" / package_name
+    (path / "files").mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def append_log(serial: str, tag: str, message: str) -> None:
+    log_path = serial_root(serial) / "logcat.txt"
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with log_path.open("a", encoding="utf-8") as f:
+        f.write(f"{time.time():.3f}\t{tag}\t{message}\n")
+
+
+def write_status(serial: str, files_dir: Path, status: dict) -> None:
+    status_path = files_dir / RESULTS_DIR / f"{status['run_id']}.status.json"
+    status_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = status_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(status, indent=2), encoding="utf-8")
+    tmp_path.replace(status_path)
+    append_log(serial, STATUS_LOG_TAG, json.dumps(status))
+
+
+def prompt_runs(files_dir: Path, run_id: str, extras: dict[str, str]) -> list[dict[str, str]]:
+    """The prompts of a run: the manifest's entries, or the single prompt extra."""
+    if extras.get("manifest_rel_path"):
+        manifest = json.loads((files_dir / extras["manifest_rel_path"]).read_text(encoding="utf-8"))
+        runs = []
+        for index, entry in enumerate(manifest["prompts"], start=1):
+            prompt_id = entry.get("prompt_id") or f"p{index}"
+            prefix = f"{RESULTS_DIR}/{run_id}.{prompt_id}"
+            runs.append(
+                {
+                    "prompt_id": prompt_id,
+                    "prompt_rel_path": entry.get("prompt_rel_path", ""),
+                    "result_rel_path": entry.get("output_rel_path") or f"{prefix}.result.json",
+                    "report_rel_path": entry.get("report_rel_path") or f"{prefix}.report.txt",
+                    "cases_rel_path": entry.get("cases_rel_path") or f"{prefix}.cases.jsonl",
+                }
+            )
+        return runs
+    return [
+        {
+            "prompt_id": "default",
+            "prompt_rel_path": extras.get("prompt_rel_path", ""),
+            "result_rel_path": extras.get("output_rel_path") or f"{RESULTS_DIR}/{run_id}.result.json",
+            "report_rel_path": f"{RESULTS_DIR}/{run_id}.report.txt",
+            "cases_rel_path": f"{RESULTS_DIR}/{run_id}.cases.jsonl",
+        }
+    ]
+
+
+def simulate_run(serial: str, package_name: str, extras: dict[str, str]) -> None:
+    files_dir = app_dir(serial, package_name) / "files"
+    run_id = extras.get("run_id") or f"run_{int(time.time() * 1000)}"
+    batched = bool(extras.get("manifest_rel_path"))
+    started_at = int(time.time() * 1000)
+    runs = prompt_runs(files_dir, run_id, extras)
+
+    def status_base(index: int) -> dict:
+        prompt = runs[index]
+        base = {
+            "run_id": run_id,
+            "started_at_ms": started_at,
+            "result_rel_path": prompt["result_rel_path"],
+            "report_rel_path": prompt["report_rel_path"],
+            "cases_rel_path": prompt["cases_rel_path"],
+        }
+        if batched:
+            base.update(prompt_id=prompt["prompt_id"], prompt_index=index + 1, total_prompts=len(runs))
+        return base
+
+    def fail(index: int, error: str) -> None:
+        write_status(
+            serial,
+            files_dir,
+            {**status_base(index), "state": "failed", "updated_at_ms": int(time.time() * 1000), "error": error},
+        )
+
+    write_status(serial, files_dir, {**status_base(0), "state": "running", "updated_at_ms": started_at})
+
+    dataset_path = files_dir / extras.get("dataset_rel_path", "")
+    if not dataset_path.is_file():
+        fail(0, f"Dataset file not found: {extras.get('dataset_rel_path', '')}")
+        return
+    rows = [
+        json.loads(line)
+        for line in dataset_path.read_text(encoding="utf-8").splitlines()
+        if line.strip() and not line.strip().startswith("#")
+    ]
+
+    done_cases = 0
+    for prompt_index, prompt in enumerate(runs):
+        prompt_started = int(time.time() * 1000)
+        cases_path = files_dir / prompt["cases_rel_path"]
+        cases_path.parent.mkdir(parents=True, exist_ok=True)
+        cases_path.write_text("", encoding="utf-8")
+        cases = []
+        for index, row in enumerate(rows, start=1):
+            done_cases += 1
+            if CRASH_AT and done_cases > CRASH_AT:
+                fail(prompt_index, "Benchmark execution failed")
+                return
+            case_started = time.perf_counter()
+            time.sleep(CASE_DELAY_SEC)
+            passed = FAIL_EVERY <= 0 or (index + prompt_index) % FAIL_EVERY != 0
+            expected = str(row.get("expected", ""))
+            actual = expected if passed else str(row.get("input", ""))
+            cases.append(
+                {
+                    "id": str(row.get("id", index)),
+                    "input": str(row.get("input", "")),
+                    "expected": expected,
+                    "actual": actual,
+                    "passed": passed,
+                    "success": True,
+                    "latency_ms": max(1, int((time.perf_counter() - case_started) * 1000)),
+                    "backend": "fake",
+                    "error": "",
+                    "error_type": "",
+                }
+            )
+            with cases_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(cases[-1]) + "\n")
+            write_status(
+                serial,
+                files_dir,
+                {
+                    **status_base(prompt_index),
+                    "state": "running",
+                    "updated_at_ms": int(time.time() * 1000),
+                    "message": "Running benchmark",
+                    "progress": {
+                        "case_index": index,
+                        "total_cases": len(rows),
+                        "run_index": 1,
+                        "repeats": 1,
+                        "case_id": cases[-1]["id"],
+                    },
+                },
+            )
+
+        pass_count = sum(1 for case in cases if case["passed"])
+        result = {
+            "run_id": run_id,
+            "suite_version": "v1+adb_device",
+            "model_id": "fake",
+            "timestamp_ms": prompt_started,
+            "prompt_file": prompt["prompt_rel_path"] or "(app_default)",
+            "dataset_file": extras.get("dataset_rel_path", ""),
+            "summary": {
+                "total_cases": len(cases),
+                "pass_count": pass_count,
+                "fail_count": len(cases) - pass_count,
+                "pass_rate": pass_count / len(cases) * 100.0 if cases else 0.0,
+                "total_elapsed_ms": int(time.time() * 1000) - prompt_started,
+                "avg_latency_ms": int(sum(case["latency_ms"] for case in cases) / len(cases)) if cases else 0,
+            },
+            "cases": cases,
+        }
+        if batched:
+            result["prompt_id"] = prompt["prompt_id"]
+        output_path = files_dir / prompt["result_rel_path"]
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        (files_dir / prompt["report_rel_path"]).write_text(
+            f"FAKE DEVICE REPORT\nrun_id: {run_id}\nprompt_id: {prompt['prompt_id']}\npass: {pass_count}/{len(cases)}\n",
+            encoding="utf-8",
+        )
+
+    completed = {
+        **status_base(len(runs) - 1),
+        "state": "completed",
+        "updated_at_ms": int(time.time() * 1000),
+        "message": "Benchmark completed",
+    }
+    if batched:
+        completed["prompts"] = runs
+    write_status(serial, files_dir, completed)
+
+
+def parse_broadcast(args: list[str]) -> tuple[str, dict[str, str]]:
+    component = ""
+    extras: dict[str, str] = {}
+    index = 0
+    while index < len(args):
+        if args[index] == "-n":
+            component = args[index + 1]
+            index += 2
+        elif args[index] == "--es":
+            extras[args[index + 1]] = args[index + 2]
+            index += 3
+        else:
+            index += 1
+    return component.split("/", 1)[0], extras
+
+
+def tool_dir() -> Path:
+    """Device-only commands used inside shell scripts (run-as, dumpsys) as PATH shims."""
+    path = ROOT / "bin"
+    path.mkdir(parents=True, exist_ok=True)
+    shims = {
+        "run-as": f'#!/bin/sh\npkg=$1; shift\ncd "{ROOT}/$FAKE_ADB_SERIAL/data/$pkg" && exec "$@"\n',
+        "dumpsys": f'#!/bin/sh\nexec "{sys.executable}" "{os.path.abspath(__file__)}" -s "$FAKE_ADB_SERIAL" __dumpsys__ "$@"\n',
+    }
+    for name, content in shims.items():
+        shim = path / name
+        if not shim.exists() or shim.read_text(encoding="utf-8") != content:
+            shim.write_text(content, encoding="utf-8")
+            shim.chmod(0o755)
+    return path
+
+
+def device_temp_c(serial: str) -> float:
+    """Heats up by 0.05C per status line logged since the last broadcast, from 30C."""
+    log_path = serial_root(serial) / "logcat.txt"
+    mark_path = serial_root(serial) / "broadcast_mark"
+    lines = len(log_path.read_text(encoding="utf-8").splitlines()) if log_path.exists() else 0
+    mark = int(mark_path.read_text(encoding="utf-8")) if mark_path.exists() else 0
+    return round(30.0 + min(max(lines - mark, 0), 300) * 0.05, 1)
+
+
+def dumpsys(serial: str, args: list[str]) -> int:
+    temp = device_temp_c(serial)
+    service = args[0] if args else ""
+    if service == "thermalservice":
+        status = 0 if temp < 38 else 1 if temp < 42 else 2
+        print(f"Thermal Status: {status}")
+        print("Current temperatures from HAL:")
+        print(f"\tTemperature{{mValue={temp}, mType=0, mName=cpu0, mStatus={status}}}")
+    elif service == "battery":
+        print("Current Battery Service state:")
+        print("  AC powered: false")
+        print("  USB powered: true")
+        print("  level: 87")
+        print(f"  temperature: {int(temp * 10) - 40}")
+    elif service == "meminfo":
+        print(f"** MEMINFO in pid 4242 [{args[1] if len(args) > 1 else ''}] **")
+        print("           TOTAL PSS:   812345            TOTAL RSS:   901234")
+    elif service == "cpuinfo":
+        print("Load: 5.2 / 4.1 / 3.0")
+        print("CPU usage from 9870ms to -130ms ago:")
+        print("  61% 4242/com.sanogueralorenzo.voice: 55% user + 6% kernel")
+        print("78% TOTAL: 60% user + 18% kernel")
+    return 0
+
+
+def run_shell(command: str, cwd: Path, serial: str) -> int:
+    # Like a device shell session, everything it started dies with the adb connection.
+    env = {
+        **os.environ,
+        "FAKE_ADB_ROOT": str(ROOT),
+        "FAKE_ADB_SERIAL": serial,
+        "PATH": f"{tool_dir()}{os.pathsep}{os.environ.get('PATH', '')}",
+    }
+    process = subprocess.Popen(["sh", "-c", command], cwd=str(cwd), env=env, start_new_session=True)
+
+    def hang_up(signum: int, _frame: object) -> None:
+        os.killpg(process.pid, signal.SIGTERM)
+        raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, hang_up)
+    return process.wait()
+
+
+def shell(serial: str, args: list[str]) -> int:
+    # adb joins shell arguments into one command line for the device shell.
+    words = shlex.split(" ".join(args))
+    if not words:
+        return 0
+    if words[0] == "run-as":
+        return run_shell(shlex.join(words[2:]), app_dir(serial, words[1]), serial)
+    if words[:2] == ["pm", "path"]:
+        print(f"package:/data/app/{words[2]}/base.apk")
+        return 0
+    if words[0] == "getprop":
+        print("FakePhone" if words[1:] == ["ro.product.model"] else "")
+        return 0
+    if words[0] == "monkey":
+        print("Events injected: 1")
+        return 0
+    if words[:2] == ["am", "broadcast"]:
+        package_name, extras = parse_broadcast(words[2:])
+        log_path = serial_root(serial) / "logcat.txt"
+        lines = len(log_path.read_text(encoding="utf-8").splitlines()) if log_path.exists() else 0
+        (serial_root(serial) / "broadcast_mark").write_text(str(lines), encoding="utf-8")
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "-s", serial, "__simulate__", package_name, json.dumps(extras)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        print("Broadcast completed: result=0")
+        return 0
+    return run_shell(shlex.join(words), serial_root(serial), serial)
+
+
+def logcat(serial: str, args: list[str]) -> int:
+    tags = {spec.split(":", 1)[0] for index, spec in enumerate(args) if index > 0 and args[index - 1] == "-s"}
+    # Only the 'sssss.mmm' form of -T is supported; lines logged before it are skipped.
+    since = float(args[args.index("-T") + 1]) if "-T" in args else 0.0
+    log_path = serial_root(serial) / "logcat.txt"
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    log_path.touch()
+    with log_path.open("r", encoding="utf-8") as f:
+        while True:
+            line = f.readline()
+            if not line:
+                if "-d" in args:
+                    return 0
+                time.sleep(0.01)
+                continue
+            logged_at, tag, message = line.rstrip("\n").split("\t", 2)
+            if float(logged_at) >= since and (not tags or tag in tags):
+                print(message, flush=True)
+
+
+def main(argv: list[str]) -> int:
+    serial = ""
+    if len(argv) >= 2 and argv[0] == "-s":
+        serial, argv = argv[1], argv[2:]
+    if not argv:
+        print("usage: fake_adb.py [-s SERIAL] COMMAND ...", file=sys.stderr)
+        return 1
+    command, args = argv[0], argv[1:]
+    if command == "devices":
+        print("List of devices attached")
+        for known in SERIALS:
+            print(f"{known}\tdevice")
+        return 0
+
+    if not serial:
+        if len(SERIALS) != 1:
+            print("adb: more than one device/emulator", file=sys.stderr)
+            return 1
+        serial = SERIALS[0]
+    if serial not in SERIALS:
+        print(f"adb: device '{serial}' not found", file=sys.stderr)
+        return 1
+
+    if command in ("shell", "exec-out"):
+        return shell(serial, args)
+    if command == "logcat":
+        return logcat(serial, args)
+    if command == "__dumpsys__":
+        return dumpsys(serial, args)
+    if command == "__simulate__":
+        simulate_run(serial, args[0], json.loads(args[1]))
+        return 0
+    print(f"fake_adb: unsupported command {command}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
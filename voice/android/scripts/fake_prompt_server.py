@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Local stand-in for the prompt host, for exercising the cached prompt fetcher.
+
+Serves files under --root with ETag and Last-Modified headers and answers
+conditional requests with 304, logging every request:
+
+    python3 scripts/fake_prompt_server.py --root scripts --port 8765 &
+    python3 scripts/prompt_eval_android.py --prompt-a-url http://127.0.0.1:8765/prompt_a.json ...
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+def make_handler(root: Path) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            path = (root / self.path.split("?", 1)[0].lstrip("/")).resolve()
+            if root not in path.parents or not path.is_file():
+                self.send_error(404)
+                return
+            body = path.read_bytes()
+            etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+            mtime = int(path.stat().st_mtime)
+            if self.headers.get("If-None-Match") == etag or self._not_modified_since(mtime):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _not_modified_since(self, mtime: int) -> bool:
+            since = self.headers.get("If-Modified-Since")
+            if not since or self.headers.get("If-None-Match"):
+                return False
+            try:
+                return mtime <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+
+    return Handler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Serve prompt files with ETag/Last-Modified support.")
+    parser.add_argument("--root", default=".")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(Path(args.root).resolve()))
+    print(f"Serving {Path(args.root).resolve()} on http://{args.host}:{args.port}/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,41 @@
 // Android-like LiteRT-LM evaluator for prompt benchmarking on desktop.
 // Matches app defaults: sampler profile level 0, max_num_tokens=224, and
 // GPU->CPU backend fallback.
-
+//
+// With --server_mode the engine is created once and kept resident; rendered
+// prompts are then read from stdin as JSON lines and answered on stdout:
+//   request:  {"id": "case_1", "prompt": "...", "system_instruction": "..."}
+//   response: {"id": "case_1", "output": "...", "latency_ms": 812}
+//             {"id": "case_1", "error": "...", "latency_ms": 3}
+// A single {"event": "ready", "backend": "gpu", "prefix_cache": true,
+// "tokenize": true} line is printed once the engine is loaded.
+// "system_instruction" is optional and defaults to the flag.
+//
+// Token counts come from the model's tokenizer without running inference:
+//   request:  {"id": 7, "op": "tokenize", "text": "..."}
+//   response: {"id": 7, "tokens": 412}
+//
+// Requests may split the prompt into a shared "prefix" and a per-case "prompt":
+//   request:  {"id": "case_2", "prefix": "<rules>...", "prompt": "<input>..."}
+//   response: {"id": "case_2", "output": "...", "latency_ms": 240,
+//              "prefix_cached": true}
+// Inference responses also carry per-request timings in the shape of LiteRT-LM's
+// BenchmarkInfo, with only the fields the request path could measure:
+//   "benchmark": {"ttft_ms": 95.2, "prefill_tokens": 41, "prefill_ms": 80.1,
+//                 "decode_tokens": 12, "decode_ms": 140.7}
+// Token counts come from the tokenizer over the text this request fed and got
+// back, so chat template tokens are not included.
+//
+// The prefix is prefilled once into a session that later requests with the same
+// prefix clone, so each case only prefills its own suffix. "prefix_cached" is
+// false when this request paid for the prefix prefill. The most recently used
+// --prefix_cache_entries prefixes stay resident, so paired A/B runs that
+// alternate two prompts hit the cache on both sides.
+
+#include <algorithm>
 #include <fstream>
 #include <iostream>
+#include <list>
 #include <memory>
 #include <sstream>
 #include <string>
@@ -19,13 +51,16 @@
 #include "absl/log/globals.h"  // from @com_google_absl
 #include "absl/status/status.h"  // from @com_google_absl
 #include "absl/status/statusor.h"  // from @com_google_absl
+#include "absl/time/clock.h"  // from @com_google_absl
 #include "absl/time/time.h"  // from @com_google_absl
 #include "nlohmann/json.hpp"  // from @nlohmann_json
 #include "runtime/conversation/conversation.h"
 #include "runtime/conversation/io_types.h"
+#include "runtime/engine/engine.h"
 #include "runtime/engine/engine_factory.h"
 #include "runtime/engine/engine_settings.h"
 #include "runtime/engine/io_types.h"
+#include "runtime/proto/llm_metadata.pb.h"
 #include "runtime/proto/sampler_params.pb.h"
 #include "runtime/util/status_macros.h"
 
@@ -43,17 +78,25 @@ ABSL_FLAG(double, top_p, 1.0, "Sampler top-p (Android style level 0).");
 ABSL_FLAG(double, temperature, 0.0,
           "Sampler temperature (Android style level 0).");
 ABSL_FLAG(int, seed, 42, "Sampler seed (Android style level 0).");
+ABSL_FLAG(bool, server_mode, false,
+          "Keep the engine resident and serve JSON-line requests on stdin.");
+ABSL_FLAG(int, prefix_cache_entries, 2,
+          "Prefilled prefix sessions kept resident in --server_mode (min 1).");
 
 namespace {
 
 using ::litert::lm::Backend;
 using ::litert::lm::Conversation;
 using ::litert::lm::ConversationConfig;
+using ::litert::lm::Engine;
 using ::litert::lm::EngineSettings;
+using ::litert::lm::InputText;
 using ::litert::lm::JsonMessage;
 using ::litert::lm::JsonPreface;
 using ::litert::lm::Message;
 using ::litert::lm::ModelAssets;
+using ::litert::lm::Responses;
+using ::litert::lm::SessionConfig;
 using ::nlohmann::json;
 
 absl::StatusOr<std::string> ReadTextFromFlagOrFile(
@@ -115,19 +158,70 @@ std::string ExtractText(const Message& message) {
   return output;
 }
 
-absl::StatusOr<std::string> RunSingleInference(const std::string& model_path,
-                                               Backend backend,
-                                               const std::string& system_instruction,
-                                               const std::string& input_prompt) {
+std::string BackendName(Backend backend) {
+  return backend == Backend::GPU ? "gpu" : "cpu";
+}
+
+absl::StatusOr<std::unique_ptr<Engine>> CreateEngine(const std::string& model_path,
+                                                     Backend backend) {
   ASSIGN_OR_RETURN(ModelAssets model_assets, ModelAssets::Create(model_path));
   ASSIGN_OR_RETURN(EngineSettings engine_settings,
                    EngineSettings::CreateDefault(std::move(model_assets), backend));
+  engine_settings.GetMutableMainExecutorSettings().SetMaxNumTokens(
+      absl::GetFlag(FLAGS_max_num_tokens));
+  return litert::lm::EngineFactory::CreateAny(std::move(engine_settings));
+}
 
-  ASSIGN_OR_RETURN(auto engine,
-                   litert::lm::EngineFactory::CreateAny(std::move(engine_settings)));
+// Session settings with the sampler taken from the flags, so runs use the
+// app's level 0 profile rather than the engine's defaults.
+SessionConfig CreateSessionConfig() {
+  SessionConfig session_config = SessionConfig::CreateDefault();
+  auto& sampler = session_config.GetMutableSamplerParams();
+  sampler.set_type(litert::lm::proto::SamplerParameters::TOP_P);
+  sampler.set_k(absl::GetFlag(FLAGS_top_k));
+  sampler.set_p(absl::GetFlag(FLAGS_top_p));
+  sampler.set_temperature(absl::GetFlag(FLAGS_temperature));
+  sampler.set_seed(absl::GetFlag(FLAGS_seed));
+  return session_config;
+}
 
+// Per-request timings for the server's "benchmark" field; negative means the
+// request path could not measure that figure.
+struct InferenceTimings {
+  double ttft_ms = -1;
+  double prefill_ms = -1;
+  double decode_ms = -1;
+  int prefill_tokens = -1;
+  int decode_tokens = -1;
+};
+
+int CountTokens(Engine& engine, const std::string& text) {
+  auto token_ids_or = engine.GetTokenizer().TextToTokenIds(text);
+  return token_ids_or.ok() ? static_cast<int>(token_ids_or->size()) : -1;
+}
+
+json TimingsJson(const InferenceTimings& timings) {
+  json payload = json::object();
+  if (timings.ttft_ms >= 0) {
+    payload["ttft_ms"] = timings.ttft_ms;
+  }
+  if (timings.prefill_tokens >= 0 && timings.prefill_ms >= 0) {
+    payload["prefill_tokens"] = timings.prefill_tokens;
+    payload["prefill_ms"] = timings.prefill_ms;
+  }
+  if (timings.decode_tokens >= 0 && timings.decode_ms >= 0) {
+    payload["decode_tokens"] = timings.decode_tokens;
+    payload["decode_ms"] = timings.decode_ms;
+  }
+  return payload;
+}
+
+absl::StatusOr<std::string> RunInference(Engine& engine,
+                                         const std::string& system_instruction,
+                                         const std::string& input_prompt,
+                                         InferenceTimings* timings = nullptr) {
   auto builder = ConversationConfig::Builder();
-  builder.SetSessionConfig(litert::lm::SessionConfig::CreateDefault());
+  builder.SetSessionConfig(CreateSessionConfig());
 
   if (!system_instruction.empty()) {
     JsonPreface preface;
@@ -143,13 +237,15 @@ absl::StatusOr<std::string> RunSingleInference(const std::string& model_path,
     builder.SetPreface(preface);
   }
 
-  ASSIGN_OR_RETURN(auto conversation_config, builder.Build(*engine));
+  ASSIGN_OR_RETURN(auto conversation_config, builder.Build(engine));
   ASSIGN_OR_RETURN(auto conversation,
-                   Conversation::Create(*engine, conversation_config));
+                   Conversation::Create(engine, conversation_config));
 
   std::mutex callback_mutex;
   absl::Status callback_status = absl::OkStatus();
   std::string output_text;
+  const absl::Time started = absl::Now();
+  absl::Time first_token = absl::InfinitePast();
 
   RETURN_IF_ERROR(conversation->SendMessageAsync(
       json::object({{"role", "user"}, {"content", input_prompt}}),
@@ -166,6 +262,9 @@ absl::StatusOr<std::string> RunSingleInference(const std::string& model_path,
           return;
         }
 
+        if (first_token == absl::InfinitePast()) {
+          first_token = absl::Now();
+        }
         const auto& content = (*json_message)["content"];
         if (content.is_string()) {
           output_text += content.get<std::string>();
@@ -180,15 +279,204 @@ absl::StatusOr<std::string> RunSingleInference(const std::string& model_path,
         }
       }));
 
-  RETURN_IF_ERROR(engine->WaitUntilDone(absl::Minutes(10)));
+  RETURN_IF_ERROR(engine.WaitUntilDone(absl::Minutes(10)));
+  const absl::Time finished = absl::Now();
 
   std::lock_guard<std::mutex> lock(callback_mutex);
   if (!callback_status.ok()) {
     return callback_status;
   }
+  if (timings != nullptr && first_token != absl::InfinitePast()) {
+    // Prefill and decode are not separated on this path; the first streamed
+    // chunk marks the boundary.
+    timings->ttft_ms = absl::ToDoubleMilliseconds(first_token - started);
+    timings->decode_ms = absl::ToDoubleMilliseconds(finished - first_token);
+    timings->decode_tokens = CountTokens(engine, output_text);
+  }
   return output_text;
 }
 
+// Keeps sessions with recently used shared prefixes already prefilled, evicting
+// the least recently used one beyond max_entries. Cases are evaluated on clones
+// of them, so the prefix KV cache is computed once per distinct prefix instead
+// of once per case, even when requests alternate between prompts.
+class PrefixSessionCache {
+ public:
+  PrefixSessionCache(Engine& engine, int max_entries)
+      : engine_(engine), max_entries_(std::max(max_entries, 1)) {
+    const auto& metadata = engine_.GetEngineSettings().GetLlmMetadata();
+    if (metadata.has_value()) {
+      templates_ = metadata->prompt_templates();
+    }
+  }
+
+  absl::StatusOr<std::string> Run(const std::string& prefix,
+                                  const std::string& suffix,
+                                  bool* prefix_cached,
+                                  InferenceTimings* timings) {
+    auto entry = entries_.begin();
+    while (entry != entries_.end() && entry->prefix != prefix) {
+      ++entry;
+    }
+    *prefix_cached = entry != entries_.end();
+    const absl::Time started = absl::Now();
+    // Everything this request prefilled: the suffix, plus the prefix on a miss.
+    std::string prefilled_text;
+    if (*prefix_cached) {
+      entries_.splice(entries_.begin(), entries_, entry);
+    } else {
+      // Evict before prefilling so at most max_entries_ KV caches are alive.
+      while (static_cast<int>(entries_.size()) >= max_entries_) {
+        entries_.pop_back();
+      }
+      // Chat templates are applied by hand so the user turn can be split
+      // across two prefills without closing it after the prefix.
+      SessionConfig session_config = CreateSessionConfig();
+      session_config.SetApplyPromptTemplateInSession(false);
+      ASSIGN_OR_RETURN(auto session, engine_.CreateSession(session_config));
+      const std::string prefix_text = templates_.user().prefix() + prefix;
+      RETURN_IF_ERROR(session->RunPrefill({InputText(prefix_text)}));
+      prefilled_text = prefix_text;
+      entries_.push_front(Entry{prefix, std::move(session)});
+    }
+
+    ASSIGN_OR_RETURN(auto session, entries_.front().session->Clone());
+    const std::string suffix_text =
+        suffix + templates_.user().suffix() + templates_.model().prefix();
+    RETURN_IF_ERROR(session->RunPrefill({InputText(suffix_text)}));
+    prefilled_text += suffix_text;
+    const absl::Time prefilled = absl::Now();
+    ASSIGN_OR_RETURN(Responses responses, session->RunDecode());
+    const absl::Time decoded = absl::Now();
+    const std::string output =
+        responses.GetTexts().empty() ? std::string() : responses.GetTexts().front();
+    // Decode is not streamed on this path, so there is no TTFT.
+    timings->prefill_ms = absl::ToDoubleMilliseconds(prefilled - started);
+    timings->prefill_tokens = CountTokens(engine_, prefilled_text);
+    timings->decode_ms = absl::ToDoubleMilliseconds(decoded - prefilled);
+    timings->decode_tokens = CountTokens(engine_, output);
+    return output;
+  }
+
+ private:
+  struct Entry {
+    std::string prefix;
+    std::unique_ptr<Engine::Session> session;
+  };
+
+  Engine& engine_;
+  const int max_entries_;
+  litert::lm::proto::PromptTemplates templates_;
+  // Most recently used first.
+  std::list<Entry> entries_;
+};
+
+absl::StatusOr<std::string> RunSingleInference(const std::string& model_path,
+                                               Backend backend,
+                                               const std::string& system_instruction,
+                                               const std::string& input_prompt) {
+  ASSIGN_OR_RETURN(auto engine, CreateEngine(model_path, backend));
+  return RunInference(*engine, system_instruction, input_prompt);
+}
+
+void WriteJsonLine(const json& payload) {
+  std::cout << payload.dump() << std::endl;
+}
+
+absl::Status RunServer(const std::string& model_path,
+                       const std::vector<Backend>& backends,
+                       const std::string& default_system_instruction,
+                       int prefix_cache_entries) {
+  std::unique_ptr<Engine> engine;
+  Backend active_backend = backends.front();
+  absl::Status last_error = absl::UnknownError("No backend attempted.");
+  for (const auto backend : backends) {
+    auto engine_or = CreateEngine(model_path, backend);
+    if (engine_or.ok()) {
+      engine = std::move(*engine_or);
+      active_backend = backend;
+      break;
+    }
+    last_error = engine_or.status();
+  }
+  if (engine == nullptr) {
+    return absl::InternalError(
+        "All backends failed. Last error: " + std::string(last_error.message()));
+  }
+
+  PrefixSessionCache prefix_cache(*engine, prefix_cache_entries);
+  // A system instruction lives in the preface, ahead of the user turn the
+  // prefix belongs to, so the split path is only offered without one.
+  const bool prefix_cache_supported = default_system_instruction.empty();
+  WriteJsonLine({{"event", "ready"},
+                 {"backend", BackendName(active_backend)},
+                 {"prefix_cache", prefix_cache_supported},
+                 {"tokenize", true}});
+
+  std::string line;
+  while (std::getline(std::cin, line)) {
+    if (line.empty()) {
+      continue;
+    }
+    json request = json::parse(line, nullptr, /*allow_exceptions=*/false);
+    if (request.is_discarded() || !request.is_object()) {
+      WriteJsonLine({{"id", nullptr}, {"error", "Invalid JSON request."}});
+      continue;
+    }
+
+    json response = json::object();
+    response["id"] = request.contains("id") ? request["id"] : json(nullptr);
+    if (request.value("op", "") == "tokenize") {
+      auto token_ids_or =
+          engine->GetTokenizer().TextToTokenIds(request.value("text", ""));
+      if (token_ids_or.ok()) {
+        response["tokens"] = token_ids_or->size();
+      } else {
+        response["error"] = std::string(token_ids_or.status().message());
+      }
+      WriteJsonLine(response);
+      continue;
+    }
+    const std::string prompt = request.value("prompt", "");
+    const std::string prefix = request.value("prefix", "");
+    const std::string system_instruction =
+        request.value("system_instruction", default_system_instruction);
+    if (prompt.empty()) {
+      response["error"] = "Input prompt is empty.";
+      response["latency_ms"] = 0;
+      WriteJsonLine(response);
+      continue;
+    }
+    if (!prefix.empty() &&
+        (!prefix_cache_supported || !system_instruction.empty())) {
+      response["error"] = "prefix is not supported with a system instruction.";
+      response["latency_ms"] = 0;
+      WriteJsonLine(response);
+      continue;
+    }
+
+    const absl::Time started = absl::Now();
+    absl::StatusOr<std::string> output_or;
+    InferenceTimings timings;
+    if (prefix.empty()) {
+      output_or = RunInference(*engine, system_instruction, prompt, &timings);
+    } else {
+      bool prefix_cached = false;
+      output_or = prefix_cache.Run(prefix, prompt, &prefix_cached, &timings);
+      response["prefix_cached"] = prefix_cached;
+    }
+    response["latency_ms"] = absl::ToInt64Milliseconds(absl::Now() - started);
+    if (output_or.ok()) {
+      response["output"] = *output_or;
+      response["benchmark"] = TimingsJson(timings);
+    } else {
+      response["error"] = std::string(output_or.status().message());
+    }
+    WriteJsonLine(response);
+  }
+  return absl::OkStatus();
+}
+
 absl::Status MainHelper(int argc, char** argv) {
   absl::ParseCommandLine(argc, argv);
   absl::SetMinLogLevel(absl::LogSeverityAtLeast::kError);
@@ -210,13 +498,18 @@ absl::Status MainHelper(int argc, char** argv) {
                              absl::GetFlag(FLAGS_system_instruction_file),
                              "system_instruction"));
 
+  ASSIGN_OR_RETURN(auto backends,
+                   ResolveBackends(absl::GetFlag(FLAGS_backend)));
+
+  if (absl::GetFlag(FLAGS_server_mode)) {
+    return RunServer(model_path, backends, system_instruction,
+                     absl::GetFlag(FLAGS_prefix_cache_entries));
+  }
+
   if (input_prompt.empty()) {
     return absl::InvalidArgumentError("Input prompt is empty.");
   }
 
-  ASSIGN_OR_RETURN(auto backends,
-                   ResolveBackends(absl::GetFlag(FLAGS_backend)));
-
   absl::Status last_error = absl::UnknownError("No backend attempted.");
   for (const auto backend : backends) {
     auto output_or =
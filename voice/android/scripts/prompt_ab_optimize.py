@@ -2,12 +2,28 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import math
 import subprocess
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
+
+from prompt_eval_cache import ResultCache, sha256_file
+from prompt_eval_runner import (
+    EvalConfig,
+    Evaluator,
+    benchmark_summary,
+    case_result_from_dict,
+    case_result_to_dict,
+    latency_percentile,
+    load_prompt_template,
+    parse_cases,
+    write_reports,
+)
+from prompt_eval_sampling import stratified_sample
 
 
 @dataclass
@@ -18,14 +34,170 @@ class EvalSummary:
     pass_rate: float
     avg_latency_ms: int
     total_latency_ms: int
+    p50_latency_ms: int = 0
+    p90_latency_ms: int = 0
+    p99_latency_ms: int = 0
+    max_latency_ms: int = 0
+    # From LiteRT-LM BenchmarkInfo; zero when the evaluator reported none.
+    benchmark_cases: int = 0
+    avg_init_ms: float = 0.0
+    avg_ttft_ms: float = 0.0
+    avg_prefill_tokens: float = 0.0
+    prefill_tokens_per_sec: float = 0.0
+    avg_decode_tokens: float = 0.0
+    decode_tokens_per_sec: float = 0.0
 
 
 @dataclass
 class EvalResult:
     summary: EvalSummary
     cases: list[dict[str, Any]]
-    text_report_path: Path
-    json_report_path: Path
+    text_report_path: Path | None
+    json_report_path: Path | None
+    evaluated_cases: int = 0
+    sequential_stop: str | None = None
+
+
+@dataclass
+class PairOutcome:
+    case_id: str
+    category: str
+    a: dict[str, Any]
+    b: dict[str, Any]
+    fresh: bool
+
+
+@dataclass
+class SequentialTest:
+    """Wald SPRT on discordant pairs: P(B passes | exactly one passes) = 0.5 vs alt_win_rate.
+
+    PROMOTE_B is only settled once the observed pass-rate gain also clears the
+    promotion threshold, so an early stop never promotes what the full run would not.
+    """
+
+    confidence: float
+    alt_win_rate: float
+    min_pairs: int
+    min_improvement_pp: float
+    pairs: int = 0
+    a_only: int = 0
+    b_only: int = 0
+    a_pass: int = 0
+    b_pass: int = 0
+
+    def __post_init__(self) -> None:
+        if not 0.5 < self.confidence < 1.0:
+            raise ValueError('sequential confidence must be in (0.5, 1.0)')
+        if not 0.5 < self.alt_win_rate < 1.0:
+            raise ValueError('sequential alt win rate must be in (0.5, 1.0)')
+
+    @property
+    def llr(self) -> float:
+        p0, p1 = 0.5, self.alt_win_rate
+        return self.b_only * math.log(p1 / p0) + self.a_only * math.log((1.0 - p1) / (1.0 - p0))
+
+    def bounds(self) -> tuple[float, float]:
+        error = 1.0 - self.confidence
+        return math.log(error / (1.0 - error)), math.log((1.0 - error) / error)
+
+    def observe(self, a_passed: bool, b_passed: bool) -> str | None:
+        self.pairs += 1
+        self.a_pass += int(a_passed)
+        self.b_pass += int(b_passed)
+        if a_passed and not b_passed:
+            self.a_only += 1
+        elif b_passed and not a_passed:
+            self.b_only += 1
+        if self.pairs < self.min_pairs:
+            return None
+
+        lower, upper = self.bounds()
+        delta_pp = (self.b_pass - self.a_pass) / self.pairs * 100.0
+        if self.llr <= lower:
+            return 'KEEP_A'
+        if self.llr >= upper and delta_pp >= self.min_improvement_pp:
+            return 'PROMOTE_B'
+        return None
+
+    def state(self) -> dict[str, Any]:
+        lower, upper = self.bounds()
+        return {
+            'pairs': self.pairs,
+            'a_only': self.a_only,
+            'b_only': self.b_only,
+            'llr': round(self.llr, 4),
+            'lower_bound': round(lower, 4),
+            'upper_bound': round(upper, 4),
+            'confidence': self.confidence,
+            'alt_win_rate': self.alt_win_rate,
+            'min_pairs': self.min_pairs,
+        }
+
+
+class OutcomeLedger:
+    """Per-case outcomes keyed by (prompt version + content hash, eval config, case).
+
+    Backed by an append-only JSONL file so rounds and later runs only evaluate
+    cases a prompt version has not been scored on yet. Outcomes recorded by this
+    process are tracked separately: only their latencies share this session's
+    device conditions.
+    """
+
+    def __init__(self, path: Path, config_key: str) -> None:
+        self.path = path
+        self.config_key = config_key
+        self._outcomes: dict[tuple[str, str], dict[str, Any]] = {}
+        self._session_keys: set[tuple[str, str]] = set()
+        if path.exists():
+            for row in load_jsonl(path):
+                if row.get('config_key') != config_key:
+                    continue
+                self._outcomes[(str(row.get('prompt_key')), str(row.get('case_key')))] = row['outcome']
+
+    def partition(
+        self,
+        prompt_key: str,
+        rows: list[dict[str, Any]],
+        session_only: bool = False,
+    ) -> tuple[dict[str, dict[str, Any]], list[dict[str, Any]]]:
+        """(known outcomes by case key, rows to evaluate); session_only ignores earlier runs."""
+        known: dict[str, dict[str, Any]] = {}
+        missing: list[dict[str, Any]] = []
+        for row in rows:
+            key = case_key(row)
+            outcome = self._outcomes.get((prompt_key, key))
+            if session_only and (prompt_key, key) not in self._session_keys:
+                outcome = None
+            if outcome is None:
+                missing.append(row)
+            else:
+                known[key] = outcome
+        return known, missing
+
+    def record(self, prompt_key: str, rows: list[dict[str, Any]], outcomes: list[dict[str, Any]]) -> None:
+        """Appends successful outcomes; errors and timeouts stay unrecorded so they are retried."""
+        outcome_by_id = {str(outcome.get('id')): outcome for outcome in outcomes}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open('a', encoding='utf-8') as f:
+            for row in rows:
+                outcome = outcome_by_id.get(str(row.get('id')))
+                if outcome is None or outcome.get('error'):
+                    continue
+                key = case_key(row)
+                self._outcomes[(prompt_key, key)] = outcome
+                self._session_keys.add((prompt_key, key))
+                f.write(
+                    json.dumps(
+                        {
+                            'config_key': self.config_key,
+                            'prompt_key': prompt_key,
+                            'case_key': key,
+                            'outcome': outcome,
+                        },
+                        ensure_ascii=False,
+                    )
+                    + '\n'
+                )
 
 
 def load_jsonl(path: Path) -> list[dict[str, Any]]:
@@ -91,13 +263,155 @@ def split_train_holdout(
     return train_rows, holdout_rows
 
 
-def compare_score(summary: EvalSummary) -> tuple[int, int, int]:
-    # Higher is better.
+def sha256_json(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def ledger_config_key(config: EvalConfig, cache: ResultCache | None = None) -> str:
+    """Ledger outcomes are only reused under the same model, binary, backend and pipeline.
+
+    Model and binary are keyed by content, so a rebuilt binary or re-downloaded model at
+    the same path starts a fresh ledger; the cache's memoized fingerprints avoid re-hashing.
+    """
+    fingerprint = cache.file_fingerprint if cache is not None else sha256_file
+    return sha256_json(
+        {
+            'backend': config.backend,
+            'timeout_sec': config.timeout_sec,
+            'model': fingerprint(config.model_path),
+            'binary': fingerprint(config.binary_path),
+            'pipeline': config.pipeline,
+            'prefix_cache': config.persistent and config.prefix_cache,
+        }
+    )[:16]
+
+
+def case_key(row: dict[str, Any]) -> str:
+    content = sha256_json([row.get('input'), row.get('expected'), row.get('match', 'exact')])
+    return f"{row.get('id')}:{content[:16]}"
+
+
+def prompt_version_key(path: Path) -> str:
+    raw = path.read_text(encoding='utf-8')
+    version = ''
+    if path.suffix.lower() == '.json':
+        version = str(json.loads(raw).get('version', '')).strip()
+    content = hashlib.sha256(load_prompt_text_file(path).encode('utf-8')).hexdigest()
+    return f'{version or "unversioned"}:{content[:16]}'
+
+
+def summarize_cases(
+    cases: list[dict[str, Any]],
+    latency_cases: list[dict[str, Any]] | None = None,
+) -> EvalSummary:
+    """Pass/fail over cases; latency over latency_cases when given (e.g. fresh pairs only)."""
+    total = len(cases)
+    pass_count = sum(1 for case in cases if bool(case.get('passed')))
+    if latency_cases is None:
+        latency_cases = cases
+    latencies = [int(case.get('latency_ms', 0) or 0) for case in latency_cases]
+    total_latency_ms = sum(latencies)
+    benchmark = benchmark_summary([case.get('benchmark') for case in cases])
+    return EvalSummary(
+        total_cases=total,
+        pass_count=pass_count,
+        fail_count=total - pass_count,
+        pass_rate=(pass_count / total * 100.0) if total else 0.0,
+        avg_latency_ms=int(total_latency_ms / len(latencies)) if latencies else 0,
+        total_latency_ms=total_latency_ms,
+        p50_latency_ms=latency_percentile(latencies, 50),
+        p90_latency_ms=latency_percentile(latencies, 90),
+        p99_latency_ms=latency_percentile(latencies, 99),
+        max_latency_ms=max(latencies, default=0),
+        benchmark_cases=benchmark['cases'],
+        avg_init_ms=benchmark['avg_init_ms'],
+        avg_ttft_ms=benchmark['avg_ttft_ms'],
+        avg_prefill_tokens=benchmark['avg_prefill_tokens'],
+        prefill_tokens_per_sec=benchmark['prefill_tokens_per_sec'],
+        avg_decode_tokens=benchmark['avg_decode_tokens'],
+        decode_tokens_per_sec=benchmark['decode_tokens_per_sec'],
+    )
+
+
+SCORE_MODES = ('pass', 'tail')
+
+
+def compare_score(summary: EvalSummary, mode: str = 'pass') -> tuple[int, ...]:
+    # Higher is better. 'tail' breaks pass/fail ties on p99, then p90, before the mean.
+    if mode == 'tail':
+        return (
+            summary.pass_count,
+            -summary.fail_count,
+            -summary.p99_latency_ms,
+            -summary.p90_latency_ms,
+            -summary.avg_latency_ms,
+        )
     return (summary.pass_count, -summary.fail_count, -summary.avg_latency_ms)
 
 
-def winner_by_score(a: EvalSummary, b: EvalSummary) -> str:
-    return 'A' if compare_score(a) >= compare_score(b) else 'B'
+def reads_latency_tails(score_mode: str, max_p99_latency_increase_pct: float) -> bool:
+    """Whether decisions compare latency tails, which must then come from one session."""
+    return score_mode == 'tail' or max_p99_latency_increase_pct > 0
+
+
+def winner_by_score(a: EvalSummary, b: EvalSummary, mode: str = 'pass') -> str:
+    return 'A' if compare_score(a, mode) >= compare_score(b, mode) else 'B'
+
+
+def tail_latency_regression(a: EvalSummary, b: EvalSummary, max_increase_pct: float) -> str | None:
+    """Why B's p99 is unacceptable against A's, or None when it is within the limit."""
+    if max_increase_pct <= 0 or a.p99_latency_ms <= 0:
+        return None
+    increase_pct = (b.p99_latency_ms - a.p99_latency_ms) / a.p99_latency_ms * 100.0
+    if increase_pct <= max_increase_pct:
+        return None
+    return (
+        f'B p99 latency {b.p99_latency_ms}ms is {increase_pct:.1f}% above A ({a.p99_latency_ms}ms) '
+        f'(limit {max_increase_pct:.1f}%)'
+    )
+
+
+def prompt_token_growth(a_tokens: int, b_tokens: int, max_growth_pct: float) -> str | None:
+    """Why B's prompt is too much longer than A's, or None when it is within the limit."""
+    if max_growth_pct <= 0 or a_tokens <= 0:
+        return None
+    growth_pct = (b_tokens - a_tokens) / a_tokens * 100.0
+    if growth_pct <= max_growth_pct:
+        return None
+    return (
+        f'B prompt is {b_tokens} tokens, {growth_pct:.1f}% more than A ({a_tokens}) '
+        f'(limit {max_growth_pct:.1f}%)'
+    )
+
+
+def guardrail_verdict(
+    a_stats: dict[str, dict[str, float]],
+    b_stats: dict[str, dict[str, float]],
+    a_summary: EvalSummary,
+    b_summary: EvalSummary,
+    a_tokens: int,
+    b_tokens: int,
+    max_category_drop_pp: float,
+    max_p99_latency_increase_pct: float,
+    max_prompt_token_growth: float,
+) -> tuple[bool, str]:
+    """(ok, reason) for promoting B over A: critical categories, then tail latency, then prompt size."""
+    for critical_category in ('clean', 'noisy'):
+        if critical_category not in a_stats or critical_category not in b_stats:
+            continue
+        drop_pp = a_stats[critical_category]['pass_rate'] - b_stats[critical_category]['pass_rate']
+        if drop_pp > max_category_drop_pp:
+            return False, (
+                f'B regressed {critical_category} by {drop_pp:.2f}pp '
+                f'(limit {max_category_drop_pp:.2f}pp)'
+            )
+    tail_reason = tail_latency_regression(a_summary, b_summary, max_p99_latency_increase_pct)
+    if tail_reason is not None:
+        return False, tail_reason
+    token_reason = prompt_token_growth(a_tokens, b_tokens, max_prompt_token_growth)
+    if token_reason is not None:
+        return False, token_reason
+    return True, 'ok'
 
 
 def category_pass_stats(
@@ -105,6 +419,7 @@ def category_pass_stats(
     category_by_id: dict[str, str],
 ) -> dict[str, dict[str, float]]:
     counters: dict[str, dict[str, float]] = {}
+    latencies: dict[str, list[int]] = {}
     for case in eval_cases:
         case_id = str(case.get('id'))
         category = category_by_id.get(case_id, 'unknown')
@@ -112,67 +427,31 @@ def category_pass_stats(
         stats['total'] += 1.0
         if bool(case.get('passed')):
             stats['pass'] += 1.0
+        latencies.setdefault(category, []).append(int(case.get('latency_ms', 0) or 0))
 
-    for stats in counters.values():
+    for category, stats in counters.items():
         total = stats['total']
         stats['fail'] = total - stats['pass']
         stats['pass_rate'] = (stats['pass'] / total * 100.0) if total else 0.0
+        stats['p50_latency_ms'] = float(latency_percentile(latencies[category], 50))
+        stats['p90_latency_ms'] = float(latency_percentile(latencies[category], 90))
+        stats['p99_latency_ms'] = float(latency_percentile(latencies[category], 99))
     return counters
 
 
-def parse_eval_result(json_report_path: Path, text_report_path: Path) -> EvalResult:
-    payload = json.loads(json_report_path.read_text(encoding='utf-8'))
-    summary_payload = payload.get('summary', {})
-    summary = EvalSummary(
-        total_cases=int(summary_payload.get('total_cases', 0)),
-        pass_count=int(summary_payload.get('pass_count', 0)),
-        fail_count=int(summary_payload.get('fail_count', 0)),
-        pass_rate=float(summary_payload.get('pass_rate', 0.0)),
-        avg_latency_ms=int(summary_payload.get('avg_latency_ms', 0)),
-        total_latency_ms=int(summary_payload.get('total_latency_ms', 0)),
-    )
-    return EvalResult(
-        summary=summary,
-        cases=payload.get('cases', []),
-        text_report_path=text_report_path,
-        json_report_path=json_report_path,
-    )
-
-
-def run_prompt_eval(
+def prepare_runtime(
     eval_script: Path,
-    prompt_file: Path,
-    cases_file: Path,
-    report_text_path: Path,
-    report_json_path: Path,
-    backend: str,
-    timeout_sec: int,
-    max_cases: int,
     model_path: str | None,
     litertlm_dir: str | None,
     binary_path: str | None,
     skip_setup: bool,
     skip_download: bool,
-) -> EvalResult:
-    cmd = [
-        str(eval_script),
-        '--prompt-file',
-        str(prompt_file),
-        '--cases-file',
-        str(cases_file),
-        '--report-file',
-        str(report_text_path),
-        '--json-report-file',
-        str(report_json_path),
-        '--backend',
-        backend,
-        '--timeout-sec',
-        str(timeout_sec),
-        '--max-cases',
-        str(max_cases),
-        '--no-update',
-    ]
+) -> tuple[str, str]:
+    """Runs the one-time download/build step and returns (binary_path, model_path)."""
+    if binary_path and model_path and skip_setup and skip_download:
+        return binary_path, model_path
 
+    cmd = [str(eval_script), '--prepare-only', '--no-update']
     if model_path:
         cmd.extend(['--model-path', model_path])
     if litertlm_dir:
@@ -184,8 +463,303 @@ def run_prompt_eval(
     if skip_download:
         cmd.append('--skip-download')
 
-    subprocess.run(cmd, check=True)
-    return parse_eval_result(report_json_path, report_text_path)
+    output = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout
+    resolved: dict[str, str] = {}
+    for line in output.splitlines():
+        key, sep, value = line.partition('=')
+        if sep and key in ('BINARY_PATH', 'MODEL_PATH'):
+            resolved[key] = value.strip()
+    if 'BINARY_PATH' not in resolved or 'MODEL_PATH' not in resolved:
+        raise RuntimeError(f'Eval script did not report runtime paths:\n{output}')
+    return resolved['BINARY_PATH'], resolved['MODEL_PATH']
+
+
+def finish_eval_result(
+    evaluator: Evaluator,
+    prompt_file: Path,
+    prompt_key: str,
+    cases: list[dict[str, Any]],
+    evaluated_cases: int,
+    output_dir: Path,
+    label: str,
+    wall_clock_ms: int,
+    write_report_files: bool,
+    latency_cases: list[dict[str, Any]] | None = None,
+) -> EvalResult:
+    text_report_path: Path | None = None
+    json_report_path: Path | None = None
+    if write_report_files:
+        text_report_path = output_dir / f'{label}_report.txt'
+        json_report_path = output_dir / f'{label}_report.json'
+        run_config = evaluator.run_config()
+        run_config.update(
+            {
+                'prompt_file': str(prompt_file),
+                'cases_file': f'{label} ({len(cases)} rows)',
+                'prompt_key': prompt_key,
+                'evaluated_cases': evaluated_cases,
+                'ledger_cases': len(cases) - evaluated_cases,
+            }
+        )
+        if latency_cases is not None:
+            run_config['latency_cases'] = len(latency_cases)
+        write_reports(
+            report_file=str(text_report_path),
+            json_report_file=str(json_report_path),
+            run_config=run_config,
+            results=[case_result_from_dict(case) for case in cases],
+            wall_clock_ms=wall_clock_ms,
+            cache_stats=evaluator.cache_stats(),
+        )
+    return EvalResult(
+        summary=summarize_cases(cases, latency_cases),
+        cases=cases,
+        text_report_path=text_report_path,
+        json_report_path=json_report_path,
+        evaluated_cases=evaluated_cases,
+    )
+
+
+def evaluate_prompt(
+    evaluator: Evaluator,
+    ledger: OutcomeLedger,
+    prompt_file: Path,
+    rows: list[dict[str, Any]],
+    output_dir: Path,
+    label: str,
+    max_cases: int,
+    write_report_files: bool,
+    session_latency: bool = False,
+) -> EvalResult:
+    """Scores a prompt on rows, running inference only for cases missing from the ledger.
+
+    With session_latency, every latency comes from this session: outcomes from earlier
+    runs and result-cache hits are measured again, so tails compared across prompts
+    share the same device and thermal conditions.
+    """
+    if max_cases > 0:
+        rows = rows[:max_cases]
+    prompt_key = prompt_version_key(prompt_file)
+    known, missing = ledger.partition(prompt_key, rows, session_only=session_latency)
+
+    started = datetime.now()
+    if missing:
+        results = evaluator.run(
+            load_prompt_template(str(prompt_file)),
+            parse_cases(missing),
+            reuse_cache=not session_latency,
+        )
+        outcomes = [case_result_to_dict(result) for result in results]
+        ledger.record(prompt_key, missing, outcomes)
+        outcome_by_id = {str(outcome.get('id')): outcome for outcome in outcomes}
+        for row in missing:
+            outcome = outcome_by_id.get(str(row.get('id')))
+            if outcome is not None:
+                known[case_key(row)] = outcome
+    wall_clock_ms = int((datetime.now() - started).total_seconds() * 1000)
+
+    cases = [known[case_key(row)] for row in rows if case_key(row) in known]
+    return finish_eval_result(
+        evaluator=evaluator,
+        prompt_file=prompt_file,
+        prompt_key=prompt_key,
+        cases=cases,
+        evaluated_cases=len(missing),
+        output_dir=output_dir,
+        label=label,
+        wall_clock_ms=wall_clock_ms,
+        write_report_files=write_report_files,
+    )
+
+
+def stream_paired_outcomes(
+    evaluator: Evaluator,
+    ledger: OutcomeLedger,
+    prompt_a_file: Path,
+    prompt_b_file: Path,
+    rows: list[dict[str, Any]],
+    category_by_id: dict[str, str],
+) -> Iterator[PairOutcome]:
+    """Yields per-case (A, B) outcomes in row order, evaluating both prompts back to back.
+
+    Cases already scored for both prompts come from the ledger; the rest run as pairs
+    on one resident model so their latencies are directly comparable.
+    """
+    key_a = prompt_version_key(prompt_a_file)
+    key_b = prompt_version_key(prompt_b_file)
+    known_a, _ = ledger.partition(key_a, rows)
+    known_b, _ = ledger.partition(key_b, rows)
+    pending = [row for row in rows if case_key(row) not in known_a or case_key(row) not in known_b]
+
+    pairs = evaluator.run_paired(
+        load_prompt_template(str(prompt_a_file)),
+        load_prompt_template(str(prompt_b_file)),
+        parse_cases(pending),
+    ) if pending else iter(())
+    try:
+        for row in rows:
+            key = case_key(row)
+            fresh = not (key in known_a and key in known_b)
+            if not fresh:
+                outcome_a, outcome_b = known_a[key], known_b[key]
+            else:
+                result_a, result_b = next(pairs)
+                outcome_a, outcome_b = case_result_to_dict(result_a), case_result_to_dict(result_b)
+                ledger.record(key_a, [row], [outcome_a])
+                ledger.record(key_b, [row], [outcome_b])
+            case_id = str(row.get('id'))
+            yield PairOutcome(
+                case_id=case_id,
+                category=category_by_id.get(case_id, 'unknown'),
+                a=outcome_a,
+                b=outcome_b,
+                fresh=fresh,
+            )
+    finally:
+        close = getattr(pairs, 'close', None)
+        if close is not None:
+            close()
+
+
+def evaluate_paired(
+    evaluator: Evaluator,
+    ledger: OutcomeLedger,
+    prompt_a_file: Path,
+    prompt_b_file: Path,
+    rows: list[dict[str, Any]],
+    category_by_id: dict[str, str],
+    output_dir: Path,
+    label: str,
+    max_cases: int,
+    write_report_files: bool,
+    sequential: SequentialTest | None = None,
+) -> tuple[EvalResult, EvalResult]:
+    """Runs the paired engine over rows, streaming outcomes to {label}_pairs.jsonl.
+
+    With a sequential test, evaluation stops as soon as the test settles a decision.
+    Latency summaries cover only pairs measured in this run; ledger pairs count toward
+    pass/fail but their latencies come from other runs and would skew the comparison.
+    """
+    if max_cases > 0:
+        rows = rows[:max_cases]
+    started = datetime.now()
+    cases_a: list[dict[str, Any]] = []
+    cases_b: list[dict[str, Any]] = []
+    fresh_cases: dict[str, list[dict[str, Any]]] = {'a': [], 'b': []}
+    discordant = {'a_only': 0, 'b_only': 0}
+    evaluated = 0
+    sequential_stop: str | None = None
+    pairs_path = output_dir / f'{label}_pairs.jsonl'
+    with pairs_path.open('w', encoding='utf-8') as pairs_file:
+        for index, pair in enumerate(
+            stream_paired_outcomes(evaluator, ledger, prompt_a_file, prompt_b_file, rows, category_by_id),
+            start=1,
+        ):
+            cases_a.append(pair.a)
+            cases_b.append(pair.b)
+            evaluated += int(pair.fresh)
+            if pair.fresh:
+                fresh_cases['a'].append(pair.a)
+                fresh_cases['b'].append(pair.b)
+            a_passed, b_passed = bool(pair.a.get('passed')), bool(pair.b.get('passed'))
+            if a_passed and not b_passed:
+                discordant['a_only'] += 1
+            elif b_passed and not a_passed:
+                discordant['b_only'] += 1
+            pairs_file.write(
+                json.dumps(
+                    {
+                        'id': pair.case_id,
+                        'category': pair.category,
+                        'a_passed': a_passed,
+                        'b_passed': b_passed,
+                        'a_latency_ms': pair.a.get('latency_ms'),
+                        'b_latency_ms': pair.b.get('latency_ms'),
+                        'fresh': pair.fresh,
+                    },
+                    ensure_ascii=False,
+                )
+                + '\n'
+            )
+            pairs_file.flush()
+            if sequential is not None:
+                sequential_stop = sequential.observe(a_passed, b_passed)
+            if index % 50 == 0 or index == len(rows) or sequential_stop:
+                print(
+                    f'[{label}] {index}/{len(rows)} pairs '
+                    f"A_only={discordant['a_only']} B_only={discordant['b_only']}"
+                    + (f' llr={sequential.llr:.3f}' if sequential is not None else ''),
+                    flush=True,
+                )
+            if sequential_stop:
+                print(f'[{label}] sequential test settled {sequential_stop} after {index} pairs', flush=True)
+                break
+    wall_clock_ms = int((datetime.now() - started).total_seconds() * 1000)
+
+    results: list[EvalResult] = []
+    for prompt_file, cases, side in ((prompt_a_file, cases_a, 'a'), (prompt_b_file, cases_b, 'b')):
+        results.append(
+            finish_eval_result(
+                evaluator=evaluator,
+                prompt_file=prompt_file,
+                prompt_key=prompt_version_key(prompt_file),
+                cases=cases,
+                evaluated_cases=evaluated,
+                output_dir=output_dir,
+                label=f'{label}_{side}',
+                wall_clock_ms=wall_clock_ms,
+                write_report_files=write_report_files,
+                latency_cases=fresh_cases[side],
+            )
+        )
+        results[-1].sequential_stop = sequential_stop
+    return results[0], results[1]
+
+
+def evaluate_ab(
+    evaluator: Evaluator,
+    ledger: OutcomeLedger,
+    prompt_a_file: Path,
+    prompt_b_file: Path,
+    rows: list[dict[str, Any]],
+    category_by_id: dict[str, str],
+    output_dir: Path,
+    label: str,
+    max_cases: int,
+    paired: bool,
+    write_report_files: bool,
+    sequential: SequentialTest | None = None,
+    session_latency: bool = False,
+) -> tuple[EvalResult, EvalResult]:
+    if paired or sequential is not None:
+        return evaluate_paired(
+            evaluator=evaluator,
+            ledger=ledger,
+            prompt_a_file=prompt_a_file,
+            prompt_b_file=prompt_b_file,
+            rows=rows,
+            category_by_id=category_by_id,
+            output_dir=output_dir,
+            label=label,
+            max_cases=max_cases,
+            write_report_files=write_report_files,
+            sequential=sequential,
+        )
+    results = [
+        evaluate_prompt(
+            evaluator=evaluator,
+            ledger=ledger,
+            prompt_file=prompt_file,
+            rows=rows,
+            output_dir=output_dir,
+            label=f'{label}_{side}',
+            max_cases=max_cases,
+            write_report_files=write_report_files,
+            session_latency=session_latency,
+        )
+        for prompt_file, side in ((prompt_a_file, 'a'), (prompt_b_file, 'b'))
+    ]
+    return results[0], results[1]
 
 
 def strip_challenger_focus(prompt_text: str) -> str:
@@ -275,6 +849,38 @@ def build_failure_pack(
     return failures
 
 
+def find_latest_failure_pack(run_root: Path, exclude_run_dir: Path) -> Path | None:
+    packs = [
+        path
+        for path in run_root.glob('run_*/round_*/loser_failure_pack.jsonl')
+        if path.parent.parent != exclude_run_dir
+    ]
+    return max(packs, key=lambda path: (path.parent.parent.name, path.parent.name)) if packs else None
+
+
+def select_screen_cases(
+    train_cases: list[dict[str, Any]],
+    failure_pack: list[dict[str, Any]],
+    sample_size: int,
+    seed: int,
+    category_by_id: dict[str, str],
+) -> tuple[list[dict[str, Any]], int]:
+    """Train rows from the failure pack plus a stratified sample of the rest, in train order."""
+    pack_ids = {str(row.get('id')) for row in failure_pack}
+    pack_rows = [row for row in train_cases if str(row.get('id')) in pack_ids]
+    rest = [row for row in train_cases if str(row.get('id')) not in pack_ids]
+    sampled: list[dict[str, Any]] = []
+    if sample_size > 0:
+        sampled = stratified_sample(
+            rest,
+            size=sample_size,
+            seed=seed,
+            category_of=lambda row: category_by_id.get(str(row.get('id')), 'unknown'),
+        )
+    chosen = {id(row) for row in pack_rows + sampled}
+    return [row for row in train_cases if id(row) in chosen], len(pack_rows)
+
+
 def git_head_sha(repo_root: Path) -> str:
     try:
         return subprocess.check_output(
@@ -292,6 +898,9 @@ def format_stats(stats: dict[str, dict[str, float]]) -> dict[str, dict[str, floa
             'pass': int(value.get('pass', 0.0)),
             'fail': int(value.get('fail', 0.0)),
             'pass_rate': round(float(value.get('pass_rate', 0.0)), 2),
+            'p50_latency_ms': int(value.get('p50_latency_ms', 0.0)),
+            'p90_latency_ms': int(value.get('p90_latency_ms', 0.0)),
+            'p99_latency_ms': int(value.get('p99_latency_ms', 0.0)),
         }
     return out
 
@@ -305,11 +914,33 @@ def main() -> int:
     parser.add_argument('--dataset-file', default='scripts/dataset.jsonl')
     parser.add_argument('--eval-script', default='scripts/prompt_eval.sh')
     parser.add_argument('--run-root', default='.cache/prompt_ab')
+    parser.add_argument('--ledger-file', default='.cache/prompt_ab/ledger.jsonl')
 
     parser.add_argument('--max-rounds', type=int, default=1)
     parser.add_argument('--patience', type=int, default=1)
     parser.add_argument('--min-improvement-pass-rate-pp', type=float, default=1.0)
     parser.add_argument('--max-category-drop-pp', type=float, default=3.0)
+    parser.add_argument(
+        '--max-prompt-token-growth',
+        type=float,
+        default=0.0,
+        help=(
+            'Reject B when its prompt (without the input) has more than this percent more tokens than A '
+            '(0 = off). Counts come from the model tokenizer, so this needs --persistent.'
+        ),
+    )
+    parser.add_argument(
+        '--score-mode',
+        choices=SCORE_MODES,
+        default='pass',
+        help='Tie-break order after pass/fail: pass = mean latency; tail = p99, p90, then mean.',
+    )
+    parser.add_argument(
+        '--max-p99-latency-increase-pct',
+        type=float,
+        default=0.0,
+        help='Reject B when its train p99 latency exceeds A by more than this percentage (0 = off).',
+    )
     parser.add_argument('--use-holdout', action='store_true')
     parser.add_argument('--min-holdout-pass-rate', type=float, default=90.0)
     parser.add_argument('--holdout-mod', type=int, default=5)
@@ -323,6 +954,57 @@ def main() -> int:
     parser.add_argument('--model-path', default='')
     parser.add_argument('--litertlm-dir', default='')
     parser.add_argument('--binary-path', default='')
+    parser.add_argument('--persistent', action='store_true')
+    parser.add_argument(
+        '--prefix-cache',
+        action='store_true',
+        help='With --persistent, prefill each prompt body once and send only the per-case input.',
+    )
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--max-resident-mb', type=int, default=0)
+    parser.add_argument('--cache-file', default='.cache/prompt_eval/results.sqlite')
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument(
+        '--paired',
+        action='store_true',
+        help='Evaluate A and B back to back on each case with one resident model.',
+    )
+    parser.add_argument(
+        '--sequential',
+        action='store_true',
+        help='Stop train evaluation once a paired SPRT settles PROMOTE_B or KEEP_A (implies --paired).',
+    )
+    parser.add_argument('--sequential-confidence', type=float, default=0.95)
+    parser.add_argument(
+        '--sequential-alt-win-rate',
+        type=float,
+        default=0.65,
+        help='Share of discordant pairs B must win under the alternative hypothesis.',
+    )
+    parser.add_argument('--sequential-min-pairs', type=int, default=100)
+    parser.add_argument(
+        '--screen',
+        action='store_true',
+        help='Run B on the last loser failure pack plus a stratified sample before the full train split.',
+    )
+    parser.add_argument('--screen-sample-size', type=int, default=100)
+    parser.add_argument(
+        '--screen-min-delta-pp',
+        type=float,
+        default=0.0,
+        help='Minimum B-over-A pass-rate delta on the screen set to continue to train.',
+    )
+    parser.add_argument(
+        '--screen-failure-pack',
+        default='',
+        help='Failure pack for round 1 (default: latest loser_failure_pack.jsonl under --run-root).',
+    )
+    parser.add_argument('--screen-seed', type=int, default=0)
+    parser.add_argument(
+        '--skip-eval-reports',
+        action='store_true',
+        help='Do not write per-evaluation text/JSON reports (round log and ledger only).',
+    )
 
     parser.add_argument('--always-skip-setup', action='store_true')
     parser.add_argument('--always-skip-download', action='store_true')
@@ -336,6 +1018,8 @@ def main() -> int:
 
     if args.max_rounds <= 0:
         raise ValueError('max-rounds must be > 0')
+    if args.max_prompt_token_growth > 0 and not args.persistent:
+        raise ValueError('max-prompt-token-growth needs --persistent to count tokens with the model tokenizer')
 
     repo_root = Path.cwd()
     prompt_a_path = (repo_root / args.prompt_a_file).resolve()
@@ -380,264 +1064,392 @@ def main() -> int:
     recommendation_path = run_dir / 'recommendation.md'
     summary_path = run_dir / 'summary.json'
 
-    prepared_runtime = False
+    binary_path, model_path = prepare_runtime(
+        eval_script=eval_script,
+        model_path=args.model_path or None,
+        litertlm_dir=args.litertlm_dir or None,
+        binary_path=args.binary_path or None,
+        skip_setup=args.always_skip_setup,
+        skip_download=args.always_skip_download,
+    )
+    eval_config = EvalConfig(
+        binary_path=binary_path,
+        model_path=model_path,
+        backend=args.backend,
+        timeout_sec=args.timeout_sec,
+        persistent=args.persistent,
+        prefix_cache=args.prefix_cache,
+        workers=args.workers,
+        max_resident_mb=args.max_resident_mb,
+        cache_file='' if args.no_cache else str((repo_root / args.cache_file).resolve()),
+    )
+    evaluator = Evaluator(eval_config)
+    ledger = OutcomeLedger(
+        (repo_root / args.ledger_file).resolve(),
+        config_key=ledger_config_key(eval_config, evaluator.cache),
+    )
+    session_latency = reads_latency_tails(args.score_mode, args.max_p99_latency_increase_pct)
+    if session_latency and not (args.paired or args.sequential):
+        print('Latency tails are compared: cases scored in earlier sessions are re-measured.', flush=True)
+
     no_improve_rounds = 0
     best_recommendation = 'KEEP_A'
 
-    for round_index in range(1, args.max_rounds + 1):
-        round_tag = f'round_{round_index:02d}'
-        round_dir = run_dir / round_tag
-        round_dir.mkdir(parents=True, exist_ok=True)
-
-        prompt_a_text = load_prompt_text_file(prompt_a_path)
-        prompt_b_text = load_prompt_text_file(prompt_b_path)
-
-        train_a = run_prompt_eval(
-            eval_script=eval_script,
-            prompt_file=prompt_a_path,
-            cases_file=train_path,
-            report_text_path=round_dir / 'train_a_report.txt',
-            report_json_path=round_dir / 'train_a_report.json',
-            backend=args.backend,
-            timeout_sec=args.timeout_sec,
-            max_cases=args.max_cases_train,
-            model_path=args.model_path or None,
-            litertlm_dir=args.litertlm_dir or None,
-            binary_path=args.binary_path or None,
-            skip_setup=(args.always_skip_setup or prepared_runtime),
-            skip_download=(args.always_skip_download or prepared_runtime),
-        )
-        prepared_runtime = True
-
-        train_b = run_prompt_eval(
-            eval_script=eval_script,
-            prompt_file=prompt_b_path,
-            cases_file=train_path,
-            report_text_path=round_dir / 'train_b_report.txt',
-            report_json_path=round_dir / 'train_b_report.json',
-            backend=args.backend,
-            timeout_sec=args.timeout_sec,
-            max_cases=args.max_cases_train,
-            model_path=args.model_path or None,
-            litertlm_dir=args.litertlm_dir or None,
-            binary_path=args.binary_path or None,
-            skip_setup=True,
-            skip_download=True,
-        )
+    failure_pack_path: Path | None = None
+    if args.screen:
+        if args.screen_failure_pack:
+            failure_pack_path = (repo_root / args.screen_failure_pack).resolve()
+            if not failure_pack_path.exists():
+                raise FileNotFoundError(f'Screen failure pack not found: {failure_pack_path}')
+        else:
+            failure_pack_path = find_latest_failure_pack(run_root, exclude_run_dir=run_dir)
 
-        train_a_stats = category_pass_stats(train_a.cases, train_category_by_id)
-        train_b_stats = category_pass_stats(train_b.cases, train_category_by_id)
-
-        train_winner = winner_by_score(train_a.summary, train_b.summary)
-        b_over_a_delta_pass = train_b.summary.pass_count - train_a.summary.pass_count
-        b_over_a_delta_pass_rate = train_b.summary.pass_rate - train_a.summary.pass_rate
-
-        threshold_ok = b_over_a_delta_pass_rate >= args.min_improvement_pass_rate_pp
-
-        guardrail_ok = True
-        guardrail_reason = 'ok'
-        for critical_category in ('clean', 'noisy'):
-            if critical_category not in train_a_stats or critical_category not in train_b_stats:
-                continue
-            drop_pp = train_a_stats[critical_category]['pass_rate'] - train_b_stats[critical_category]['pass_rate']
-            if drop_pp > args.max_category_drop_pp:
-                guardrail_ok = False
-                guardrail_reason = (
-                    f'B regressed {critical_category} by {drop_pp:.2f}pp '
-                    f'(limit {args.max_category_drop_pp:.2f}pp)'
+    try:
+        for round_index in range(1, args.max_rounds + 1):
+            sequential = (
+                SequentialTest(
+                    confidence=args.sequential_confidence,
+                    alt_win_rate=args.sequential_alt_win_rate,
+                    min_pairs=args.sequential_min_pairs,
+                    min_improvement_pp=args.min_improvement_pass_rate_pp,
                 )
-                break
-
-        holdout_checked = False
-        holdout_ok = True
-        holdout_winner = 'A'
-        holdout_a: EvalResult | None = None
-        holdout_b: EvalResult | None = None
-
-        if args.use_holdout and train_winner == 'B' and threshold_ok and guardrail_ok and holdout_path is not None:
-            holdout_checked = True
-            holdout_a = run_prompt_eval(
-                eval_script=eval_script,
-                prompt_file=prompt_a_path,
-                cases_file=holdout_path,
-                report_text_path=round_dir / 'holdout_a_report.txt',
-                report_json_path=round_dir / 'holdout_a_report.json',
-                backend=args.backend,
-                timeout_sec=args.timeout_sec,
-                max_cases=args.max_cases_holdout,
-                model_path=args.model_path or None,
-                litertlm_dir=args.litertlm_dir or None,
-                binary_path=args.binary_path or None,
-                skip_setup=True,
-                skip_download=True,
+                if args.sequential
+                else None
             )
-            holdout_b = run_prompt_eval(
-                eval_script=eval_script,
-                prompt_file=prompt_b_path,
-                cases_file=holdout_path,
-                report_text_path=round_dir / 'holdout_b_report.txt',
-                report_json_path=round_dir / 'holdout_b_report.json',
-                backend=args.backend,
-                timeout_sec=args.timeout_sec,
-                max_cases=args.max_cases_holdout,
-                model_path=args.model_path or None,
-                litertlm_dir=args.litertlm_dir or None,
-                binary_path=args.binary_path or None,
-                skip_setup=True,
-                skip_download=True,
+            round_tag = f'round_{round_index:02d}'
+            round_dir = run_dir / round_tag
+            round_dir.mkdir(parents=True, exist_ok=True)
+
+            prompt_a_text = load_prompt_text_file(prompt_a_path)
+            prompt_b_text = load_prompt_text_file(prompt_b_path)
+            require_tokenizer = args.max_prompt_token_growth > 0
+            prompt_a_tokens, token_source = evaluator.count_prompt_tokens(
+                load_prompt_template(str(prompt_a_path)), require_tokenizer=require_tokenizer
+            )
+            prompt_b_tokens, _ = evaluator.count_prompt_tokens(
+                load_prompt_template(str(prompt_b_path)), require_tokenizer=require_tokenizer
+            )
+            prompt_token_growth_pct = (
+                (prompt_b_tokens - prompt_a_tokens) / prompt_a_tokens * 100.0 if prompt_a_tokens else 0.0
+            )
+            print(
+                f"[{round_tag}] prompt tokens ({token_source}): A={prompt_a_tokens} B={prompt_b_tokens} "
+                f"growth={prompt_token_growth_pct:+.1f}%",
+                flush=True,
             )
-            holdout_winner = winner_by_score(holdout_a.summary, holdout_b.summary)
-            holdout_ok = holdout_winner == 'B' and holdout_b.summary.pass_rate >= args.min_holdout_pass_rate
 
-        recommend_switch_to_b = (
-            train_winner == 'B' and threshold_ok and guardrail_ok and holdout_ok
-        )
+            screen_record: dict[str, Any] | None = None
+            screen_rejected = False
+            if args.screen:
+                failure_pack = load_jsonl(failure_pack_path) if failure_pack_path else []
+                screen_cases, pack_case_count = select_screen_cases(
+                    train_cases,
+                    failure_pack=failure_pack,
+                    sample_size=args.screen_sample_size,
+                    seed=args.screen_seed + round_index,
+                    category_by_id=train_category_by_id,
+                )
+                screen_a, screen_b = evaluate_ab(
+                    evaluator=evaluator,
+                    ledger=ledger,
+                    prompt_a_file=prompt_a_path,
+                    prompt_b_file=prompt_b_path,
+                    rows=screen_cases,
+                    category_by_id=train_category_by_id,
+                    output_dir=round_dir,
+                    label='screen',
+                    max_cases=0,
+                    paired=args.paired,
+                    write_report_files=not args.skip_eval_reports,
+                    session_latency=session_latency,
+                )
+                screen_delta_pp = screen_b.summary.pass_rate - screen_a.summary.pass_rate
+                screen_rejected = screen_delta_pp < args.screen_min_delta_pp
+                screen_record = {
+                    'failure_pack': str(failure_pack_path) if failure_pack_path else None,
+                    'failure_pack_cases': pack_case_count,
+                    'sampled_cases': len(screen_cases) - pack_case_count,
+                    'a_summary': screen_a.summary.__dict__,
+                    'b_summary': screen_b.summary.__dict__,
+                    'b_over_a_delta_pass_rate_pp': round(screen_delta_pp, 2),
+                    'min_delta_pp': args.screen_min_delta_pp,
+                    'passed': not screen_rejected,
+                }
+                print(
+                    f"[{round_tag}] screen cases={len(screen_cases)} (pack={pack_case_count}) "
+                    f"delta_pp={screen_delta_pp:.2f} passed={not screen_rejected}",
+                    flush=True,
+                )
+
+            if screen_rejected:
+                train_a, train_b = screen_a, screen_b
+            else:
+                train_a, train_b = evaluate_ab(
+                    evaluator=evaluator,
+                    ledger=ledger,
+                    prompt_a_file=prompt_a_path,
+                    prompt_b_file=prompt_b_path,
+                    rows=train_cases,
+                    category_by_id=train_category_by_id,
+                    output_dir=round_dir,
+                    label='train',
+                    max_cases=args.max_cases_train,
+                    paired=args.paired,
+                    write_report_files=not args.skip_eval_reports,
+                    session_latency=session_latency,
+                    sequential=sequential,
+                )
+            sequential_keep_a = train_b.sequential_stop == 'KEEP_A'
+
+            train_a_stats = category_pass_stats(train_a.cases, train_category_by_id)
+            train_b_stats = category_pass_stats(train_b.cases, train_category_by_id)
+
+            train_winner = winner_by_score(train_a.summary, train_b.summary, args.score_mode)
+            b_over_a_delta_pass = train_b.summary.pass_count - train_a.summary.pass_count
+            b_over_a_delta_pass_rate = train_b.summary.pass_rate - train_a.summary.pass_rate
+
+            threshold_ok = b_over_a_delta_pass_rate >= args.min_improvement_pass_rate_pp
+
+            guardrail_ok, guardrail_reason = guardrail_verdict(
+                a_stats=train_a_stats,
+                b_stats=train_b_stats,
+                a_summary=train_a.summary,
+                b_summary=train_b.summary,
+                a_tokens=prompt_a_tokens,
+                b_tokens=prompt_b_tokens,
+                max_category_drop_pp=args.max_category_drop_pp,
+                max_p99_latency_increase_pct=args.max_p99_latency_increase_pct,
+                max_prompt_token_growth=args.max_prompt_token_growth,
+            )
 
-        if recommend_switch_to_b:
-            best_recommendation = 'PROMOTE_B'
-            no_improve_rounds = 0
-            decision_reason = (
-                f"B wins train score, improves by {b_over_a_delta_pass_rate:.2f}pp "
-                f"(threshold {args.min_improvement_pass_rate_pp:.2f}pp), and passes guardrails"
-                + (' and holdout.' if args.use_holdout else '.')
+            holdout_checked = False
+            holdout_ok = True
+            holdout_winner = 'A'
+            holdout_a: EvalResult | None = None
+            holdout_b: EvalResult | None = None
+
+            if (
+                args.use_holdout
+                and not screen_rejected
+                and not sequential_keep_a
+                and train_winner == 'B'
+                and threshold_ok
+                and guardrail_ok
+                and holdout_path is not None
+            ):
+                holdout_checked = True
+                holdout_a, holdout_b = evaluate_ab(
+                    evaluator=evaluator,
+                    ledger=ledger,
+                    prompt_a_file=prompt_a_path,
+                    prompt_b_file=prompt_b_path,
+                    rows=holdout_cases,
+                    category_by_id=holdout_category_by_id,
+                    output_dir=round_dir,
+                    label='holdout',
+                    max_cases=args.max_cases_holdout,
+                    paired=args.paired,
+                    write_report_files=not args.skip_eval_reports,
+                    session_latency=session_latency,
+                )
+                holdout_winner = winner_by_score(holdout_a.summary, holdout_b.summary, args.score_mode)
+                holdout_ok = holdout_winner == 'B' and holdout_b.summary.pass_rate >= args.min_holdout_pass_rate
+
+            recommend_switch_to_b = (
+                not screen_rejected
+                and not sequential_keep_a
+                and train_winner == 'B'
+                and threshold_ok
+                and guardrail_ok
+                and holdout_ok
             )
-            loser_cases = train_a.cases
-            winner_text = prompt_b_text
-        else:
-            best_recommendation = 'KEEP_A'
-            no_improve_rounds += 1
-            if train_winner != 'B':
-                decision_reason = 'A wins train score tie-break order (pass, fail, latency).'
-            elif not threshold_ok:
+
+            if recommend_switch_to_b:
+                best_recommendation = 'PROMOTE_B'
+                no_improve_rounds = 0
                 decision_reason = (
-                    f"B improvement {b_over_a_delta_pass_rate:.2f}pp is below threshold "
-                    f"{args.min_improvement_pass_rate_pp:.2f}pp."
+                    f"B wins train score, improves by {b_over_a_delta_pass_rate:.2f}pp "
+                    f"(threshold {args.min_improvement_pass_rate_pp:.2f}pp), and passes guardrails"
+                    + (' and holdout.' if args.use_holdout else '.')
                 )
-            elif not guardrail_ok:
-                decision_reason = f'B rejected by guardrail: {guardrail_reason}'
+                loser_cases = train_a.cases
+                winner_text = prompt_b_text
             else:
-                decision_reason = 'B failed holdout promotion rule.'
-            loser_cases = train_b.cases
-            winner_text = prompt_a_text
-
-        loser_failure_pack_path = round_dir / 'loser_failure_pack.jsonl'
-        loser_failures = build_failure_pack(
-            eval_cases=loser_cases,
-            output_path=loser_failure_pack_path,
-            category_by_id=train_category_by_id,
-        )
-
-        suggested_next_b = build_next_challenger_prompt(winner_text, loser_failures)
-        suggested_next_b_path = round_dir / 'suggested_next_prompt_b.txt'
-        suggested_next_b_path.write_text(suggested_next_b, encoding='utf-8')
-
-        mutation_brief = round_dir / 'mutation_brief_for_prompt_b.md'
-        mutation_brief.write_text(
-            '\n'.join(
-                [
-                    '# Next Challenger Brief',
-                    '',
-                    f'- round: {round_index}',
-                    f'- recommendation: {best_recommendation}',
-                    f'- reason: {decision_reason}',
-                    f'- loser_failures: {len(loser_failures)}',
-                    '',
-                    'Recommendation-only mode: no prompt files were auto-modified.',
-                    f'Use this suggested challenger prompt for next run: `{suggested_next_b_path}`',
-                ]
-            ) + '\n',
-            encoding='utf-8',
-        )
+                best_recommendation = 'KEEP_A'
+                no_improve_rounds += 1
+                if screen_rejected and screen_record is not None:
+                    decision_reason = (
+                        f"B failed screening: delta {screen_record['b_over_a_delta_pass_rate_pp']:.2f}pp "
+                        f"below {args.screen_min_delta_pp:.2f}pp on {len(train_b.cases)} screen cases."
+                    )
+                elif sequential_keep_a and sequential is not None:
+                    decision_reason = (
+                        f'Sequential test settled KEEP_A after {sequential.pairs} pairs '
+                        f'(llr {sequential.llr:.3f}, A_only={sequential.a_only}, B_only={sequential.b_only}).'
+                    )
+                elif train_winner != 'B':
+                    decision_reason = (
+                        'A wins train score tie-break order '
+                        + ('(pass, fail, p99, p90, latency).' if args.score_mode == 'tail' else '(pass, fail, latency).')
+                    )
+                elif not threshold_ok:
+                    decision_reason = (
+                        f"B improvement {b_over_a_delta_pass_rate:.2f}pp is below threshold "
+                        f"{args.min_improvement_pass_rate_pp:.2f}pp."
+                    )
+                elif not guardrail_ok:
+                    decision_reason = f'B rejected by guardrail: {guardrail_reason}'
+                else:
+                    decision_reason = 'B failed holdout promotion rule.'
+                loser_cases = train_b.cases
+                winner_text = prompt_a_text
+
+            loser_failure_pack_path = round_dir / 'loser_failure_pack.jsonl'
+            loser_failures = build_failure_pack(
+                eval_cases=loser_cases,
+                output_path=loser_failure_pack_path,
+                category_by_id=train_category_by_id,
+            )
+            failure_pack_path = loser_failure_pack_path
+
+            suggested_next_b = build_next_challenger_prompt(winner_text, loser_failures)
+            suggested_next_b_path = round_dir / 'suggested_next_prompt_b.txt'
+            suggested_next_b_path.write_text(suggested_next_b, encoding='utf-8')
+
+            mutation_brief = round_dir / 'mutation_brief_for_prompt_b.md'
+            mutation_brief.write_text(
+                '\n'.join(
+                    [
+                        '# Next Challenger Brief',
+                        '',
+                        f'- round: {round_index}',
+                        f'- recommendation: {best_recommendation}',
+                        f'- reason: {decision_reason}',
+                        f'- loser_failures: {len(loser_failures)}',
+                        '',
+                        'Recommendation-only mode: no prompt files were auto-modified.',
+                        f'Use this suggested challenger prompt for next run: `{suggested_next_b_path}`',
+                    ]
+                ) + '\n',
+                encoding='utf-8',
+            )
 
-        holdout_a_stats = (
-            category_pass_stats(holdout_a.cases, holdout_category_by_id)
-            if holdout_checked and holdout_a is not None
-            else {}
-        )
-        holdout_b_stats = (
-            category_pass_stats(holdout_b.cases, holdout_category_by_id)
-            if holdout_checked and holdout_b is not None
-            else {}
-        )
+            holdout_a_stats = (
+                category_pass_stats(holdout_a.cases, holdout_category_by_id)
+                if holdout_checked and holdout_a is not None
+                else {}
+            )
+            holdout_b_stats = (
+                category_pass_stats(holdout_b.cases, holdout_category_by_id)
+                if holdout_checked and holdout_b is not None
+                else {}
+            )
 
-        log_record = {
-            'timestamp': datetime.now().isoformat(timespec='seconds'),
-            'round': round_index,
-            'git_head': git_head_sha(repo_root),
-            'protocol': {
-                'dataset_file': str(dataset_path),
-                'train_split_file': str(train_path),
-                'holdout_split_file': str(holdout_path) if holdout_path else None,
-                'backend': args.backend,
-                'timeout_sec': args.timeout_sec,
-                'use_holdout': args.use_holdout,
-                'holdout_mod': args.holdout_mod,
-                'holdout_remainder': args.holdout_remainder,
-                'min_improvement_pass_rate_pp': args.min_improvement_pass_rate_pp,
-                'max_category_drop_pp': args.max_category_drop_pp,
-                'min_holdout_pass_rate': args.min_holdout_pass_rate,
-            },
-            'prompts': {
-                'prompt_a_path': str(prompt_a_path),
-                'prompt_b_path': str(prompt_b_path),
-                'prompt_a_text': prompt_a_text,
-                'prompt_b_text': prompt_b_text,
-            },
-            'train': {
-                'a_summary': train_a.summary.__dict__,
-                'b_summary': train_b.summary.__dict__,
-                'a_category_stats': format_stats(train_a_stats),
-                'b_category_stats': format_stats(train_b_stats),
-                'winner': train_winner,
-                'b_over_a_delta_pass': b_over_a_delta_pass,
-                'b_over_a_delta_pass_rate_pp': round(b_over_a_delta_pass_rate, 2),
-            },
-            'holdout': {
-                'checked': holdout_checked,
-                'winner': holdout_winner,
-                'a_summary': holdout_a.summary.__dict__ if holdout_a else None,
-                'b_summary': holdout_b.summary.__dict__ if holdout_b else None,
-                'a_category_stats': format_stats(holdout_a_stats),
-                'b_category_stats': format_stats(holdout_b_stats),
-                'ok_for_switch': holdout_ok,
-            },
-            'guardrail': {
-                'ok': guardrail_ok,
-                'reason': guardrail_reason,
-            },
-            'decision': {
-                'recommendation': best_recommendation,
-                'reason': decision_reason,
-            },
-            'artifacts': {
-                'round_dir': str(round_dir),
-                'loser_failure_pack': str(loser_failure_pack_path),
-                'suggested_next_prompt_b': str(suggested_next_b_path),
-                'mutation_brief': str(mutation_brief),
-                'train_a_report_json': str(train_a.json_report_path),
-                'train_b_report_json': str(train_b.json_report_path),
-                'train_a_report_text': str(train_a.text_report_path),
-                'train_b_report_text': str(train_b.text_report_path),
-                'holdout_a_report_json': str(round_dir / 'holdout_a_report.json') if holdout_checked else None,
-                'holdout_b_report_json': str(round_dir / 'holdout_b_report.json') if holdout_checked else None,
-            },
-        }
+            log_record = {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'round': round_index,
+                'git_head': git_head_sha(repo_root),
+                'protocol': {
+                    'dataset_file': str(dataset_path),
+                    'train_split_file': str(train_path),
+                    'holdout_split_file': str(holdout_path) if holdout_path else None,
+                    'backend': args.backend,
+                    'timeout_sec': args.timeout_sec,
+                    'use_holdout': args.use_holdout,
+                    'holdout_mod': args.holdout_mod,
+                    'holdout_remainder': args.holdout_remainder,
+                    'min_improvement_pass_rate_pp': args.min_improvement_pass_rate_pp,
+                    'max_category_drop_pp': args.max_category_drop_pp,
+                    'score_mode': args.score_mode,
+                    'max_p99_latency_increase_pct': args.max_p99_latency_increase_pct,
+                    'session_latency': session_latency,
+                    'max_prompt_token_growth_pct': args.max_prompt_token_growth,
+                    'min_holdout_pass_rate': args.min_holdout_pass_rate,
+                },
+                'prompts': {
+                    'prompt_a_path': str(prompt_a_path),
+                    'prompt_b_path': str(prompt_b_path),
+                    'prompt_a_text': prompt_a_text,
+                    'prompt_b_text': prompt_b_text,
+                    'prompt_a_tokens': prompt_a_tokens,
+                    'prompt_b_tokens': prompt_b_tokens,
+                    'token_source': token_source,
+                    'b_over_a_token_growth_pct': round(prompt_token_growth_pct, 2),
+                },
+                'ledger': {
+                    'file': str(ledger.path),
+                    'train_a_evaluated': train_a.evaluated_cases,
+                    'train_b_evaluated': train_b.evaluated_cases,
+                    'holdout_a_evaluated': holdout_a.evaluated_cases if holdout_a else 0,
+                    'holdout_b_evaluated': holdout_b.evaluated_cases if holdout_b else 0,
+                },
+                'train': {
+                    'a_summary': train_a.summary.__dict__,
+                    'b_summary': train_b.summary.__dict__,
+                    'a_category_stats': format_stats(train_a_stats),
+                    'b_category_stats': format_stats(train_b_stats),
+                    'winner': train_winner,
+                    'b_over_a_delta_pass': b_over_a_delta_pass,
+                    'b_over_a_delta_pass_rate_pp': round(b_over_a_delta_pass_rate, 2),
+                },
+                'holdout': {
+                    'checked': holdout_checked,
+                    'winner': holdout_winner,
+                    'a_summary': holdout_a.summary.__dict__ if holdout_a else None,
+                    'b_summary': holdout_b.summary.__dict__ if holdout_b else None,
+                    'a_category_stats': format_stats(holdout_a_stats),
+                    'b_category_stats': format_stats(holdout_b_stats),
+                    'ok_for_switch': holdout_ok,
+                },
+                'screen': screen_record,
+                'sequential': (
+                    {**sequential.state(), 'stop': train_b.sequential_stop}
+                    if sequential is not None
+                    else None
+                ),
+                'guardrail': {
+                    'ok': guardrail_ok,
+                    'reason': guardrail_reason,
+                },
+                'decision': {
+                    'recommendation': best_recommendation,
+                    'reason': decision_reason,
+                },
+                'artifacts': {
+                    'round_dir': str(round_dir),
+                    'loser_failure_pack': str(loser_failure_pack_path),
+                    'suggested_next_prompt_b': str(suggested_next_b_path),
+                    'mutation_brief': str(mutation_brief),
+                    'train_a_report_json': str(train_a.json_report_path) if train_a.json_report_path else None,
+                    'train_b_report_json': str(train_b.json_report_path) if train_b.json_report_path else None,
+                    'train_a_report_text': str(train_a.text_report_path) if train_a.text_report_path else None,
+                    'train_b_report_text': str(train_b.text_report_path) if train_b.text_report_path else None,
+                    'holdout_a_report_json': (
+                        str(holdout_a.json_report_path) if holdout_a and holdout_a.json_report_path else None
+                    ),
+                    'holdout_b_report_json': (
+                        str(holdout_b.json_report_path) if holdout_b and holdout_b.json_report_path else None
+                    ),
+                },
+            }
 
-        with log_path.open('a', encoding='utf-8') as f:
-            f.write(json.dumps(log_record, ensure_ascii=False) + '\n')
+            with log_path.open('a', encoding='utf-8') as f:
+                f.write(json.dumps(log_record, ensure_ascii=False) + '\n')
 
-        print(
-            f"[{round_tag}] recommendation={best_recommendation} "
-            f"A_pass={train_a.summary.pass_count} ({train_a.summary.pass_rate:.2f}%) "
-            f"B_pass={train_b.summary.pass_count} ({train_b.summary.pass_rate:.2f}%) "
-            f"delta_pp={b_over_a_delta_pass_rate:.2f} "
-            f"threshold_pp={args.min_improvement_pass_rate_pp:.2f}"
-        )
-        print(f"[{round_tag}] reason: {decision_reason}")
+            print(
+                f"[{round_tag}] recommendation={best_recommendation} "
+                f"A_pass={train_a.summary.pass_count} ({train_a.summary.pass_rate:.2f}%) "
+                f"B_pass={train_b.summary.pass_count} ({train_b.summary.pass_rate:.2f}%) "
+                f"delta_pp={b_over_a_delta_pass_rate:.2f} "
+                f"threshold_pp={args.min_improvement_pass_rate_pp:.2f}"
+            )
+            print(f"[{round_tag}] reason: {decision_reason}")
 
-        if no_improve_rounds >= args.patience:
-            print(f"Stopping early: no-improvement rounds={no_improve_rounds} patience={args.patience}")
-            break
+            if no_improve_rounds >= args.patience:
+                print(f"Stopping early: no-improvement rounds={no_improve_rounds} patience={args.patience}")
+                break
+    finally:
+        evaluator.close()
 
     recommendation_lines = [
         '# Prompt Recommendation',
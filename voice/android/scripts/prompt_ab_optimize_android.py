@@ -2,14 +2,30 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import subprocess
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+from prompt_eval_android import (
+    DeviceRunOptions,
+    add_device_run_args,
+    add_prompt_fetch_args,
+    device_model,
+    prepare_device,
+    prompt_fetcher_from_args,
+    read_dataset_lines,
+    resolve_serials,
+    run_on_device,
+    upload_dataset,
+    write_device_reports,
+)
+from prompt_fetch import CachedFetcher
+
 
 @dataclass
 class EvalSummary:
@@ -18,6 +34,8 @@ class EvalSummary:
     fail_count: int
     pass_rate: float
     avg_latency_ms: int
+    p90_latency_ms: int = 0
+    p99_latency_ms: int = 0
 
 
 @dataclass
@@ -37,6 +55,8 @@ def parse_result(json_report_path: Path, text_report_path: Path) -> EvalResult:
         fail_count=int(summary_payload.get("fail_count", 0)),
         pass_rate=float(summary_payload.get("pass_rate", 0.0)),
         avg_latency_ms=int(summary_payload.get("avg_latency_ms", 0)),
+        p90_latency_ms=int(summary_payload.get("p90_latency_ms", 0)),
+        p99_latency_ms=int(summary_payload.get("p99_latency_ms", 0)),
     )
     return EvalResult(
         summary=summary,
@@ -65,25 +85,20 @@ def load_local_prompt_json(path: Path) -> str:
     return parse_prompt_json(path.read_text(encoding="utf-8"), str(path))
 
 
-def fetch_remote_prompt_json(url: str) -> str:
-    with urllib.request.urlopen(url, timeout=20) as response:
-        status = getattr(response, "status", 200)
-        if status not in (None, 200):
-            raise RuntimeError(f"Prompt A download failed (HTTP {status})")
-        body = response.read().decode("utf-8")
-    return parse_prompt_json(body, url)
+def fetch_remote_prompt_json(url: str, fetcher: CachedFetcher) -> str:
+    result = fetcher.fetch(url, validate=lambda body: parse_prompt_json(body, url))
+    print(f"Prompt A: {result.origin} ({url})", flush=True)
+    return parse_prompt_json(result.body, url)
 
 
 def run_device_eval(
     eval_script: Path,
+    options: DeviceRunOptions,
     serial: str | None,
     prompt_file: Path,
     cases_file: Path,
     report_text_path: Path,
     report_json_path: Path,
-    timeout_sec: int,
-    package_name: str,
-    receiver_component: str,
 ) -> EvalResult:
     cmd = [
         str(eval_script),
@@ -95,12 +110,7 @@ def run_device_eval(
         str(report_text_path),
         "--json-report-file",
         str(report_json_path),
-        "--timeout-sec",
-        str(timeout_sec),
-        "--package",
-        package_name,
-        "--receiver-component",
-        receiver_component,
+        *options.cli_args(),
     ]
     if serial:
         cmd += ["--serial", serial]
@@ -108,6 +118,77 @@ def run_device_eval(
     return parse_result(json_report_path=report_json_path, text_report_path=report_text_path)
 
 
+def assign_devices(serials: list[str], previous: dict[str, Any]) -> tuple[str, str]:
+    """Picks (A device, B device), swapping the previous round's assignment of the same pair."""
+    device_a, device_b = serials[0], serials[1]
+    if {previous.get("a_serial"), previous.get("b_serial")} == {device_a, device_b} and previous.get("a_serial") == device_a:
+        device_a, device_b = device_b, device_a
+    return device_a, device_b
+
+
+def load_assignment(state_path: Path) -> dict[str, Any]:
+    """The last round's assignment from an earlier run, so the first round swaps it too."""
+    if not state_path.exists():
+        return {}
+    return json.loads(state_path.read_text(encoding="utf-8"))
+
+
+def consistency_check(previous: dict[str, Any], current: dict[str, Any]) -> dict[str, Any] | None:
+    """Same prompts on swapped devices should score the same on a deterministic benchmark."""
+    if (
+        previous.get("a_serial") != current["b_serial"]
+        or previous.get("b_serial") != current["a_serial"]
+        or previous.get("prompt_a_sha256") != current["prompt_a_sha256"]
+        or previous.get("prompt_b_sha256") != current["prompt_b_sha256"]
+        or previous.get("dataset_sha256") != current["dataset_sha256"]
+    ):
+        return None
+    a_delta = current["a_pass_rate"] - float(previous.get("a_pass_rate", 0.0))
+    b_delta = current["b_pass_rate"] - float(previous.get("b_pass_rate", 0.0))
+    return {
+        "previous_run_dir": previous.get("run_dir"),
+        "previous_round": previous.get("round"),
+        "a_pass_rate_delta_pp": round(a_delta, 2),
+        "b_pass_rate_delta_pp": round(b_delta, 2),
+        "consistent": a_delta == 0.0 and b_delta == 0.0,
+    }
+
+
+def run_concurrent_device_evals(
+    options: DeviceRunOptions,
+    device_a: str,
+    device_b: str,
+    prompt_a_text: str,
+    prompt_b_text: str,
+    dataset_lines: list[str],
+    round_dir: Path,
+    run_tag: str,
+) -> tuple[EvalResult, EvalResult]:
+    """Runs A on device_a and B on device_b in parallel, uploading the dataset once per device."""
+
+    def evaluate(label: str, serial: str, prompt_text: str) -> EvalResult:
+        prepare_device(options, serial)
+        dataset_rel = upload_dataset(options, serial, dataset_lines)
+        device_run = run_on_device(
+            options,
+            serial,
+            run_id=f"{run_tag}_{label}",
+            prompt_text=prompt_text,
+            dataset_lines=dataset_lines,
+            partial_report_file=round_dir / f"{label}_report.partial.json",
+            dataset_rel=dataset_rel,
+        )
+        text_path = round_dir / f"{label}_report.txt"
+        json_path = round_dir / f"{label}_report.json"
+        write_device_reports(device_run.result, device_run.report_text, text_path, json_path)
+        return parse_result(json_report_path=json_path, text_report_path=text_path)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        future_a = pool.submit(evaluate, "a", device_a, prompt_a_text)
+        future_b = pool.submit(evaluate, "b", device_b, prompt_b_text)
+        return future_a.result(), future_b.result()
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(
         description="Android-device A/B prompt evaluator (source-of-truth path)."
@@ -119,18 +200,27 @@ def main() -> int:
             "sanogueralorenzo.github.io/main/voice/scripts/prompt_a.json"
         ),
     )
+    add_prompt_fetch_args(parser)
     parser.add_argument("--prompt-b-file", default="scripts/prompt_b.json")
     parser.add_argument("--dataset-file", default="scripts/dataset.jsonl")
     parser.add_argument("--eval-script", default="scripts/prompt_eval_android.py")
     parser.add_argument("--run-root", default=".cache/prompt_ab_android")
     parser.add_argument("--serial", default="")
-    parser.add_argument("--timeout-sec", type=int, default=900)
+    parser.add_argument(
+        "--serials",
+        default="",
+        help=(
+            "all | a,b: run A and B concurrently on two devices. The assignment swaps every round "
+            "(and across runs), and each round is checked against the previous one."
+        ),
+    )
+    add_device_run_args(parser)
     parser.add_argument("--min-improvement-pass-rate-pp", type=float, default=1.0)
-    parser.add_argument("--max-rounds", type=int, default=1)
-    parser.add_argument("--package", default="com.sanogueralorenzo.voice")
     parser.add_argument(
-        "--receiver-component",
-        default="com.sanogueralorenzo.voice/com.sanogueralorenzo.voice.benchmark.adb.BenchmarkAdbReceiver",
+        "--max-rounds",
+        type=int,
+        default=1,
+        help="With --serials, rounds on swapped devices; B is promoted only if every round promotes it.",
     )
     args = parser.parse_args()
 
@@ -145,16 +235,38 @@ def main() -> int:
     if not eval_script.exists():
         raise FileNotFoundError(f"Eval script not found: {eval_script}")
 
-    prompt_a_text = fetch_remote_prompt_json(args.prompt_a_url)
+    prompt_a_text = fetch_remote_prompt_json(args.prompt_a_url, prompt_fetcher_from_args(args))
     prompt_b_text = load_local_prompt_json(prompt_b_path)
 
     run_root = (repo_root / args.run_root).resolve()
     run_dir = run_root / f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     run_dir.mkdir(parents=True, exist_ok=True)
 
+    serials: list[str] = []
+    assignment_state_path = run_root / "device_assignment.json"
+    previous_assignment: dict[str, Any] = {}
+    if args.serials.strip():
+        serials = resolve_serials(args.serials)
+        if len(serials) < 2:
+            raise RuntimeError(f"--serials needs at least two devices for concurrent A/B, got {serials}")
+        models = {serial: device_model(serial) for serial in serials[:2]}
+        if len(set(models.values())) > 1:
+            print(f"[WARN] A/B devices are not the same model: {models}", flush=True)
+        previous_assignment = load_assignment(assignment_state_path)
+    dataset_lines = read_dataset_lines(dataset_path)
+    dataset_sha256 = hashlib.sha256(dataset_path.read_bytes()).hexdigest()
+    options = DeviceRunOptions.from_args(args)
+
     recommendation = "KEEP_A"
     rounds: list[dict[str, Any]] = []
     for round_index in range(1, max(1, args.max_rounds) + 1):
+        concurrent_devices: tuple[str, str] | None = None
+        if serials:
+            concurrent_devices = assign_devices(serials, previous_assignment)
+            print(
+                f"[round_{round_index:02d}] Concurrent A/B: A on {concurrent_devices[0]}, B on {concurrent_devices[1]}",
+                flush=True,
+            )
         round_dir = run_dir / f"round_{round_index:02d}"
         round_dir.mkdir(parents=True, exist_ok=True)
         prompt_a_path = round_dir / "prompt_a_resolved.txt"
@@ -162,50 +274,88 @@ def main() -> int:
         prompt_a_path.write_text(prompt_a_text, encoding="utf-8")
         prompt_b_resolved_path.write_text(prompt_b_text, encoding="utf-8")
 
-        eval_a = run_device_eval(
-            eval_script=eval_script,
-            serial=args.serial.strip() or None,
-            prompt_file=prompt_a_path,
-            cases_file=dataset_path,
-            report_text_path=round_dir / "a_report.txt",
-            report_json_path=round_dir / "a_report.json",
-            timeout_sec=args.timeout_sec,
-            package_name=args.package,
-            receiver_component=args.receiver_component,
-        )
-        eval_b = run_device_eval(
-            eval_script=eval_script,
-            serial=args.serial.strip() or None,
-            prompt_file=prompt_b_resolved_path,
-            cases_file=dataset_path,
-            report_text_path=round_dir / "b_report.txt",
-            report_json_path=round_dir / "b_report.json",
-            timeout_sec=args.timeout_sec,
-            package_name=args.package,
-            receiver_component=args.receiver_component,
-        )
+        if concurrent_devices is not None:
+            eval_a, eval_b = run_concurrent_device_evals(
+                options,
+                device_a=concurrent_devices[0],
+                device_b=concurrent_devices[1],
+                prompt_a_text=prompt_a_text,
+                prompt_b_text=prompt_b_text,
+                dataset_lines=dataset_lines,
+                round_dir=round_dir,
+                run_tag=f"{run_dir.name}_{round_dir.name}",
+            )
+        else:
+            eval_a = run_device_eval(
+                eval_script=eval_script,
+                options=options,
+                serial=args.serial.strip() or None,
+                prompt_file=prompt_a_path,
+                cases_file=dataset_path,
+                report_text_path=round_dir / "a_report.txt",
+                report_json_path=round_dir / "a_report.json",
+            )
+            eval_b = run_device_eval(
+                eval_script=eval_script,
+                options=options,
+                serial=args.serial.strip() or None,
+                prompt_file=prompt_b_resolved_path,
+                cases_file=dataset_path,
+                report_text_path=round_dir / "b_report.txt",
+                report_json_path=round_dir / "b_report.json",
+            )
+
+        devices_record: dict[str, Any] | None = None
+        if concurrent_devices is not None:
+            assignment = {
+                "run_dir": str(run_dir),
+                "round": round_index,
+                "a_serial": concurrent_devices[0],
+                "b_serial": concurrent_devices[1],
+                "prompt_a_sha256": hashlib.sha256(prompt_a_text.encode("utf-8")).hexdigest(),
+                "prompt_b_sha256": hashlib.sha256(prompt_b_text.encode("utf-8")).hexdigest(),
+                "dataset_sha256": dataset_sha256,
+                "a_pass_rate": eval_a.summary.pass_rate,
+                "b_pass_rate": eval_b.summary.pass_rate,
+            }
+            consistency = consistency_check(previous_assignment, assignment)
+            if consistency is not None and not consistency["consistent"]:
+                print(f"[WARN] Swapped-device rerun disagrees with the previous round: {consistency}", flush=True)
+            devices_record = {
+                "a_serial": concurrent_devices[0],
+                "b_serial": concurrent_devices[1],
+                "swapped_from_previous": previous_assignment.get("a_serial") == concurrent_devices[1],
+                "consistency": consistency,
+            }
+            assignment_state_path.write_text(json.dumps(assignment, indent=2), encoding="utf-8")
+            previous_assignment = assignment
 
         delta_pass_rate = eval_b.summary.pass_rate - eval_a.summary.pass_rate
         better_by_score = compare_score(eval_b.summary) > compare_score(eval_a.summary)
         if better_by_score and delta_pass_rate >= args.min_improvement_pass_rate_pp:
-            recommendation = "PROMOTE_B"
+            round_recommendation = "PROMOTE_B"
         else:
-            recommendation = "KEEP_A"
+            round_recommendation = "KEEP_A"
+        # A win that flips when the devices swap is device bias, not a better prompt.
+        if round_index == 1 or recommendation == "PROMOTE_B":
+            recommendation = round_recommendation
 
         rounds.append(
             {
                 "round": round_index,
-                "recommendation": recommendation,
+                "recommendation": round_recommendation,
                 "a_summary": eval_a.summary.__dict__,
                 "b_summary": eval_b.summary.__dict__,
                 "delta_pass_rate_pp": delta_pass_rate,
+                "devices": devices_record,
                 "a_report_json": str(eval_a.json_report_path),
                 "b_report_json": str(eval_b.json_report_path),
             }
         )
 
-        # Deterministic device benchmark: additional rounds without changing prompts are redundant.
-        break
+        # Deterministic device benchmark: without a device swap, additional rounds are redundant.
+        if concurrent_devices is None:
+            break
 
     summary = {
         "timestamp": datetime.now().isoformat(timespec="seconds"),
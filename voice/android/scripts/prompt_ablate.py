@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""Ablation search for the shortest prompt that keeps the pass rate.
+
+Starting from the winner prompt, each round tries every single edit of the current
+best variant (drop a rule line, drop a whole section or example block, merge two
+adjacent rules, fold a rule's sub-bullets into one line), screens the variants on
+a stratified subset, and continues from the shortest one whose pass rate stays
+within --max-pass-rate-drop-pp of the original. All screened variants are reduced
+to a Pareto front of (pass rate, prompt tokens, p90 latency). Prompt tokens come from
+the model tokenizer of a resident server, so the search needs --persistent.
+
+Results are recorded in the same outcome ledger as prompt_ab_optimize.py. Because p90
+latency is a front axis, a variant is only reused from the ledger when it was scored
+earlier in this session; older rows and cached results are re-measured.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from prompt_ab_optimize import (
+    EvalResult,
+    OutcomeLedger,
+    evaluate_prompt,
+    infer_category,
+    ledger_config_key,
+    load_jsonl,
+    load_prompt_text_file,
+    prepare_runtime,
+)
+from prompt_eval_runner import EvalConfig, Evaluator, load_prompt_template
+from prompt_eval_sampling import stratified_sample
+
+NUMBERED_ITEM_REGEX = re.compile(r'^(\d+)\)\s*')
+BULLET_ITEM_REGEX = re.compile(r'^[-*]\s+')
+EDIT_KINDS = ('drop', 'drop_section', 'merge', 'flatten')
+
+
+@dataclass
+class PromptBlock:
+    """A run of rule lines, optionally under a header line such as 'Hard constraints:'.
+
+    Each item is one top-level line plus its indented continuation lines.
+    """
+
+    header: str
+    items: list[list[str]] = field(default_factory=list)
+    blank_before: bool = False
+
+
+@dataclass
+class VariantPoint:
+    variant_id: str
+    parent_id: str | None
+    edit: str
+    prompt_path: Path
+    prompt_tokens: int
+    pass_rate: float
+    pass_count: int
+    total_cases: int
+    p90_latency_ms: int
+    avg_latency_ms: int
+    round_index: int
+
+
+def is_item_line(line: str) -> bool:
+    return bool(NUMBERED_ITEM_REGEX.match(line) or BULLET_ITEM_REGEX.match(line))
+
+
+def parse_prompt_blocks(prompt_text: str) -> list[PromptBlock]:
+    blocks: list[PromptBlock] = []
+    current: PromptBlock | None = None
+    blank_pending = False
+    for line in prompt_text.strip().splitlines():
+        if not line.strip():
+            current = None
+            blank_pending = True
+            continue
+        if line[0].isspace() and current is not None and current.items:
+            current.items[-1].append(line)
+            continue
+        starts_section = line.rstrip().endswith(':') and not is_item_line(line)
+        if current is None or starts_section:
+            current = PromptBlock(header=line if starts_section else '', blank_before=blank_pending and bool(blocks))
+            blocks.append(current)
+            blank_pending = False
+            if starts_section:
+                continue
+        current.items.append([line.strip()])
+    return blocks
+
+
+def render_prompt_blocks(blocks: list[PromptBlock]) -> str:
+    lines: list[str] = []
+    for block in blocks:
+        if not block.header and not block.items:
+            continue
+        if block.blank_before and lines:
+            lines.append('')
+        if block.header:
+            lines.append(block.header)
+        number = 0
+        for item in block.items:
+            first = item[0]
+            if NUMBERED_ITEM_REGEX.match(first):
+                number += 1
+                first = NUMBERED_ITEM_REGEX.sub(f'{number}) ', first, count=1)
+            lines.append(first)
+            lines.extend(item[1:])
+    return '\n'.join(lines).strip() + '\n'
+
+
+def item_text(line: str) -> str:
+    return BULLET_ITEM_REGEX.sub('', NUMBERED_ITEM_REGEX.sub('', line.strip(), count=1), count=1).strip()
+
+
+def copy_blocks(blocks: list[PromptBlock]) -> list[PromptBlock]:
+    return [
+        PromptBlock(header=block.header, items=[list(item) for item in block.items], blank_before=block.blank_before)
+        for block in blocks
+    ]
+
+
+def candidate_edits(blocks: list[PromptBlock], kinds: tuple[str, ...]) -> list[tuple[str, str]]:
+    """(edit description, rendered prompt) for every single edit of blocks."""
+    candidates: list[tuple[str, str]] = []
+    total_items = sum(len(block.items) for block in blocks)
+    for block_index, block in enumerate(blocks):
+        label = block.header.rstrip(':') or f'block {block_index + 1}'
+        if 'drop_section' in kinds and block.header and block.items and len(block.items) < total_items:
+            edited = copy_blocks(blocks)
+            del edited[block_index]
+            candidates.append((f'drop section "{label}"', render_prompt_blocks(edited)))
+        for item_index, item in enumerate(block.items):
+            if 'drop' in kinds and total_items > 1:
+                edited = copy_blocks(blocks)
+                del edited[block_index].items[item_index]
+                if not edited[block_index].items:
+                    del edited[block_index]
+                candidates.append((f'drop "{item_text(item[0])[:60]}"', render_prompt_blocks(edited)))
+            if 'flatten' in kinds and len(item) > 1:
+                edited = copy_blocks(blocks)
+                parts = [item_text(line) for line in item[1:]]
+                edited[block_index].items[item_index] = [item[0].rstrip().rstrip(':') + ': ' + '; '.join(parts)]
+                candidates.append((f'flatten "{item_text(item[0])[:60]}"', render_prompt_blocks(edited)))
+            next_item = block.items[item_index + 1] if item_index + 1 < len(block.items) else None
+            if (
+                'merge' in kinds
+                and next_item is not None
+                and len(item) == 1
+                and len(next_item) == 1
+                and is_item_line(item[0])
+                and is_item_line(next_item[0])
+            ):
+                edited = copy_blocks(blocks)
+                merged = item[0].rstrip().rstrip('.;') + '; ' + item_text(next_item[0])
+                edited[block_index].items[item_index : item_index + 2] = [[merged]]
+                candidates.append(
+                    (
+                        f'merge "{item_text(item[0])[:30]}" + "{item_text(next_item[0])[:30]}"',
+                        render_prompt_blocks(edited),
+                    )
+                )
+    return candidates
+
+
+def dominates(a: VariantPoint, b: VariantPoint) -> bool:
+    no_worse = (
+        a.pass_rate >= b.pass_rate
+        and a.prompt_tokens <= b.prompt_tokens
+        and a.p90_latency_ms <= b.p90_latency_ms
+    )
+    better = (
+        a.pass_rate > b.pass_rate
+        or a.prompt_tokens < b.prompt_tokens
+        or a.p90_latency_ms < b.p90_latency_ms
+    )
+    return no_worse and better
+
+
+def pareto_front(points: list[VariantPoint]) -> list[VariantPoint]:
+    front = [point for point in points if not any(dominates(other, point) for other in points)]
+    return sorted(front, key=lambda point: (point.prompt_tokens, -point.pass_rate, point.p90_latency_ms))
+
+
+def point_to_dict(point: VariantPoint) -> dict[str, Any]:
+    return {
+        'variant_id': point.variant_id,
+        'parent_id': point.parent_id,
+        'edit': point.edit,
+        'round': point.round_index,
+        'prompt_file': str(point.prompt_path),
+        'prompt_tokens': point.prompt_tokens,
+        'pass_rate': round(point.pass_rate, 2),
+        'pass_count': point.pass_count,
+        'total_cases': point.total_cases,
+        'p90_latency_ms': point.p90_latency_ms,
+        'avg_latency_ms': point.avg_latency_ms,
+    }
+
+
+class AblationSearch:
+    """Scores prompt variants once each and remembers every point for the front."""
+
+    def __init__(
+        self,
+        evaluator: Evaluator,
+        ledger: OutcomeLedger,
+        rows: list[dict[str, Any]],
+        run_dir: Path,
+    ) -> None:
+        self.evaluator = evaluator
+        self.ledger = ledger
+        self.rows = rows
+        self.run_dir = run_dir
+        self.points: dict[str, VariantPoint] = {}
+        self.log_path = run_dir / 'ablation_log.jsonl'
+
+    def score(self, prompt_text: str, parent_id: str | None, edit: str, round_index: int) -> VariantPoint:
+        variant_id = hashlib.sha256(prompt_text.encode('utf-8')).hexdigest()[:12]
+        known = self.points.get(variant_id)
+        if known is not None:
+            return known
+        prompt_path = self.run_dir / 'variants' / f'{variant_id}.txt'
+        prompt_path.parent.mkdir(parents=True, exist_ok=True)
+        prompt_path.write_text(prompt_text, encoding='utf-8')
+        result: EvalResult = evaluate_prompt(
+            evaluator=self.evaluator,
+            ledger=self.ledger,
+            prompt_file=prompt_path,
+            rows=self.rows,
+            output_dir=self.run_dir,
+            label=variant_id,
+            max_cases=0,
+            write_report_files=False,
+            # p90 is a front axis, so every variant's latencies come from this session.
+            session_latency=True,
+        )
+        tokens, _ = self.evaluator.count_prompt_tokens(
+            load_prompt_template(str(prompt_path)), require_tokenizer=True
+        )
+        point = VariantPoint(
+            variant_id=variant_id,
+            parent_id=parent_id,
+            edit=edit,
+            prompt_path=prompt_path,
+            prompt_tokens=tokens,
+            pass_rate=result.summary.pass_rate,
+            pass_count=result.summary.pass_count,
+            total_cases=result.summary.total_cases,
+            p90_latency_ms=result.summary.p90_latency_ms,
+            avg_latency_ms=result.summary.avg_latency_ms,
+            round_index=round_index,
+        )
+        self.points[variant_id] = point
+        with self.log_path.open('a', encoding='utf-8') as f:
+            f.write(json.dumps({**point_to_dict(point), 'evaluated_cases': result.evaluated_cases}) + '\n')
+        return point
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Prompt ablation search: shortest prompt that keeps the pass rate.')
+    parser.add_argument('--prompt-file', default='scripts/prompt_a.json', help='Winner prompt to ablate.')
+    parser.add_argument('--dataset-file', default='scripts/dataset.jsonl')
+    parser.add_argument('--eval-script', default='scripts/prompt_eval.sh')
+    parser.add_argument('--run-root', default='.cache/prompt_ablate')
+    parser.add_argument('--ledger-file', default='.cache/prompt_ab/ledger.jsonl')
+
+    parser.add_argument('--screen-size', type=int, default=60, help='Stratified screening subset size (0 = all).')
+    parser.add_argument('--screen-seed', type=int, default=0)
+    parser.add_argument('--max-rounds', type=int, default=10)
+    parser.add_argument(
+        '--max-pass-rate-drop-pp',
+        type=float,
+        default=0.0,
+        help='Accept a shorter variant if its screen pass rate is at most this far below the original.',
+    )
+    parser.add_argument(
+        '--edits',
+        default=','.join(EDIT_KINDS),
+        help=f'Comma-separated edit kinds to try: {", ".join(EDIT_KINDS)}.',
+    )
+    parser.add_argument(
+        '--confirm',
+        action='store_true',
+        help='Re-score the Pareto front on the full dataset.',
+    )
+
+    parser.add_argument('--backend', default='auto')
+    parser.add_argument('--timeout-sec', type=int, default=30)
+    parser.add_argument('--model-path', default='')
+    parser.add_argument('--litertlm-dir', default='')
+    parser.add_argument('--binary-path', default='')
+    parser.add_argument(
+        '--persistent',
+        action='store_true',
+        help='Keep a resident server per worker; required, since prompt tokens come from its tokenizer.',
+    )
+    parser.add_argument('--prefix-cache', action='store_true')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--max-resident-mb', type=int, default=0)
+    parser.add_argument('--cache-file', default='.cache/prompt_eval/results.sqlite')
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--always-skip-setup', action='store_true')
+    parser.add_argument('--always-skip-download', action='store_true')
+    args = parser.parse_args()
+
+    kinds = tuple(kind.strip() for kind in args.edits.split(',') if kind.strip())
+    unknown = [kind for kind in kinds if kind not in EDIT_KINDS]
+    if unknown or not kinds:
+        raise ValueError(f'Unknown --edits {unknown}; choose from {EDIT_KINDS}')
+    if not args.persistent:
+        raise ValueError('ablation needs --persistent to count prompt tokens with the model tokenizer')
+
+    repo_root = Path.cwd()
+    prompt_path = (repo_root / args.prompt_file).resolve()
+    dataset_path = (repo_root / args.dataset_file).resolve()
+    eval_script = (repo_root / args.eval_script).resolve()
+    if not prompt_path.exists():
+        raise FileNotFoundError(f'Prompt file not found: {prompt_path}')
+    if not dataset_path.exists():
+        raise FileNotFoundError(f'Dataset file not found: {dataset_path}')
+    if not eval_script.exists():
+        raise FileNotFoundError(f'Eval script not found: {eval_script}')
+
+    run_dir = (repo_root / args.run_root).resolve() / f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    all_rows = load_jsonl(dataset_path)
+    screen_rows = all_rows
+    if 0 < args.screen_size < len(all_rows):
+        sampled = {
+            id(row)
+            for row in stratified_sample(
+                all_rows,
+                size=args.screen_size,
+                seed=args.screen_seed,
+                category_of=infer_category,
+            )
+        }
+        screen_rows = [row for row in all_rows if id(row) in sampled]
+
+    binary_path, model_path = prepare_runtime(
+        eval_script=eval_script,
+        model_path=args.model_path or None,
+        litertlm_dir=args.litertlm_dir or None,
+        binary_path=args.binary_path or None,
+        skip_setup=args.always_skip_setup,
+        skip_download=args.always_skip_download,
+    )
+    eval_config = EvalConfig(
+        binary_path=binary_path,
+        model_path=model_path,
+        backend=args.backend,
+        timeout_sec=args.timeout_sec,
+        persistent=args.persistent,
+        prefix_cache=args.prefix_cache,
+        workers=args.workers,
+        max_resident_mb=args.max_resident_mb,
+        cache_file='' if args.no_cache else str((repo_root / args.cache_file).resolve()),
+    )
+    evaluator = Evaluator(eval_config)
+    ledger = OutcomeLedger(
+        (repo_root / args.ledger_file).resolve(),
+        config_key=ledger_config_key(eval_config, evaluator.cache),
+    )
+    search = AblationSearch(evaluator, ledger, screen_rows, run_dir)
+
+    try:
+        original_text = load_prompt_text_file(prompt_path)
+        original = search.score(original_text, parent_id=None, edit='original', round_index=0)
+        floor = original.pass_rate - args.max_pass_rate_drop_pp
+        print(
+            f'[original] tokens={original.prompt_tokens} pass_rate={original.pass_rate:.2f}% '
+            f'p90={original.p90_latency_ms}ms screen_cases={len(screen_rows)} floor={floor:.2f}%',
+            flush=True,
+        )
+
+        best, best_text = original, original_text
+        for round_index in range(1, args.max_rounds + 1):
+            candidates = candidate_edits(parse_prompt_blocks(best_text), kinds)
+            scored: list[tuple[VariantPoint, str]] = []
+            for edit, text in candidates:
+                point = search.score(text, parent_id=best.variant_id, edit=edit, round_index=round_index)
+                scored.append((point, text))
+            accepted = [
+                (point, text)
+                for point, text in scored
+                if point.pass_rate >= floor and point.prompt_tokens < best.prompt_tokens
+            ]
+            if not accepted:
+                print(f'[round_{round_index:02d}] {len(candidates)} variants, none kept the pass rate; stopping')
+                break
+            best, best_text = min(
+                accepted,
+                key=lambda pair: (pair[0].prompt_tokens, -pair[0].pass_rate, pair[0].p90_latency_ms),
+            )
+            print(
+                f'[round_{round_index:02d}] {len(candidates)} variants; kept {best.variant_id} ({best.edit}) '
+                f'tokens={best.prompt_tokens} pass_rate={best.pass_rate:.2f}% p90={best.p90_latency_ms}ms',
+                flush=True,
+            )
+
+        front = pareto_front(list(search.points.values()))
+        confirmed: dict[str, dict[str, Any]] = {}
+        if args.confirm:
+            for point in front:
+                result = evaluate_prompt(
+                    evaluator=evaluator,
+                    ledger=ledger,
+                    prompt_file=point.prompt_path,
+                    rows=all_rows,
+                    output_dir=run_dir,
+                    label=f'confirm_{point.variant_id}',
+                    max_cases=0,
+                    write_report_files=False,
+                    session_latency=True,
+                )
+                confirmed[point.variant_id] = {
+                    'pass_rate': round(result.summary.pass_rate, 2),
+                    'total_cases': result.summary.total_cases,
+                    'p90_latency_ms': result.summary.p90_latency_ms,
+                }
+    finally:
+        evaluator.close()
+
+    front_rows = [{**point_to_dict(point), 'confirm': confirmed.get(point.variant_id)} for point in front]
+    front_path = run_dir / 'pareto_front.json'
+    front_path.write_text(
+        json.dumps(
+            {
+                'prompt_file': str(prompt_path),
+                'screen_cases': len(screen_rows),
+                'screen_seed': args.screen_seed,
+                'max_pass_rate_drop_pp': args.max_pass_rate_drop_pp,
+                'edits': list(kinds),
+                'variants_scored': len(search.points),
+                'token_source': 'tokenizer',
+                'original': point_to_dict(original),
+                'shortest_kept': point_to_dict(best),
+                'front': front_rows,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+        + '\n',
+        encoding='utf-8',
+    )
+
+    print(f'Pareto front ({len(front)} of {len(search.points)} variants):')
+    for row in front_rows:
+        confirm = row['confirm']
+        full = f" full={confirm['pass_rate']:.2f}%" if confirm else ''
+        print(
+            f"  {row['variant_id']} tokens={row['prompt_tokens']} pass_rate={row['pass_rate']:.2f}%{full} "
+            f"p90={row['p90_latency_ms']}ms edit={row['edit']}"
+        )
+    print(f'Shortest kept prompt: {best.prompt_path}')
+    print(f'Front JSON: {front_path}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -16,12 +16,23 @@ LITERTLM_DIR="${CACHE_DIR}/LiteRT-LM"
 BINARY_PATH=""
 BACKEND="auto"
 MAX_CASES=0
+SAMPLE_STRATEGY="head"
+SAMPLE_SEED=0
+TIME_BUDGET_SEC=0
 TIMEOUT_SEC=30
 REPORT_FILE="${CACHE_DIR}/report.txt"
 JSON_REPORT_FILE="${CACHE_DIR}/report.json"
 SKIP_SETUP=0
 SKIP_DOWNLOAD=0
 NO_UPDATE=0
+PERSISTENT=0
+PREFIX_CACHE=0
+WORKERS=1
+MAX_RESIDENT_MB=0
+RESULT_CACHE_FILE="${CACHE_DIR}/results.sqlite"
+PREPARE_ONLY=0
+CHECKPOINT_FILE=""
+RESUME=0
 
 usage() {
   cat <<EOF
@@ -34,7 +45,11 @@ Required:
 
 Options:
   --backend <auto|cpu|gpu>   Runtime backend policy (default: auto = GPU->CPU fallback)
-  --max-cases <N>            Run only first N cases (default: 0 = all)
+  --max-cases <N>            Run only N sampled cases (default: 0 = all)
+  --sample-strategy <name>   head|random|stratified|weighted (default: head = first N rows)
+  --sample-seed <N>          Seed for random/stratified/weighted sampling (default: 0)
+  --time-budget-sec <N>      Stop starting new cases after N seconds, in sample order
+                             (default: 0 = no budget)
   --timeout-sec <N>          Per-case timeout in seconds (default: 30)
   --report-file <path>       Text report path (default: .cache/prompt_eval/report.txt)
   --json-report-file <path>  JSON report path (default: .cache/prompt_eval/report.json)
@@ -45,6 +60,22 @@ Options:
   --skip-setup               Skip clone/build step
   --skip-download            Skip model download step
   --no-update                Do not run git pull when LiteRT-LM already exists
+  --persistent               Keep one evaluator process resident and stream cases
+                             through it (needs a --binary-path built from
+                             scripts/litert_android_eval_main.cc)
+  --prefix-cache             With --persistent, prefill the prompt text before
+                             {input} once per evaluator and send only the
+                             per-case remainder
+  --workers <N>              Evaluate cases across N evaluator processes (default: 1)
+  --max-resident-mb <N>      Cap workers so total model footprint stays below N MB
+                             (default: 0 = no cap)
+  --result-cache-file <path> Inference result cache (default: .cache/prompt_eval/results.sqlite)
+  --no-cache                 Always run inference, ignoring cached results
+  --checkpoint-file <path>   Per-case JSONL checkpoint
+                             (default: <json-report-file stem>.checkpoint.jsonl)
+  --resume                   Skip cases already checkpointed under the same config
+  --prepare-only             Only download/build, then print BINARY_PATH= and MODEL_PATH=
+                             (prompt/cases files are not required)
   -h, --help                 Show this help
 
 This script runs prompt evaluation against LiteRT-LM's reference CLI
@@ -78,6 +109,18 @@ while [[ $# -gt 0 ]]; do
       MAX_CASES="$2"
       shift 2
       ;;
+    --sample-strategy)
+      SAMPLE_STRATEGY="$2"
+      shift 2
+      ;;
+    --sample-seed)
+      SAMPLE_SEED="$2"
+      shift 2
+      ;;
+    --time-budget-sec)
+      TIME_BUDGET_SEC="$2"
+      shift 2
+      ;;
     --timeout-sec)
       TIMEOUT_SEC="$2"
       shift 2
@@ -118,6 +161,42 @@ while [[ $# -gt 0 ]]; do
       NO_UPDATE=1
       shift
       ;;
+    --persistent)
+      PERSISTENT=1
+      shift
+      ;;
+    --prefix-cache)
+      PREFIX_CACHE=1
+      shift
+      ;;
+    --workers)
+      WORKERS="$2"
+      shift 2
+      ;;
+    --max-resident-mb)
+      MAX_RESIDENT_MB="$2"
+      shift 2
+      ;;
+    --result-cache-file)
+      RESULT_CACHE_FILE="$2"
+      shift 2
+      ;;
+    --no-cache)
+      RESULT_CACHE_FILE=""
+      shift
+      ;;
+    --checkpoint-file)
+      CHECKPOINT_FILE="$2"
+      shift 2
+      ;;
+    --resume)
+      RESUME=1
+      shift
+      ;;
+    --prepare-only)
+      PREPARE_ONLY=1
+      shift
+      ;;
     -h|--help)
       usage
       exit 0
@@ -130,20 +209,22 @@ while [[ $# -gt 0 ]]; do
   esac
 done
 
-if [[ -z "${PROMPT_FILE}" || -z "${CASES_FILE}" ]]; then
-  echo "--prompt-file and --cases-file are required" >&2
-  usage
-  exit 1
-fi
+if [[ "${PREPARE_ONLY}" -eq 0 ]]; then
+  if [[ -z "${PROMPT_FILE}" || -z "${CASES_FILE}" ]]; then
+    echo "--prompt-file and --cases-file are required" >&2
+    usage
+    exit 1
+  fi
 
-if [[ ! -f "${PROMPT_FILE}" ]]; then
-  echo "Prompt file not found: ${PROMPT_FILE}" >&2
-  exit 1
-fi
+  if [[ ! -f "${PROMPT_FILE}" ]]; then
+    echo "Prompt file not found: ${PROMPT_FILE}" >&2
+    exit 1
+  fi
 
-if [[ ! -f "${CASES_FILE}" ]]; then
-  echo "Cases file not found: ${CASES_FILE}" >&2
-  exit 1
+  if [[ ! -f "${CASES_FILE}" ]]; then
+    echo "Cases file not found: ${CASES_FILE}" >&2
+    exit 1
+  fi
 fi
 
 echo "[NOTE] Host/Mac prompt_eval is smoke-only. Use scripts/prompt_eval_android.py for source-of-truth comparisons." >&2
@@ -216,21 +297,48 @@ if [[ ! -x "${BINARY_PATH}" ]]; then
   exit 1
 fi
 
+if [[ "${PREPARE_ONLY}" -eq 1 ]]; then
+  echo "BINARY_PATH=${BINARY_PATH}"
+  echo "MODEL_PATH=${MODEL_PATH}"
+  exit 0
+fi
+
 mkdir -p "$(dirname "${REPORT_FILE}")"
 mkdir -p "$(dirname "${JSON_REPORT_FILE}")"
 
-echo "Running prompt evaluation"
-python3 "${SCRIPT_DIR}/prompt_eval_runner.py" \
-  --binary-path "${BINARY_PATH}" \
-  --model-path "${MODEL_PATH}" \
-  --prompt-file "${PROMPT_FILE}" \
-  --cases-file "${CASES_FILE}" \
-  --backend "${BACKEND}" \
-  --report-file "${REPORT_FILE}" \
-  --json-report-file "${JSON_REPORT_FILE}" \
-  --max-cases "${MAX_CASES}" \
-  --timeout-sec "${TIMEOUT_SEC}" \
+RUNNER_ARGS=(
+  --binary-path "${BINARY_PATH}"
+  --model-path "${MODEL_PATH}"
+  --prompt-file "${PROMPT_FILE}"
+  --cases-file "${CASES_FILE}"
+  --backend "${BACKEND}"
+  --report-file "${REPORT_FILE}"
+  --json-report-file "${JSON_REPORT_FILE}"
+  --max-cases "${MAX_CASES}"
+  --sample-strategy "${SAMPLE_STRATEGY}"
+  --sample-seed "${SAMPLE_SEED}"
+  --time-budget-sec "${TIME_BUDGET_SEC}"
+  --timeout-sec "${TIMEOUT_SEC}"
+  --workers "${WORKERS}"
+  --max-resident-mb "${MAX_RESIDENT_MB}"
+  --cache-file "${RESULT_CACHE_FILE}"
   --verbose
+)
+if [[ "${PERSISTENT}" -eq 1 ]]; then
+  RUNNER_ARGS+=(--persistent)
+fi
+if [[ "${PREFIX_CACHE}" -eq 1 ]]; then
+  RUNNER_ARGS+=(--prefix-cache)
+fi
+if [[ -n "${CHECKPOINT_FILE}" ]]; then
+  RUNNER_ARGS+=(--checkpoint-file "${CHECKPOINT_FILE}")
+fi
+if [[ "${RESUME}" -eq 1 ]]; then
+  RUNNER_ARGS+=(--resume)
+fi
+
+echo "Running prompt evaluation"
+python3 "${SCRIPT_DIR}/prompt_eval_runner.py" "${RUNNER_ARGS[@]}"
 
 echo "Done."
 echo "Text report: ${REPORT_FILE}"
@@ -2,15 +2,27 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import io
 import json
 import os
+import queue
+import re
 import subprocess
 import sys
-import tempfile
+import tarfile
+import threading
 import time
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+from prompt_eval_runner import infer_category, latency_stats
+from prompt_fetch import CachedFetcher
+from prompt_fetch import DEFAULT_CACHE_DIR as DEFAULT_PROMPT_CACHE_DIR
+from prompt_fetch import DEFAULT_TTL_SEC as DEFAULT_PROMPT_CACHE_TTL_SEC
 
 ACTION_RUN = "com.sanogueralorenzo.voice.DEBUG_BENCHMARK_RUN"
 DEFAULT_PACKAGE = "com.sanogueralorenzo.voice"
@@ -18,6 +30,13 @@ DEFAULT_RECEIVER = (
     "com.sanogueralorenzo.voice/com.sanogueralorenzo.voice.benchmark.adb.BenchmarkAdbReceiver"
 )
 DEFAULT_RESULTS_DIR = "benchmark_runs"
+# Content-addressed prompts and datasets, named by sha256, shared across runs.
+CAS_DIR = "benchmark_cas"
+STATUS_LOG_TAG = "BenchmarkStatus"
+TERMINAL_STATES = ("completed", "failed")
+# Overridable so the scripts can run against scripts/fake_adb.py without a device.
+ADB = os.environ.get("ADB", "adb")
+T = TypeVar("T")
 DEFAULT_PROMPT_A_URL = (
     "https://raw.githubusercontent.com/sanogueralorenzo/"
     "sanogueralorenzo.github.io/main/voice/scripts/prompt_a.json"
@@ -49,15 +68,15 @@ def run(cmd: list[str], *, stdin_path: Path | None = None, check: bool = True) -
 
 
 def adb_cmd(serial: str | None, *args: str) -> list[str]:
-    base = ["adb"]
+    base = [ADB]
     if serial:
         base += ["-s", serial]
     base += list(args)
     return base
 
 
-def detect_device(serial: str | None) -> str:
-    out = run(["adb", "devices"], check=True).stdout.splitlines()
+def list_devices() -> list[str]:
+    out = run([ADB, "devices"], check=True).stdout.splitlines()
     devices = []
     for line in out[1:]:
         line = line.strip()
@@ -66,6 +85,11 @@ def detect_device(serial: str | None) -> str:
         parts = line.split()
         if len(parts) >= 2 and parts[1] == "device":
             devices.append(parts[0])
+    return devices
+
+
+def detect_device(serial: str | None) -> str:
+    devices = list_devices()
     if serial:
         if serial not in devices:
             raise RuntimeError(f"Device serial not found/ready: {serial}. connected={devices}")
@@ -73,10 +97,14 @@ def detect_device(serial: str | None) -> str:
     if len(devices) == 0:
         raise RuntimeError("No connected Android devices.")
     if len(devices) > 1:
-        raise RuntimeError(f"Multiple devices connected {devices}. Pass --serial.")
+        raise RuntimeError(f"Multiple devices connected {devices}. Pass --serial or --serials.")
     return devices[0]
 
 
+def device_model(serial: str) -> str:
+    return run(adb_cmd(serial, "shell", "getprop", "ro.product.model"), check=False).stdout.strip()
+
+
 def ensure_package_installed(serial: str, package_name: str) -> None:
     result = run(adb_cmd(serial, "shell", "pm", "path", package_name), check=False)
     if result.returncode != 0 or "package:" not in result.stdout:
@@ -110,16 +138,58 @@ def run_as_shell(serial: str, package_name: str, shell_command: str, *, stdin_pa
     )
 
 
-def upload_file_to_app(serial: str, package_name: str, local_path: Path, rel_path: str) -> None:
-    parent = os.path.dirname(rel_path)
-    if parent:
-        run_as_shell(serial, package_name, f"mkdir -p files/{parent}")
-    run_as_shell(
-        serial,
-        package_name,
-        f"cat > files/{rel_path}",
-        stdin_path=local_path,
+def push_files_to_app(serial: str, package_name: str, files: dict[str, bytes], *, compress: bool = False) -> None:
+    """Uploads files (rel_path under files/ -> content) as one tar stream in one run-as call."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz" if compress else "w") as archive:
+        now = time.time()
+        for rel_path, content in files.items():
+            info = tarfile.TarInfo(rel_path)
+            info.size = len(content)
+            info.mtime = now
+            info.mode = 0o600
+            archive.addfile(info, io.BytesIO(content))
+    tar_flags = "-xzf" if compress else "-xf"
+    cmd = adb_cmd(serial, "shell", f"run-as {package_name} sh -c 'mkdir -p files && tar {tar_flags} - -C files'")
+    completed = subprocess.run(cmd, input=buffer.getvalue(), capture_output=True, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(
+            f"Failed uploading {sorted(files)} via run-as tar.\n"
+            f"stderr:\n{completed.stderr.decode('utf-8', errors='replace')}"
+        )
+
+
+def pull_files_from_app(
+    serial: str,
+    package_name: str,
+    rel_paths: list[str],
+    *,
+    compress: bool = False,
+) -> dict[str, bytes]:
+    """Downloads the existing files among rel_paths as one tar stream; missing ones are left out."""
+    quoted = " ".join(f'"{rel_path}"' for rel_path in rel_paths)
+    tar_flags = "-czf" if compress else "-cf"
+    shell_command = (
+        f"cd files && set -- && for f in {quoted}; do [ -f \"$f\" ] && set -- \"$@\" \"$f\"; done; "
+        f"[ $# -eq 0 ] || tar {tar_flags} - \"$@\""
     )
+    # exec-out keeps stdout binary-clean (no pty line-ending translation).
+    cmd = adb_cmd(serial, "exec-out", f"run-as {package_name} sh -c '{shell_command}'")
+    completed = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(
+            f"Failed downloading {rel_paths} via run-as tar.\n"
+            f"stderr:\n{completed.stderr.decode('utf-8', errors='replace')}"
+        )
+    if not completed.stdout:
+        return {}
+    pulled: dict[str, bytes] = {}
+    with tarfile.open(fileobj=io.BytesIO(completed.stdout), mode="r:*") as archive:
+        for member in archive.getmembers():
+            extracted = archive.extractfile(member) if member.isfile() else None
+            if extracted is not None:
+                pulled[member.name.removeprefix("./")] = extracted.read()
+    return pulled
 
 
 def read_file_from_app(serial: str, package_name: str, rel_path: str, *, check: bool = True) -> str:
@@ -145,12 +215,7 @@ def load_prompt_text(prompt_path: Path) -> str:
     return prompt + "\n"
 
 
-def fetch_remote_prompt_text(prompt_url: str) -> str:
-    with urllib.request.urlopen(prompt_url, timeout=20) as response:
-        status = getattr(response, "status", 200)
-        if status not in (None, 200):
-            raise RuntimeError(f"Prompt A download failed (HTTP {status})")
-        payload = response.read().decode("utf-8")
+def parse_remote_prompt(payload: str, prompt_url: str) -> str:
     parsed = json.loads(payload)
     version = str(parsed.get("version", "")).strip()
     prompt = str(parsed.get("prompt", "")).strip()
@@ -161,6 +226,109 @@ def fetch_remote_prompt_text(prompt_url: str) -> str:
     return prompt + "\n"
 
 
+def fetch_remote_prompt_text(prompt_url: str, fetcher: CachedFetcher) -> str:
+    result = fetcher.fetch(prompt_url, validate=lambda payload: parse_remote_prompt(payload, prompt_url))
+    return parse_remote_prompt(result.body, prompt_url)
+
+
+def add_prompt_fetch_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--prompt-cache-dir", default=DEFAULT_PROMPT_CACHE_DIR)
+    parser.add_argument(
+        "--prompt-cache-ttl-sec",
+        type=float,
+        default=DEFAULT_PROMPT_CACHE_TTL_SEC,
+        help="Serve the cached remote prompt without any request for this long; then revalidate (0 = always).",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Never download the remote prompt; use the last cached copy.",
+    )
+
+
+def add_device_run_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--package", default=DEFAULT_PACKAGE)
+    parser.add_argument("--receiver-component", default=DEFAULT_RECEIVER)
+    parser.add_argument("--timeout-sec", type=int, default=900)
+    parser.add_argument(
+        "--completion",
+        choices=("logcat", "poll"),
+        default="logcat",
+        help="logcat: stream status lines and return on the terminal one; poll: read the status file.",
+    )
+    parser.add_argument("--poll-interval-sec", type=float, default=1.0, help="Status file poll interval (poll mode).")
+    parser.add_argument(
+        "--fallback-poll-sec",
+        type=float,
+        default=30.0,
+        help="In logcat mode, read the status file after this long without a status line.",
+    )
+    parser.add_argument(
+        "--compress-transfers",
+        action="store_true",
+        help="gzip the tar streams used to move files to and from the device.",
+    )
+    parser.add_argument(
+        "--keep-runs",
+        type=int,
+        default=20,
+        help="Runs kept in files/benchmark_runs on the device before each run (0 = keep all).",
+    )
+    parser.add_argument(
+        "--gc-max-age-days",
+        type=int,
+        default=14,
+        help="Delete device run files and unused cached artifacts older than this (0 = never).",
+    )
+    parser.add_argument(
+        "--telemetry-interval-sec",
+        type=float,
+        default=15.0,
+        help="Sample thermal/battery/CPU/memory telemetry this often during the run (0 = before/after only).",
+    )
+    parser.add_argument("--no-telemetry", action="store_true", help="Skip device telemetry capture.")
+
+
+def prompt_fetcher_from_args(args: argparse.Namespace) -> CachedFetcher:
+    return CachedFetcher(args.prompt_cache_dir, ttl_sec=args.prompt_cache_ttl_sec, offline=args.offline)
+
+
+@dataclass
+class PromptVariant:
+    prompt_id: str
+    source: str
+    text: str
+
+
+def load_prompt_variants(prompt_args: list[str]) -> list[PromptVariant]:
+    """Loads every --prompt-file value; a directory contributes its *.json and *.txt files."""
+    paths: list[Path] = []
+    for raw in prompt_args:
+        path = Path(raw).resolve()
+        if path.is_dir():
+            found = sorted(child for child in path.iterdir() if child.suffix.lower() in (".json", ".txt"))
+            if not found:
+                raise FileNotFoundError(f"No prompt files (*.json, *.txt) in directory: {path}")
+            paths.extend(found)
+        elif path.exists():
+            paths.append(path)
+        else:
+            raise FileNotFoundError(f"Prompt file not found: {path}")
+
+    variants: list[PromptVariant] = []
+    used_ids: set[str] = set()
+    for path in paths:
+        base_id = re.sub(r"[^A-Za-z0-9._-]+", "_", path.stem).strip("._") or "prompt"
+        prompt_id = base_id
+        suffix = 2
+        while prompt_id in used_ids:
+            prompt_id = f"{base_id}-{suffix}"
+            suffix += 1
+        used_ids.add(prompt_id)
+        variants.append(PromptVariant(prompt_id=prompt_id, source=str(path), text=load_prompt_text(path)))
+    return variants
+
+
 def trigger_run(
     serial: str,
     package_name: str,
@@ -169,29 +337,20 @@ def trigger_run(
     prompt_rel_path: str,
     dataset_rel_path: str,
     output_rel_path: str,
+    manifest_rel_path: str = "",
 ) -> None:
-    cmd = adb_cmd(
-        serial,
-        "shell",
-        "am",
-        "broadcast",
-        "-a",
-        ACTION_RUN,
-        "-n",
-        receiver_component,
-        "--es",
-        "run_id",
-        run_id,
-        "--es",
-        "prompt_rel_path",
-        prompt_rel_path,
-        "--es",
-        "dataset_rel_path",
-        dataset_rel_path,
-        "--es",
-        "output_rel_path",
-        output_rel_path,
-    )
+    extras = {
+        "run_id": run_id,
+        "prompt_rel_path": prompt_rel_path,
+        "dataset_rel_path": dataset_rel_path,
+        "output_rel_path": output_rel_path,
+        "manifest_rel_path": manifest_rel_path,
+    }
+    cmd = adb_cmd(serial, "shell", "am", "broadcast", "-a", ACTION_RUN, "-n", receiver_component)
+    # adb joins shell arguments, so an empty value would shift every following extra.
+    for key, value in extras.items():
+        if value:
+            cmd += ["--es", key, value]
     run(cmd, check=True)
 
 
@@ -201,6 +360,7 @@ def poll_status(
     status_rel_path: str,
     timeout_sec: int,
     poll_interval_sec: float,
+    since_ms: int = 0,
 ) -> dict:
     deadline = time.time() + timeout_sec
     while time.time() < deadline:
@@ -211,105 +371,1242 @@ def poll_status(
             except json.JSONDecodeError:
                 payload = {}
             state = str(payload.get("state", "")).lower()
-            if state in ("completed", "failed"):
+            started_at_ms = int(payload.get("started_at_ms") or payload.get("updated_at_ms") or 0)
+            if state in TERMINAL_STATES and started_at_ms >= since_ms:
                 return payload
         time.sleep(poll_interval_sec)
     raise TimeoutError(f"Timed out waiting for status file files/{status_rel_path}")
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Run prompt benchmark on Android device via adb.")
-    parser.add_argument("--prompt-file", default="")
-    parser.add_argument("--prompt-a-url", default=DEFAULT_PROMPT_A_URL)
-    parser.add_argument("--cases-file", required=True)
-    parser.add_argument("--serial", default="")
-    parser.add_argument("--package", default=DEFAULT_PACKAGE)
-    parser.add_argument("--receiver-component", default=DEFAULT_RECEIVER)
-    parser.add_argument("--run-id", default="")
-    parser.add_argument("--timeout-sec", type=int, default=900)
-    parser.add_argument("--poll-interval-sec", type=float, default=1.0)
-    parser.add_argument("--report-file", default=".cache/prompt_eval_android/report.txt")
-    parser.add_argument("--json-report-file", default=".cache/prompt_eval_android/report.json")
-    args = parser.parse_args()
+class StatusWatcher:
+    """Streams the app's status log lines (`adb logcat -s BenchmarkStatus`) for one run.
 
-    prompt_file = Path(args.prompt_file).resolve() if args.prompt_file else None
-    cases_file = Path(args.cases_file).resolve()
-    if prompt_file is not None and not prompt_file.exists():
-        raise FileNotFoundError(f"Prompt file not found: {prompt_file}")
-    if not cases_file.exists():
-        raise FileNotFoundError(f"Cases file not found: {cases_file}")
+    Start it before triggering the run so no line is missed. wait() returns as soon as
+    a terminal status for run_id is logged; if logcat is unavailable or goes quiet for
+    fallback_poll_sec, the status file is read once via run-as as a safety net. Lines
+    and status files from before since_ms (device clock) belong to an earlier run that
+    reused the run_id and are ignored.
+    """
 
-    serial = detect_device(args.serial.strip() or None)
-    ensure_package_installed(serial, args.package)
-    wake_app_process(serial, args.package)
+    def __init__(self, serial: str, package_name: str, run_id: str, status_rel_path: str, since_ms: int = 0) -> None:
+        self.serial = serial
+        self.package_name = package_name
+        self.run_id = run_id
+        self.status_rel_path = status_rel_path
+        self.since_ms = since_ms
+        self.latest: dict | None = None
+        self._events: queue.Queue[dict | None] = queue.Queue()
+        self._process: subprocess.Popen[str] | None = None
 
-    run_id = args.run_id.strip() or datetime.now().strftime("run_%Y%m%d_%H%M%S")
-    prompt_rel = f"{DEFAULT_RESULTS_DIR}/{run_id}.prompt.txt"
-    dataset_rel = f"{DEFAULT_RESULTS_DIR}/{run_id}.dataset.jsonl"
-    output_rel = f"{DEFAULT_RESULTS_DIR}/{run_id}.result.json"
-    status_rel = f"{DEFAULT_RESULTS_DIR}/{run_id}.status.json"
-    report_rel = f"{DEFAULT_RESULTS_DIR}/{run_id}.report.txt"
+    def start(self) -> None:
+        try:
+            self._process = subprocess.Popen(
+                adb_cmd(
+                    self.serial,
+                    "logcat",
+                    "-v",
+                    "raw",
+                    # Without -T logcat replays its whole buffer, earlier runs included.
+                    "-T",
+                    f"{self.since_ms // 1000}.000",
+                    "-s",
+                    f"{STATUS_LOG_TAG}:I",
+                ),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                bufsize=1,
+            )
+        except OSError:
+            self._process = None
+            return
+        threading.Thread(target=self._pump, daemon=True).start()
 
-    prompt_text = load_prompt_text(prompt_file) if prompt_file is not None else fetch_remote_prompt_text(args.prompt_a_url)
-    with tempfile.NamedTemporaryFile("w", encoding="utf-8", delete=False) as temp_prompt:
-        temp_prompt.write(prompt_text)
-        temp_prompt_path = Path(temp_prompt.name)
-    try:
-        upload_file_to_app(serial, args.package, temp_prompt_path, prompt_rel)
-    finally:
-        temp_prompt_path.unlink(missing_ok=True)
-    upload_file_to_app(serial, args.package, cases_file, dataset_rel)
-    trigger_run(
-        serial=serial,
-        package_name=args.package,
-        receiver_component=args.receiver_component,
-        run_id=run_id,
-        prompt_rel_path=prompt_rel,
-        dataset_rel_path=dataset_rel,
-        output_rel_path=output_rel,
+    def _pump(self) -> None:
+        assert self._process is not None and self._process.stdout is not None
+        for line in self._process.stdout:
+            try:
+                payload = json.loads(line.strip())
+            except json.JSONDecodeError:
+                continue
+            if isinstance(payload, dict) and self._is_current(payload):
+                self._events.put(payload)
+        self._events.put(None)
+
+    def _is_current(self, payload: dict) -> bool:
+        started_at_ms = int(payload.get("started_at_ms") or payload.get("updated_at_ms") or 0)
+        return payload.get("run_id") == self.run_id and started_at_ms >= self.since_ms
+
+    def _read_status_file(self) -> dict | None:
+        status_raw = read_file_from_app(self.serial, self.package_name, self.status_rel_path, check=False).strip()
+        if not status_raw:
+            return None
+        try:
+            payload = json.loads(status_raw)
+        except json.JSONDecodeError:
+            return None
+        return payload if isinstance(payload, dict) and self._is_current(payload) else None
+
+    def wait(self, timeout_sec: int, fallback_poll_sec: float) -> dict:
+        deadline = time.time() + timeout_sec
+        streaming = self._process is not None
+        while time.time() < deadline:
+            remaining = deadline - time.time()
+            payload: dict | None = None
+            if streaming:
+                try:
+                    payload = self._events.get(timeout=min(remaining, fallback_poll_sec))
+                    if payload is None:
+                        print("[WARN] logcat stream ended; falling back to polling", file=sys.stderr, flush=True)
+                        streaming = False
+                except queue.Empty:
+                    payload = None
+            else:
+                time.sleep(min(remaining, fallback_poll_sec))
+            if payload is None:
+                payload = self._read_status_file()
+            if payload is None:
+                continue
+            self.latest = payload
+            if str(payload.get("state", "")).lower() in TERMINAL_STATES:
+                return payload
+        raise TimeoutError(f"Timed out waiting for status of run {self.run_id} (files/{self.status_rel_path})")
+
+    def close(self) -> None:
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        self._process = None
+
+    def __enter__(self) -> StatusWatcher:
+        self.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
+class CaseProgressStream:
+    """Tails the device's per-case JSONL files over one long-lived `run-as ... tail -f`.
+
+    Prints throughput, ETA and running pass rate as cases land, and flags failed
+    inferences immediately instead of after the whole run. Batched runs write one
+    file per prompt in order; each is tailed once it appears.
+    """
+
+    def __init__(self, serial: str, package_name: str, cases_rel_paths: list[str], total_cases: int) -> None:
+        self.serial = serial
+        self.package_name = package_name
+        self.cases_rel_paths = cases_rel_paths
+        self.total_cases = total_cases
+        self._cases: list[dict] = []
+        self._lock = threading.Lock()
+        self._process: subprocess.Popen[str] | None = None
+        self._started_at = 0.0
+        self._last_print = 0.0
+
+    def start(self) -> None:
+        paths = " ".join(f"files/{rel_path}" for rel_path in self.cases_rel_paths)
+        shell_command = (
+            f"for p in {paths}; do while [ ! -f $p ]; do sleep 0.2; done; tail -n +1 -f $p & done; wait"
+        )
+        self._started_at = time.time()
+        self._process = subprocess.Popen(
+            adb_cmd(self.serial, "shell", f"run-as {self.package_name} sh -c '{shell_command}'"),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def _pump(self) -> None:
+        assert self._process is not None and self._process.stdout is not None
+        for line in self._process.stdout:
+            try:
+                case = json.loads(line.strip())
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(case, dict):
+                continue
+            with self._lock:
+                self._cases.append(case)
+                done = len(self._cases)
+                passed = sum(1 for row in self._cases if row.get("passed"))
+            if not case.get("success", True):
+                print(
+                    f"[{self.serial}] case {case.get('id')} failed: {case.get('error_type') or ''} {case.get('error') or ''}".rstrip(),
+                    file=sys.stderr,
+                    flush=True,
+                )
+            now = time.time()
+            if now - self._last_print >= 1.0 or done >= self.total_cases:
+                self._last_print = now
+                elapsed = max(now - self._started_at, 1e-6)
+                rate = done / elapsed
+                eta_sec = (self.total_cases - done) / rate if rate > 0 else 0.0
+                print(
+                    f"[{self.serial}] {done}/{self.total_cases} pass_rate={passed / done * 100.0:.1f}% "
+                    f"throughput={rate:.2f}/s eta={eta_sec:.0f}s",
+                    flush=True,
+                )
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return list(self._cases)
+
+    def close(self) -> None:
+        if self._process is not None and self._process.poll() is None:
+            # Stopping the local adb client does not reach the device, where the tails
+            # would keep running as the app user. "[f]iles" stops pkill matching itself.
+            kill_command = "; ".join(f'pkill -f "[f]iles/{rel_path}"' for rel_path in self.cases_rel_paths)
+            run(adb_cmd(self.serial, "shell", f"run-as {self.package_name} sh -c '{kill_command}'"), check=False)
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        self._process = None
+
+    def __enter__(self) -> CaseProgressStream:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
+TELEMETRY_SECTIONS = ("status", "thermal", "battery", "cpufreq", "meminfo", "cpuinfo")
+
+
+def telemetry_script(package_name: str, status_rel_path: str) -> str:
+    """One device shell script printing every telemetry source under an @@section marker."""
+    cpu_dir = "/sys/devices/system/cpu"
+    return "; ".join(
+        [
+            # The status file has no trailing newline; the bare echo keeps the next marker on its own line.
+            f"echo @@status; run-as {package_name} cat files/{status_rel_path} 2>/dev/null; echo",
+            "echo @@thermal; dumpsys thermalservice 2>/dev/null",
+            "echo @@battery; dumpsys battery 2>/dev/null",
+            "echo @@cpufreq; for c in " + cpu_dir + "/cpu[0-9]*; do "
+            "echo $(cat $c/cpufreq/scaling_cur_freq $c/cpufreq/scaling_max_freq $c/cpufreq/cpuinfo_max_freq 2>/dev/null); done",
+            f"echo @@meminfo; dumpsys meminfo {package_name} 2>/dev/null",
+            "echo @@cpuinfo; dumpsys cpuinfo 2>/dev/null",
+        ]
     )
 
-    status = poll_status(
+
+def parse_telemetry(raw: str, package_name: str) -> dict:
+    sections: dict[str, list[str]] = {name: [] for name in TELEMETRY_SECTIONS}
+    current: list[str] | None = None
+    for line in raw.splitlines():
+        if line.startswith("@@") and line[2:].strip() in sections:
+            current = sections[line[2:].strip()]
+        elif current is not None:
+            current.append(line)
+
+    snapshot: dict[str, Any] = {"host_time_ms": int(time.time() * 1000)}
+    try:
+        status = json.loads("\n".join(sections["status"]) or "{}")
+    except json.JSONDecodeError:
+        status = {}
+    if status.get("prompt_id"):
+        snapshot["prompt_id"] = status["prompt_id"]
+    if isinstance(status.get("progress"), dict):
+        snapshot["case_index"] = status["progress"].get("case_index")
+
+    temperatures: dict[str, float] = {}
+    for line in sections["thermal"]:
+        match = re.search(r"Thermal Status:\s*(\d+)", line)
+        if match:
+            snapshot["thermal_status"] = int(match.group(1))
+        match = re.search(r"mValue=([-\d.]+).*mName=([^,}]+)", line)
+        if match:
+            name = match.group(2).strip()
+            temperatures[name] = max(float(match.group(1)), temperatures.get(name, float("-inf")))
+    if temperatures:
+        snapshot["temperatures_c"] = temperatures
+
+    battery = {}
+    for line in sections["battery"]:
+        key, _, value = line.strip().partition(":")
+        battery[key.strip().lower()] = value.strip()
+    if battery.get("level", "").isdigit():
+        snapshot["battery_level"] = int(battery["level"])
+    if battery.get("temperature", "").lstrip("-").isdigit():
+        snapshot["battery_temp_c"] = int(battery["temperature"]) / 10.0
+    if battery:
+        snapshot["charging"] = any(battery.get(key) == "true" for key in ("ac powered", "usb powered", "wireless powered"))
+
+    cur_freqs: list[int] = []
+    max_freqs: list[int] = []
+    hw_max_freqs: list[int] = []
+    for line in sections["cpufreq"]:
+        values = [int(value) for value in line.split() if value.isdigit()]
+        if len(values) == 3:
+            cur_freqs.append(values[0])
+            max_freqs.append(values[1])
+            hw_max_freqs.append(values[2])
+    if cur_freqs:
+        snapshot["cpu_cur_freq_khz"] = cur_freqs
+        snapshot["cpu_max_freq_khz"] = max_freqs
+        snapshot["cpu_hw_max_freq_khz"] = hw_max_freqs
+
+    for line in sections["meminfo"]:
+        match = re.search(r"TOTAL(?: PSS)?:?\s+(\d+)", line)
+        if match:
+            snapshot["app_pss_kb"] = int(match.group(1))
+            break
+
+    for line in sections["cpuinfo"]:
+        match = re.search(r"Load:\s*([\d.]+)", line)
+        if match:
+            snapshot["load_avg_1m"] = float(match.group(1))
+        match = re.match(r"\s*([\d.]+)% (?:\d+/)?(\S+?):", line)
+        if match and match.group(2) == package_name:
+            snapshot["app_cpu_pct"] = float(match.group(1))
+        elif match and match.group(2) == "TOTAL":
+            snapshot["total_cpu_pct"] = float(match.group(1))
+    return snapshot
+
+
+def capture_telemetry(serial: str, package_name: str, status_rel_path: str) -> dict:
+    script = telemetry_script(package_name, status_rel_path)
+    result = run(adb_cmd(serial, "shell", f"sh -c '{script}'"), check=False)
+    return parse_telemetry(result.stdout, package_name)
+
+
+def summarize_telemetry(before: dict | None, samples: list[dict], after: dict | None) -> dict:
+    """Headline numbers for telling thermal throttling apart from prompt-driven slowdowns."""
+    snapshots = [snapshot for snapshot in [before, *samples, after] if snapshot]
+    summary: dict[str, Any] = {"samples": len(samples)}
+    thermal = [snapshot["thermal_status"] for snapshot in snapshots if "thermal_status" in snapshot]
+    if thermal:
+        summary["thermal_status_max"] = max(thermal)
+    temps = [max(snapshot["temperatures_c"].values()) for snapshot in snapshots if snapshot.get("temperatures_c")]
+    if temps:
+        summary["max_temp_c"] = max(temps)
+    for key in ("battery_temp_c", "battery_level"):
+        if before and key in before:
+            summary[f"{key}_before"] = before[key]
+        if after and key in after:
+            summary[f"{key}_after"] = after[key]
+    # scaling_max_freq drops below the hardware maximum while the kernel caps the clocks.
+    cap_ratios = [
+        sum(snapshot["cpu_max_freq_khz"]) / sum(snapshot["cpu_hw_max_freq_khz"])
+        for snapshot in snapshots
+        if snapshot.get("cpu_hw_max_freq_khz") and sum(snapshot["cpu_hw_max_freq_khz"]) > 0
+    ]
+    if cap_ratios:
+        summary["cpu_freq_cap_ratio_min"] = round(min(cap_ratios), 3)
+    pss = [snapshot["app_pss_kb"] for snapshot in snapshots if "app_pss_kb" in snapshot]
+    if pss:
+        summary["app_pss_kb_max"] = max(pss)
+    app_cpu = [snapshot["app_cpu_pct"] for snapshot in samples if "app_cpu_pct" in snapshot]
+    if app_cpu:
+        summary["app_cpu_pct_avg"] = round(sum(app_cpu) / len(app_cpu), 1)
+    summary["throttling_suspected"] = summary.get("thermal_status_max", 0) > 0 or summary.get(
+        "cpu_freq_cap_ratio_min", 1.0
+    ) < 0.95
+    return summary
+
+
+def telemetry_report_lines(summary: dict) -> list[str]:
+    return ["", "[telemetry]"] + [f"{key}: {value}" for key, value in summary.items()]
+
+
+class DeviceTelemetry:
+    """Snapshots device health before, during (every interval_sec) and after a run.
+
+    Each snapshot is one adb shell round trip covering thermal status, battery,
+    CPU frequencies, the app's memory and CPU load, and the run's status file so
+    samples from batched runs can be attributed to the prompt being evaluated.
+    """
+
+    def __init__(self, serial: str, package_name: str, status_rel_path: str, interval_sec: float, enabled: bool = True) -> None:
+        self.serial = serial
+        self.package_name = package_name
+        self.status_rel_path = status_rel_path
+        self.interval_sec = interval_sec
+        self.enabled = enabled
+        self.before: dict | None = None
+        self.after: dict | None = None
+        self._samples: list[dict] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _capture(self) -> dict | None:
+        try:
+            return capture_telemetry(self.serial, self.package_name, self.status_rel_path)
+        except OSError:
+            return None
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        self.before = self._capture()
+        if self.interval_sec > 0:
+            self._thread = threading.Thread(target=self._sample_loop, daemon=True)
+            self._thread.start()
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            snapshot = self._capture()
+            if snapshot is not None:
+                with self._lock:
+                    self._samples.append(snapshot)
+
+    def finish(self) -> None:
+        """Stops sampling and takes the after snapshot; safe to call more than once."""
+        if not self.enabled or self._stop.is_set():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_sec + 30)
+        self.after = self._capture()
+
+    def payload(self, prompt_id: str | None = None) -> dict | None:
+        """Telemetry for the report; with prompt_id, only samples taken while that prompt ran."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            samples = [
+                sample for sample in self._samples if prompt_id is None or sample.get("prompt_id") == prompt_id
+            ]
+        return {
+            "interval_sec": self.interval_sec,
+            "before": self.before,
+            "samples": samples,
+            "after": self.after,
+            # Per-prompt summaries leave out the session-wide before/after snapshots.
+            "summary": summarize_telemetry(
+                self.before if prompt_id is None else None,
+                samples,
+                self.after if prompt_id is None else None,
+            ),
+        }
+
+    def __enter__(self) -> DeviceTelemetry:
+        self.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.finish()
+
+
+@dataclass
+class DeviceRunOptions:
+    package: str = DEFAULT_PACKAGE
+    receiver_component: str = DEFAULT_RECEIVER
+    timeout_sec: int = 900
+    completion: str = "logcat"
+    poll_interval_sec: float = 1.0
+    fallback_poll_sec: float = 30.0
+    compress_transfers: bool = False
+    keep_runs: int = 20
+    gc_max_age_days: int = 14
+    telemetry: bool = True
+    telemetry_interval_sec: float = 15.0
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> DeviceRunOptions:
+        return cls(
+            package=args.package,
+            receiver_component=args.receiver_component,
+            timeout_sec=args.timeout_sec,
+            completion=args.completion,
+            poll_interval_sec=args.poll_interval_sec,
+            fallback_poll_sec=args.fallback_poll_sec,
+            compress_transfers=args.compress_transfers,
+            keep_runs=args.keep_runs,
+            gc_max_age_days=args.gc_max_age_days,
+            telemetry=not args.no_telemetry,
+            telemetry_interval_sec=args.telemetry_interval_sec,
+        )
+
+    def cli_args(self) -> list[str]:
+        """The add_device_run_args flags reproducing these options in a child prompt_eval_android.py."""
+        args = [
+            "--package",
+            self.package,
+            "--receiver-component",
+            self.receiver_component,
+            "--timeout-sec",
+            str(self.timeout_sec),
+            "--completion",
+            self.completion,
+            "--poll-interval-sec",
+            str(self.poll_interval_sec),
+            "--fallback-poll-sec",
+            str(self.fallback_poll_sec),
+            "--keep-runs",
+            str(self.keep_runs),
+            "--gc-max-age-days",
+            str(self.gc_max_age_days),
+            "--telemetry-interval-sec",
+            str(self.telemetry_interval_sec),
+        ]
+        if self.compress_transfers:
+            args.append("--compress-transfers")
+        if not self.telemetry:
+            args.append("--no-telemetry")
+        return args
+
+
+def device_time_ms(serial: str) -> int:
+    """Device wall clock, floored to the second (`date +%s` is all toybox guarantees)."""
+    return int(run(adb_cmd(serial, "shell", "date", "+%s"), check=True).stdout.strip()) * 1000
+
+
+def clear_run_files(serial: str, package_name: str, rel_paths: list[str]) -> None:
+    """Removes a reused run_id's old status, result and case files so none is mistaken for this run's."""
+    quoted = " ".join(f'"files/{rel_path}"' for rel_path in rel_paths)
+    run_as_shell(serial, package_name, f"rm -f {quoted}")
+
+
+def trigger_and_wait(
+    options: DeviceRunOptions,
+    serial: str,
+    run_id: str,
+    prompt_rel: str,
+    dataset_rel: str,
+    output_rel: str,
+    status_rel: str,
+    on_triggered: Callable[[], None],
+    manifest_rel: str = "",
+) -> dict:
+    since_ms = device_time_ms(serial)
+
+    def trigger() -> None:
+        trigger_run(
+            serial=serial,
+            package_name=options.package,
+            receiver_component=options.receiver_component,
+            run_id=run_id,
+            prompt_rel_path=prompt_rel,
+            dataset_rel_path=dataset_rel,
+            output_rel_path=output_rel,
+            manifest_rel_path=manifest_rel,
+        )
+        on_triggered()
+
+    if options.completion == "logcat":
+        with StatusWatcher(serial, options.package, run_id, status_rel, since_ms=since_ms) as watcher:
+            trigger()
+            return watcher.wait(timeout_sec=options.timeout_sec, fallback_poll_sec=options.fallback_poll_sec)
+    trigger()
+    return poll_status(
         serial=serial,
-        package_name=args.package,
+        package_name=options.package,
         status_rel_path=status_rel,
-        timeout_sec=args.timeout_sec,
-        poll_interval_sec=args.poll_interval_sec,
+        timeout_sec=options.timeout_sec,
+        poll_interval_sec=options.poll_interval_sec,
+        since_ms=since_ms,
     )
+
+
+def save_partial_results(
+    serial: str,
+    package_name: str,
+    run_id: str,
+    cases_rel_path: str,
+    output_path: Path,
+    streamed_cases: list[dict],
+    status: dict | None,
+    telemetry: dict | None = None,
+) -> None:
+    """Writes whatever cases finished before a failure or timeout, re-read in full if possible."""
+    cases = streamed_cases
+    raw = read_file_from_app(serial, package_name, cases_rel_path, check=False)
+    reread: list[dict] = []
+    for line in raw.splitlines():
+        try:
+            reread.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    if len(reread) > len(cases):
+        cases = reread
+    pass_count = sum(1 for case in cases if case.get("passed"))
+    payload = {
+        "run_id": run_id,
+        "partial": True,
+        "status": status,
+        "summary": {
+            "completed_cases": len(cases),
+            "pass_count": pass_count,
+            "fail_count": len(cases) - pass_count,
+            "pass_rate": pass_count / len(cases) * 100.0 if cases else 0.0,
+            "avg_latency_ms": int(sum(int(case.get("latency_ms", 0)) for case in cases) / len(cases)) if cases else 0,
+        },
+        "cases": cases,
+    }
+    if telemetry is not None:
+        payload["telemetry"] = telemetry
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(f"Partial results ({len(cases)} cases): {output_path}", file=sys.stderr)
+
+
+@dataclass
+class DeviceRun:
+    serial: str
+    result: dict
+    report_text: str
+
+
+def prepare_device(options: DeviceRunOptions, serial: str) -> None:
+    ensure_package_installed(serial, options.package)
+    wake_app_process(serial, options.package)
+    gc_device(options, serial)
+
+
+def gc_device(options: DeviceRunOptions, serial: str) -> None:
+    """Keeps the newest keep_runs runs in benchmark_runs and drops anything older than gc_max_age_days.
+
+    Content-addressed files are touched whenever a run uses them, so only artifacts
+    unused for gc_max_age_days are collected.
+    """
+    steps: list[str] = []
+    if options.keep_runs > 0:
+        steps.append(
+            f"if cd files/{DEFAULT_RESULTS_DIR} 2>/dev/null; then "
+            f"ls -t *.status.json 2>/dev/null | tail -n +{options.keep_runs + 1} | "
+            "while read f; do rm -f \"${f%.status.json}\".*; done; cd ../..; fi"
+        )
+    if options.gc_max_age_days > 0:
+        for directory in (DEFAULT_RESULTS_DIR, CAS_DIR):
+            steps.append(
+                f"[ ! -d files/{directory} ] || find files/{directory} -type f "
+                f"-mtime +{options.gc_max_age_days} -exec rm -f {{}} +"
+            )
+    if steps:
+        run_as_shell(serial, options.package, "; ".join(steps))
+
+
+def encode_dataset(dataset_lines: list[str]) -> bytes:
+    return "".join(line + "\n" for line in dataset_lines).encode("utf-8")
+
+
+def cas_rel_path(content: bytes, suffix: str) -> str:
+    return f"{CAS_DIR}/{hashlib.sha256(content).hexdigest()}{suffix}"
+
+
+def cas_present(serial: str, package_name: str, sizes: dict[str, int]) -> set[str]:
+    """Which rel paths already exist on the device with the expected size; touches them for GC."""
+    quoted = " ".join(f'"{rel_path}"' for rel_path in sizes)
+    shell_command = (
+        f"cd files && for f in {quoted}; do "
+        "[ -f \"$f\" ] && touch \"$f\" && echo \"$f $(wc -c < \"$f\")\"; done; true"
+    )
+    result = run(adb_cmd(serial, "shell", f"run-as {package_name} sh -c '{shell_command}'"), check=False)
+    present: set[str] = set()
+    for line in result.stdout.splitlines():
+        rel_path, _, size = line.strip().rpartition(" ")
+        if rel_path in sizes and size.strip() == str(sizes[rel_path]):
+            present.add(rel_path)
+    return present
+
+
+def stage_cas_files(
+    options: DeviceRunOptions,
+    serial: str,
+    artifacts: list[tuple[bytes, str]],
+    extra_files: dict[str, bytes] | None = None,
+) -> list[str]:
+    """Puts each (content, suffix) into the device's content-addressed store; returns the rel paths.
+
+    One round trip checks what is already there; only missing artifacts are uploaded,
+    in the same tar as any run-specific extra_files.
+    """
+    rel_paths = [cas_rel_path(content, suffix) for content, suffix in artifacts]
+    contents = dict(zip(rel_paths, (content for content, _ in artifacts)))
+    present = cas_present(serial, options.package, {rel_path: len(content) for rel_path, content in contents.items()})
+    missing = {rel_path: content for rel_path, content in contents.items() if rel_path not in present}
+    missing.update(extra_files or {})
+    if missing:
+        push_files_to_app(serial, options.package, missing, compress=options.compress_transfers)
+    return rel_paths
+
+
+def upload_dataset(options: DeviceRunOptions, serial: str, dataset_lines: list[str]) -> str:
+    """Stages a dataset in the device's content-addressed store so runs can share it."""
+    return stage_cas_files(options, serial, [(encode_dataset(dataset_lines), ".jsonl")])[0]
+
+
+def run_on_device(
+    options: DeviceRunOptions,
+    serial: str,
+    run_id: str,
+    prompt_text: str,
+    dataset_lines: list[str],
+    partial_report_file: Path,
+    dataset_rel: str | None = None,
+) -> DeviceRun:
+    """Uploads, triggers, waits for and downloads one benchmark run on a prepared device.
+
+    Pass dataset_rel from upload_dataset() to reuse a dataset already on the device.
+    """
+    output_rel = f"{DEFAULT_RESULTS_DIR}/{run_id}.result.json"
+    status_rel = f"{DEFAULT_RESULTS_DIR}/{run_id}.status.json"
+    report_rel = f"{DEFAULT_RESULTS_DIR}/{run_id}.report.txt"
+    cases_rel = f"{DEFAULT_RESULTS_DIR}/{run_id}.cases.jsonl"
+
+    artifacts = [(prompt_text.encode("utf-8"), ".txt")]
+    if dataset_rel is None:
+        artifacts.append((encode_dataset(dataset_lines), ".jsonl"))
+        prompt_rel, dataset_rel = stage_cas_files(options, serial, artifacts)
+    else:
+        (prompt_rel,) = stage_cas_files(options, serial, artifacts)
+    clear_run_files(serial, options.package, [status_rel, output_rel, report_rel, cases_rel])
+    telemetry = DeviceTelemetry(
+        serial, options.package, status_rel, options.telemetry_interval_sec, enabled=options.telemetry
+    )
+    with telemetry, CaseProgressStream(serial, options.package, [cases_rel], len(dataset_lines)) as progress:
+        try:
+            status = trigger_and_wait(
+                options,
+                serial=serial,
+                run_id=run_id,
+                prompt_rel=prompt_rel,
+                dataset_rel=dataset_rel,
+                output_rel=output_rel,
+                status_rel=status_rel,
+                on_triggered=progress.start,
+            )
+        except TimeoutError:
+            telemetry.finish()
+            save_partial_results(
+                serial,
+                options.package,
+                run_id,
+                cases_rel,
+                partial_report_file,
+                progress.snapshot(),
+                None,
+                telemetry.payload(),
+            )
+            raise
     state = str(status.get("state", "")).lower()
     if state != "completed":
         err = status.get("error", "unknown")
-        raise RuntimeError(f"Benchmark failed on device state={state} error={err}")
+        save_partial_results(
+            serial,
+            options.package,
+            run_id,
+            cases_rel,
+            partial_report_file,
+            progress.snapshot(),
+            status,
+            telemetry.payload(),
+        )
+        raise RuntimeError(f"Benchmark failed on device {serial} state={state} error={err}")
 
-    result_raw = read_file_from_app(serial, args.package, output_rel, check=True)
-    result_json = json.loads(result_raw)
-    report_text = read_file_from_app(serial, args.package, report_rel, check=False)
+    pulled = pull_files_from_app(serial, options.package, [output_rel, report_rel], compress=options.compress_transfers)
+    if output_rel not in pulled:
+        raise RuntimeError(f"Result file missing on device {serial}: files/{output_rel}")
+    return device_run_with_telemetry(
+        serial,
+        json.loads(pulled[output_rel].decode("utf-8")),
+        pulled.get(report_rel, b"").decode("utf-8"),
+        telemetry.payload(),
+    )
 
-    report_file = Path(args.report_file).resolve()
-    json_report_file = Path(args.json_report_file).resolve()
+
+def device_run_with_telemetry(serial: str, result: dict, report_text: str, telemetry: dict | None) -> DeviceRun:
+    if telemetry is not None:
+        result["telemetry"] = telemetry
+        report_text = report_text.rstrip("\n") + "\n" + "\n".join(telemetry_report_lines(telemetry["summary"])) + "\n"
+    return DeviceRun(serial=serial, result=result, report_text=report_text)
+
+
+def batch_prompt_paths(run_id: str, prompt_id: str) -> dict[str, str]:
+    """Per-prompt output files of a batched run (the service's manifest defaults)."""
+    prefix = f"{DEFAULT_RESULTS_DIR}/{run_id}.{prompt_id}"
+    return {
+        "output_rel_path": f"{prefix}.result.json",
+        "report_rel_path": f"{prefix}.report.txt",
+        "cases_rel_path": f"{prefix}.cases.jsonl",
+    }
+
+
+def run_batch_on_device(
+    options: DeviceRunOptions,
+    serial: str,
+    run_id: str,
+    prompts: list[PromptVariant],
+    dataset_lines: list[str],
+    report_base: Path,
+) -> dict[str, DeviceRun]:
+    """Evaluates several prompts in one broadcast so the device loads the model once.
+
+    The prompts go out as a manifest; results come back keyed by prompt_id. On failure,
+    finished cases are saved to <report_base stem>.<prompt_id>.partial.json.
+    """
+    status_rel = f"{DEFAULT_RESULTS_DIR}/{run_id}.status.json"
+    manifest_rel = f"{DEFAULT_RESULTS_DIR}/{run_id}.manifest.json"
+    dataset_content = encode_dataset(dataset_lines)
+    paths = {prompt.prompt_id: batch_prompt_paths(run_id, prompt.prompt_id) for prompt in prompts}
+    manifest = {
+        "prompts": [
+            {
+                "prompt_id": prompt.prompt_id,
+                "prompt_rel_path": cas_rel_path(prompt.text.encode("utf-8"), ".txt"),
+                **paths[prompt.prompt_id],
+            }
+            for prompt in prompts
+        ]
+    }
+    staged = stage_cas_files(
+        options,
+        serial,
+        [(prompt.text.encode("utf-8"), ".txt") for prompt in prompts] + [(dataset_content, ".jsonl")],
+        extra_files={manifest_rel: json.dumps(manifest, indent=2).encode("utf-8")},
+    )
+    dataset_rel = staged[-1]
+    cases_rels = [paths[prompt.prompt_id]["cases_rel_path"] for prompt in prompts]
+
+    def save_partials(status: dict | None) -> None:
+        started = int((status or {}).get("prompt_index", len(prompts)))
+        for prompt in prompts[:started]:
+            save_partial_results(
+                serial,
+                options.package,
+                run_id,
+                paths[prompt.prompt_id]["cases_rel_path"],
+                report_base.with_name(f"{report_base.stem}.{prompt.prompt_id}.partial.json"),
+                [],
+                status,
+                telemetry.payload(prompt.prompt_id),
+            )
+
+    clear_run_files(
+        serial,
+        options.package,
+        [status_rel] + [rel_path for prompt_paths in paths.values() for rel_path in prompt_paths.values()],
+    )
+    telemetry = DeviceTelemetry(
+        serial, options.package, status_rel, options.telemetry_interval_sec, enabled=options.telemetry
+    )
+    total_cases = len(dataset_lines) * len(prompts)
+    with telemetry, CaseProgressStream(serial, options.package, cases_rels, total_cases) as progress:
+        try:
+            status = trigger_and_wait(
+                options,
+                serial=serial,
+                run_id=run_id,
+                prompt_rel="",
+                dataset_rel=dataset_rel,
+                output_rel="",
+                status_rel=status_rel,
+                on_triggered=progress.start,
+                manifest_rel=manifest_rel,
+            )
+        except TimeoutError:
+            telemetry.finish()
+            save_partials(None)
+            raise
+    state = str(status.get("state", "")).lower()
+    if state != "completed":
+        save_partials(status)
+        raise RuntimeError(
+            f"Benchmark failed on device {serial} state={state} "
+            f"prompt={status.get('prompt_id', '?')} error={status.get('error', 'unknown')}"
+        )
+
+    wanted = [
+        rel_path
+        for prompt in prompts
+        for rel_path in (paths[prompt.prompt_id]["output_rel_path"], paths[prompt.prompt_id]["report_rel_path"])
+    ]
+    pulled = pull_files_from_app(serial, options.package, wanted, compress=options.compress_transfers)
+    runs: dict[str, DeviceRun] = {}
+    for prompt in prompts:
+        output_rel = paths[prompt.prompt_id]["output_rel_path"]
+        if output_rel not in pulled:
+            raise RuntimeError(f"Result file missing on device {serial}: files/{output_rel}")
+        runs[prompt.prompt_id] = device_run_with_telemetry(
+            serial,
+            json.loads(pulled[output_rel].decode("utf-8")),
+            pulled.get(paths[prompt.prompt_id]["report_rel_path"], b"").decode("utf-8"),
+            telemetry.payload(prompt.prompt_id),
+        )
+    return runs
+
+
+def prepare_and_run_on_device(options: DeviceRunOptions, serial: str, **kwargs: Any) -> DeviceRun:
+    prepare_device(options, serial)
+    return run_on_device(options, serial, **kwargs)
+
+
+def prepare_and_run_batch_on_device(options: DeviceRunOptions, serial: str, **kwargs: Any) -> dict[str, DeviceRun]:
+    prepare_device(options, serial)
+    return run_batch_on_device(options, serial, **kwargs)
+
+
+def add_latency_stats(result_json: dict) -> list[str]:
+    """Adds latency percentiles, a histogram and per-category stats to the summary; returns report lines."""
+    cases = result_json.get("cases", [])
+    overall = latency_stats([int(case.get("latency_ms", 0) or 0) for case in cases])
+    grouped: dict[str, list[int]] = {}
+    for case in cases:
+        category = case.get("category") or infer_category(str(case.get("input", "")), str(case.get("expected", "")))
+        grouped.setdefault(category, []).append(int(case.get("latency_ms", 0) or 0))
+    by_category = {category: latency_stats(grouped[category]) for category in sorted(grouped)}
+
+    summary = result_json.setdefault("summary", {})
+    summary.update(
+        {
+            "p50_latency_ms": overall["p50_ms"],
+            "p90_latency_ms": overall["p90_ms"],
+            "p99_latency_ms": overall["p99_ms"],
+            "max_latency_ms": overall["max_ms"],
+            "stddev_latency_ms": overall["stddev_ms"],
+            "latency_histogram": overall["histogram"],
+            "latency_by_category": by_category,
+        }
+    )
+    lines = [
+        "",
+        "[latency]",
+        f"p50={overall['p50_ms']} p90={overall['p90_ms']} p99={overall['p99_ms']} "
+        f"max={overall['max_ms']} stddev={overall['stddev_ms']}",
+        "histogram_ms: " + " ".join(f"{bucket}={count}" for bucket, count in overall["histogram"].items()),
+    ]
+    for category, stats in by_category.items():
+        lines.append(
+            f"{category}: n={stats['count']} p50={stats['p50_ms']} p90={stats['p90_ms']} "
+            f"p99={stats['p99_ms']} max={stats['max_ms']}"
+        )
+    return lines
+
+
+def write_device_reports(result_json: dict, report_text: str, report_file: Path, json_report_file: Path) -> None:
     report_file.parent.mkdir(parents=True, exist_ok=True)
     json_report_file.parent.mkdir(parents=True, exist_ok=True)
+    latency_lines = add_latency_stats(result_json)
     if report_text.strip():
-        report_file.write_text(report_text, encoding="utf-8")
+        report_file.write_text(report_text.rstrip("\n") + "\n" + "\n".join(latency_lines) + "\n", encoding="utf-8")
     else:
         report_file.write_text(json.dumps(result_json, indent=2), encoding="utf-8")
     json_report_file.write_text(json.dumps(result_json, indent=2), encoding="utf-8")
 
     summary = result_json.get("summary", {})
-    pass_count = int(summary.get("pass_count", 0))
-    fail_count = int(summary.get("fail_count", 0))
-    total_cases = int(summary.get("total_cases", pass_count + fail_count))
-    pass_rate = float(summary.get("pass_rate", 0.0))
-    avg_latency_ms = int(summary.get("avg_latency_ms", 0))
-    if total_cases > 0 and avg_latency_ms == 0:
+    total_cases = int(summary.get("total_cases", 0))
+    if total_cases > 0 and int(summary.get("avg_latency_ms", 0)) == 0:
         raise RuntimeError(
             "Suspicious benchmark result: avg_latency_ms is 0. "
             "This usually indicates a no-op path instead of real inference."
         )
+
+
+def resolve_serials(spec: str) -> list[str]:
+    connected = list_devices()
+    if spec.strip() == "all":
+        if not connected:
+            raise RuntimeError("No connected Android devices.")
+        return connected
+    serials = [serial.strip() for serial in spec.split(",") if serial.strip()]
+    missing = [serial for serial in serials if serial not in connected]
+    if missing:
+        raise RuntimeError(f"Device serials not found/ready: {missing}. connected={connected}")
+    if len(set(serials)) != len(serials):
+        raise RuntimeError(f"Duplicate serials in --serials: {serials}")
+    return serials
+
+
+def read_dataset_lines(cases_file: Path) -> list[str]:
+    return [
+        line.strip()
+        for line in cases_file.read_text(encoding="utf-8").splitlines()
+        if line.strip() and not line.strip().startswith("#")
+    ]
+
+
+def shard_lines(lines: list[str], shard_count: int) -> list[list[str]]:
+    """Round-robin shards, so an ordered dataset spreads every category across devices."""
+    return [lines[index::shard_count] for index in range(shard_count)]
+
+
+def fan_out(serials: list[str], task: Callable[[str], T]) -> list[T]:
+    """Runs task(serial) on every device concurrently; results come back in serials order."""
+    results: dict[str, T] = {}
+    errors: list[str] = []
+    with ThreadPoolExecutor(max_workers=len(serials)) as pool:
+        futures = {pool.submit(task, serial): serial for serial in serials}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as exc:  # noqa: BLE001
+                errors.append(f"{futures[future]}: {exc}")
+    if errors:
+        raise RuntimeError("Benchmark failed on devices:\n" + "\n".join(errors))
+    return [results[serial] for serial in serials]
+
+
+def merge_device_results(run_id: str, device_runs: list[DeviceRun]) -> dict:
+    """One result JSON over all shards: cases back in dataset order plus a per-device breakdown."""
+    shard_count = len(device_runs)
+    merged_cases: list[tuple[int, dict]] = []
+    devices: list[dict] = []
+    for shard_index, device_run in enumerate(device_runs):
+        cases = device_run.result.get("cases", [])
+        for case_index, case in enumerate(cases):
+            merged_cases.append((shard_index + case_index * shard_count, {**case, "serial": device_run.serial}))
+        stats = latency_stats([int(case.get("latency_ms", 0) or 0) for case in cases])
+        pass_count = sum(1 for case in cases if case.get("passed"))
+        elapsed_ms = int(device_run.result.get("summary", {}).get("total_elapsed_ms", 0))
+        devices.append(
+            {
+                "serial": device_run.serial,
+                "model_id": device_run.result.get("model_id"),
+                "total_cases": len(cases),
+                "pass_count": pass_count,
+                "pass_rate": pass_count / len(cases) * 100.0 if cases else 0.0,
+                "avg_latency_ms": stats["avg_ms"],
+                "p50_latency_ms": stats["p50_ms"],
+                "p90_latency_ms": stats["p90_ms"],
+                "p99_latency_ms": stats["p99_ms"],
+                "max_latency_ms": stats["max_ms"],
+                "stddev_latency_ms": stats["stddev_ms"],
+                "total_elapsed_ms": elapsed_ms,
+                "throughput_cases_per_sec": round(len(cases) / (elapsed_ms / 1000.0), 3) if elapsed_ms > 0 else 0.0,
+            }
+        )
+        if "telemetry" in device_run.result:
+            devices[-1]["telemetry"] = device_run.result["telemetry"]
+    merged_cases.sort(key=lambda item: item[0])
+    cases = [case for _, case in merged_cases]
+    pass_count = sum(1 for case in cases if case.get("passed"))
+    latencies = [int(case.get("latency_ms", 0)) for case in cases]
+    first = device_runs[0].result
+    return {
+        "run_id": run_id,
+        "suite_version": first.get("suite_version"),
+        "model_id": first.get("model_id"),
+        "timestamp_ms": first.get("timestamp_ms"),
+        "prompt_file": first.get("prompt_file"),
+        "prompt_instructions": first.get("prompt_instructions"),
+        "runtime_config": first.get("runtime_config"),
+        "summary": {
+            "total_cases": len(cases),
+            "pass_count": pass_count,
+            "fail_count": len(cases) - pass_count,
+            "pass_rate": pass_count / len(cases) * 100.0 if cases else 0.0,
+            # Shards run concurrently, so the run takes as long as the slowest device.
+            "total_elapsed_ms": max((device["total_elapsed_ms"] for device in devices), default=0),
+            "avg_latency_ms": int(sum(latencies) / len(latencies)) if latencies else 0,
+        },
+        "devices": devices,
+        "cases": cases,
+    }
+
+
+def merged_report_text(result_json: dict, device_runs: list[DeviceRun]) -> str:
+    summary = result_json["summary"]
+    lines = [
+        "MULTI-DEVICE PROMPT EVAL REPORT",
+        f"run_id: {result_json['run_id']}",
+        f"devices: {len(device_runs)}",
+        f"total_cases: {summary['total_cases']}",
+        f"pass_count: {summary['pass_count']}",
+        f"fail_count: {summary['fail_count']}",
+        f"pass_rate: {summary['pass_rate']:.2f}%",
+        f"avg_latency_ms: {summary['avg_latency_ms']}",
+        f"total_elapsed_ms: {summary['total_elapsed_ms']}",
+        "",
+        "[per_device]",
+    ]
+    for device in result_json["devices"]:
+        lines.append(
+            f"{device['serial']}: cases={device['total_cases']} pass_rate={device['pass_rate']:.2f}% "
+            f"avg_ms={device['avg_latency_ms']} p50_ms={device['p50_latency_ms']} "
+            f"p90_ms={device['p90_latency_ms']} p99_ms={device['p99_latency_ms']} max_ms={device['max_latency_ms']} "
+            f"stddev_ms={device['stddev_latency_ms']} elapsed_ms={device['total_elapsed_ms']} throughput={device['throughput_cases_per_sec']:.3f}/s"
+        )
+    for device_run in device_runs:
+        lines += ["", f"=== {device_run.serial} ===", device_run.report_text.rstrip()]
+    return "\n".join(lines) + "\n"
+
+
+def run_batch(
+    options: DeviceRunOptions,
+    serials: list[str],
+    run_id: str,
+    prompts: list[PromptVariant],
+    dataset_lines: list[str],
+    report_file: Path,
+    json_report_file: Path,
+) -> int:
+    """Runs every prompt in one session per device and writes one report pair per prompt.
+
+    The main report files get a ranking of the prompts by pass rate.
+    """
+    shards = shard_lines(dataset_lines, len(serials)) if len(serials) > 1 else [dataset_lines]
+    shard_by_serial = dict(zip(serials, shards))
+    print(f"Batching {len(prompts)} prompts over {len(dataset_lines)} cases on {', '.join(serials)}", flush=True)
+    runs_by_serial = fan_out(
+        serials,
+        lambda serial: prepare_and_run_batch_on_device(
+            options,
+            serial=serial,
+            run_id=run_id,
+            prompts=prompts,
+            dataset_lines=shard_by_serial[serial],
+            report_base=json_report_file if len(serials) == 1 else json_report_file.with_name(
+                f"{json_report_file.stem}.{serial}{json_report_file.suffix}"
+            ),
+        ),
+    )
+
+    entries: list[dict] = []
+    for prompt in prompts:
+        device_runs = [runs[prompt.prompt_id] for runs in runs_by_serial]
+        if len(device_runs) == 1:
+            result_json = device_runs[0].result
+            report_text = device_runs[0].report_text
+        else:
+            result_json = merge_device_results(run_id, device_runs)
+            report_text = merged_report_text(result_json, device_runs)
+        result_json = {**result_json, "prompt_id": prompt.prompt_id, "prompt_source": prompt.source}
+        prompt_report_file = report_file.with_name(f"{report_file.stem}.{prompt.prompt_id}{report_file.suffix}")
+        prompt_json_file = json_report_file.with_name(f"{json_report_file.stem}.{prompt.prompt_id}{json_report_file.suffix}")
+        write_device_reports(result_json, report_text, prompt_report_file, prompt_json_file)
+        entries.append(
+            {
+                "prompt_id": prompt.prompt_id,
+                "prompt_source": prompt.source,
+                "summary": result_json.get("summary", {}),
+                "report_file": str(prompt_report_file),
+                "json_report_file": str(prompt_json_file),
+            }
+        )
+
+    ranked = sorted(entries, key=lambda entry: -float(entry["summary"].get("pass_rate", 0.0)))
+    lines = [
+        "BATCHED PROMPT EVAL REPORT",
+        f"run_id: {run_id}",
+        f"devices: {', '.join(serials)}",
+        f"prompts: {len(prompts)}",
+        f"cases_per_prompt: {len(dataset_lines)}",
+        "",
+    ]
+    for rank, entry in enumerate(ranked, start=1):
+        summary = entry["summary"]
+        lines.append(
+            f"{rank}. {entry['prompt_id']}: pass_rate={float(summary.get('pass_rate', 0.0)):.2f}% "
+            f"pass={summary.get('pass_count', 0)}/{summary.get('total_cases', 0)} "
+            f"avg_latency_ms={summary.get('avg_latency_ms', 0)} source={entry['prompt_source']}"
+        )
+    report_text = "\n".join(lines) + "\n"
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+    json_report_file.parent.mkdir(parents=True, exist_ok=True)
+    report_file.write_text(report_text, encoding="utf-8")
+    json_report_file.write_text(
+        json.dumps({"run_id": run_id, "batch": True, "serials": serials, "prompts": entries}, indent=2),
+        encoding="utf-8",
+    )
+    print(report_text, end="")
+    print(f"Text report: {report_file}")
+    print(f"JSON report: {json_report_file}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run prompt benchmark on Android device via adb.")
+    parser.add_argument(
+        "--prompt-file",
+        action="append",
+        default=[],
+        help="Prompt file or directory of *.json/*.txt prompts; repeat it to evaluate several prompts in one device session.",
+    )
+    parser.add_argument("--prompt-a-url", default=DEFAULT_PROMPT_A_URL)
+    add_prompt_fetch_args(parser)
+    parser.add_argument("--cases-file", required=True)
+    parser.add_argument("--serial", default="")
+    parser.add_argument(
+        "--serials",
+        default="",
+        help="all | a,b,c: shard the dataset across these devices and run them concurrently.",
+    )
+    parser.add_argument("--run-id", default="")
+    add_device_run_args(parser)
+    parser.add_argument("--report-file", default=".cache/prompt_eval_android/report.txt")
+    parser.add_argument("--json-report-file", default=".cache/prompt_eval_android/report.json")
+    args = parser.parse_args()
+
+    prompt_variants = load_prompt_variants(args.prompt_file)
+    cases_file = Path(args.cases_file).resolve()
+    if not cases_file.exists():
+        raise FileNotFoundError(f"Cases file not found: {cases_file}")
+
+    if args.serials.strip():
+        serials = resolve_serials(args.serials)
+    else:
+        serials = [detect_device(args.serial.strip() or None)]
+
+    run_id = args.run_id.strip() or datetime.now().strftime("run_%Y%m%d_%H%M%S")
+    dataset_lines = read_dataset_lines(cases_file)
+    json_report_file = Path(args.json_report_file).resolve()
+    report_file = Path(args.report_file).resolve()
+
+    options = DeviceRunOptions.from_args(args)
+    if len(prompt_variants) > 1:
+        return run_batch(options, serials, run_id, prompt_variants, dataset_lines, report_file, json_report_file)
+
+    prompt_text = prompt_variants[0].text if prompt_variants else fetch_remote_prompt_text(
+        args.prompt_a_url, prompt_fetcher_from_args(args)
+    )
+    if len(serials) == 1:
+        device_run = prepare_and_run_on_device(
+            options,
+            serial=serials[0],
+            run_id=run_id,
+            prompt_text=prompt_text,
+            dataset_lines=dataset_lines,
+            partial_report_file=json_report_file.with_suffix(".partial.json"),
+        )
+        result_json = device_run.result
+        report_text = device_run.report_text
+    else:
+        shards = shard_lines(dataset_lines, len(serials))
+        print(f"Sharding {len(dataset_lines)} cases across {len(serials)} devices: {', '.join(serials)}", flush=True)
+        shard_by_serial = dict(zip(serials, shards))
+        device_runs = fan_out(
+            serials,
+            lambda serial: prepare_and_run_on_device(
+                options,
+                serial=serial,
+                run_id=run_id,
+                prompt_text=prompt_text,
+                dataset_lines=shard_by_serial[serial],
+                partial_report_file=json_report_file.with_name(f"{json_report_file.stem}.{serial}.partial.json"),
+            ),
+        )
+        result_json = merge_device_results(run_id, device_runs)
+        report_text = merged_report_text(result_json, device_runs)
+
+    write_device_reports(result_json, report_text, report_file, json_report_file)
+
+    summary = result_json.get("summary", {})
+    pass_count = int(summary.get("pass_count", 0))
+    fail_count = int(summary.get("fail_count", 0))
+    total_cases = int(summary.get("total_cases", pass_count + fail_count))
+    pass_rate = float(summary.get("pass_rate", 0.0))
     print(
-        f"Device benchmark completed serial={serial} total={total_cases} "
+        f"Device benchmark completed serial={','.join(serials)} total={total_cases} "
         f"pass={pass_count} fail={fail_count} pass_rate={pass_rate:.2f}%"
     )
+    for device in result_json.get("devices", []):
+        print(
+            f"  {device['serial']}: cases={device['total_cases']} pass_rate={device['pass_rate']:.2f}% "
+            f"avg_latency_ms={device['avg_latency_ms']} p90_latency_ms={device['p90_latency_ms']} "
+            f"throughput={device['throughput_cases_per_sec']:.2f}/s"
+        )
     print(f"Text report: {report_file}")
     print(f"JSON report: {json_report_file}")
     return 0
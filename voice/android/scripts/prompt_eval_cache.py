@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    output TEXT NOT NULL,
+    latency_ms INTEGER NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+'''
+
+
+def sha256_text(value: str) -> str:
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """On-disk inference cache keyed by (model, binary, backend, sampler, prompt).
+
+    Decoding is greedy (top_k=1, temperature=0), so identical keys yield identical
+    outputs. Entries are evicted least-recently-used once the stored outputs exceed
+    max_bytes. Only successful inferences are stored.
+    """
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        parent = os.path.dirname(os.path.abspath(path))
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def file_fingerprint(self, path: str) -> str:
+        """Content hash of a file, memoized on (size, mtime) to skip re-hashing models."""
+        resolved = os.path.abspath(path)
+        stat = os.stat(resolved)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT size, mtime_ns, digest FROM fingerprints WHERE path = ?', (resolved,)
+            ).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return str(row[2])
+
+        value = sha256_file(resolved)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO fingerprints (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)',
+                (resolved, stat.st_size, stat.st_mtime_ns, value),
+            )
+            self._conn.commit()
+        return value
+
+    @staticmethod
+    def make_key(context: dict[str, Any], prompt: str) -> str:
+        return sha256_text(json.dumps({'context': context, 'prompt': prompt}, sort_keys=True))
+
+    def get(self, key: str) -> tuple[str, int] | None:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT output, latency_ms FROM results WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                'UPDATE results SET last_used = ? WHERE key = ?', (time.time(), key)
+            )
+            self._conn.commit()
+        return str(row[0]), int(row[1])
+
+    def put(self, key: str, output: str, latency_ms: int) -> None:
+        size_bytes = len(output.encode('utf-8')) + len(key)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO results (key, output, latency_ms, size_bytes, last_used) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, output, latency_ms, size_bytes, time.time()),
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        total = self._conn.execute('SELECT COALESCE(SUM(size_bytes), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evict: list[tuple[str]] = []
+        for key, size_bytes in self._conn.execute(
+            'SELECT key, size_bytes FROM results ORDER BY last_used ASC'
+        ):
+            if total <= self.max_bytes:
+                break
+            evict.append((key,))
+            total -= size_bytes
+        self._conn.executemany('DELETE FROM results WHERE key = ?', evict)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            entries, size_bytes = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM results'
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'enabled': True,
+            'path': os.path.abspath(self.path),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups * 100.0, 2) if lookups else 0.0,
+            'entries': int(entries),
+            'size_bytes': int(size_bytes),
+            'max_bytes': self.max_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def cached_infer(
+    infer: Callable[[str, str], tuple[str, int]],
+    cache: ResultCache,
+    context: dict[str, Any],
+    reuse: bool = True,
+) -> Callable[[str, str], tuple[str, int]]:
+    """Wraps an infer callable so cache hits skip the evaluator entirely.
+
+    With reuse=False every call runs the evaluator and only refreshes the cache, for
+    callers that need a latency measured now rather than one stored by an earlier run.
+    """
+
+    def run(rendered_prompt: str, shared_prefix: str = '') -> tuple[str, int]:
+        key = cache.make_key(context, rendered_prompt)
+        hit = cache.get(key) if reuse else None
+        if hit is not None:
+            return hit
+        output, latency_ms = infer(rendered_prompt, shared_prefix)
+        cache.put(key, output, latency_ms)
+        return output, latency_ms
+
+    return run
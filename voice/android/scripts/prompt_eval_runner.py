@@ -2,15 +2,26 @@
 from __future__ import annotations
 
 import argparse
+import collections
+import difflib
+import hashlib
 import json
+import math
 import os
+import queue
 import re
 import subprocess
+import sys
 import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable, Iterator
+
+from prompt_eval_cache import ResultCache, cached_infer, sha256_file
+from prompt_eval_sampling import SAMPLE_STRATEGIES, sample_order
 
 WHITESPACE_REGEX = re.compile(r"\s+")
 REPEATED_FILLER_REGEX = re.compile(
@@ -22,6 +33,24 @@ PREFIX_LABEL_REGEX = re.compile(
     re.IGNORECASE,
 )
 CLEANED_ANCHOR_REGEX = re.compile(r"(?im)^cleaned\s*:\s*")
+BENCHMARK_MARKER = 'BenchmarkInfo:'
+BENCHMARK_INIT_REGEX = re.compile(r"Total init time:\s*([\d.]+)\s*(us|ms|s)\b")
+BENCHMARK_TTFT_REGEX = re.compile(r"Time to first token:\s*([\d.]+)\s*(us|ms|s)\b")
+BENCHMARK_TURN_REGEX = re.compile(
+    r"(Prefill|Decode) Turn \d+: Processed (\d+) tokens in ([\d.]+)\s*(us|ms|s)\b"
+)
+DURATION_MS_PER_UNIT = {'us': 0.001, 'ms': 1.0, 's': 1000.0}
+
+# infer(rendered_prompt, shared_prefix): shared_prefix is a leading part of rendered_prompt
+# that every case of the template repeats; evaluators may prefill it once and reuse it.
+InferFn = Callable[[str, str], tuple[str, int]]
+
+# Passed explicitly to the --server_mode binary so the reported sampler is the one applied.
+SERVER_SAMPLER_FLAGS = {'top_k': 1, 'top_p': 1.0, 'temperature': 0.0, 'seed': 42, 'max_num_tokens': 224}
+SAMPLER_BY_PIPELINE = {
+    'litert_lm_main': 'litert_lm_main defaults',
+    'server_mode': ','.join(f'{name}={value}' for name, value in SERVER_SAMPLER_FLAGS.items()),
+}
 
 
 @dataclass
@@ -30,6 +59,8 @@ class Case:
     input_text: str
     expected: str
     match: str
+    category: str = ''
+    difficulty: float = 1.0
 
 
 @dataclass
@@ -42,6 +73,9 @@ class CaseResult:
     passed: bool
     latency_ms: int
     error: str | None
+    category: str = ''
+    # Parsed LiteRT-LM BenchmarkInfo (see parse_benchmark_info); None when the evaluator printed none.
+    benchmark: dict[str, float] | None = None
 
 
 def load_cases(path: str) -> list[Case]:
@@ -61,7 +95,10 @@ def load_cases(path: str) -> list[Case]:
                     raw.append(json.loads(stripped))
                 except json.JSONDecodeError as exc:
                     raise ValueError(f'Invalid JSON on line {line_no}: {exc}') from exc
+    return parse_cases(raw)
+
 
+def parse_cases(raw: list[Any]) -> list[Case]:
     cases: list[Case] = []
     for index, item in enumerate(raw, start=1):
         if not isinstance(item, dict):
@@ -80,6 +117,11 @@ def load_cases(path: str) -> list[Case]:
             raise ValueError(
                 f'Case "{case_id}" has invalid match "{match}". Use exact|contains|regex'
             )
+        difficulty = item.get('difficulty')
+        if difficulty is None:
+            difficulty = estimate_difficulty(str(input_text), str(expected))
+        elif float(difficulty) <= 0:
+            raise ValueError(f'Case "{case_id}" has non-positive "difficulty"')
 
         cases.append(
             Case(
@@ -87,11 +129,73 @@ def load_cases(path: str) -> list[Case]:
                 input_text=str(input_text),
                 expected=str(expected),
                 match=match,
+                category=str(item.get('category') or infer_category(str(input_text), str(expected))),
+                difficulty=float(difficulty),
             )
         )
     return cases
 
 
+def infer_category(input_text: str, expected: str) -> str:
+    return 'clean' if input_text == expected else 'noisy'
+
+
+def estimate_difficulty(input_text: str, expected: str) -> float:
+    """1 + number of words the model has to drop, insert or rewrite."""
+    matcher = difflib.SequenceMatcher(a=input_text.split(), b=expected.split(), autojunk=False)
+    edits = sum(
+        max(i2 - i1, j2 - j1)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    )
+    return 1.0 + edits
+
+
+def select_cases(
+    cases: list[Case],
+    strategy: str,
+    size: int,
+    seed: int,
+    keep_order: bool,
+) -> list[Case]:
+    """Samples up to size cases (0 = all); keep_order restores dataset order."""
+    ordered = sample_order(
+        cases,
+        strategy=strategy,
+        seed=seed,
+        category_of=lambda case: case.category,
+        weight_of=lambda case: case.difficulty,
+    )
+    if size > 0:
+        ordered = ordered[:size]
+    if keep_order:
+        position = {id(case): index for index, case in enumerate(cases)}
+        ordered.sort(key=lambda case: position[id(case)])
+    return ordered
+
+
+def split_prompt_template(template: str) -> tuple[str, str]:
+    """Splits a template into the text before its first input placeholder and the per-case rest.
+
+    prefix + render_prompt(suffix, x) renders the same text as render_prompt(template, x),
+    so the prefix can be prefilled once and shared across cases.
+    """
+    positions = [index for index in (template.find('{{input}}'), template.find('{input}')) if index >= 0]
+    if not positions:
+        prefix = template.rstrip()
+        return prefix, render_prompt(prefix, '{input}')[len(prefix):]
+    cut = min(positions)
+    return template[:cut], template[cut:]
+
+
+def estimate_token_count(text: str) -> int:
+    """Rough SentencePiece-style count: one token per word piece of up to four characters
+    and one per punctuation mark."""
+    words = re.findall(r'\w+', text)
+    punctuation = re.findall(r'[^\w\s]', text)
+    return sum(math.ceil(len(word) / 4) for word in words) + len(punctuation)
+
+
 def render_prompt(template: str, input_text: str) -> str:
     rendered = template.replace('{{input}}', input_text).replace('{input}', input_text)
     if rendered == template:
@@ -114,8 +218,49 @@ def load_prompt_template(prompt_file: str) -> str:
     return prompt
 
 
+def parse_benchmark_info(section: str) -> dict[str, float] | None:
+    """Per-case timings from the text LiteRT-LM prints after 'BenchmarkInfo:'.
+
+    Prefill and decode cover all turns; tokens_per_sec is tokens over summed duration.
+    """
+    info: dict[str, float] = {}
+    init = BENCHMARK_INIT_REGEX.search(section)
+    if init:
+        info['init_ms'] = round(float(init.group(1)) * DURATION_MS_PER_UNIT[init.group(2)], 2)
+    ttft = BENCHMARK_TTFT_REGEX.search(section)
+    if ttft:
+        info['ttft_ms'] = round(float(ttft.group(1)) * DURATION_MS_PER_UNIT[ttft.group(2)], 2)
+    for phase in ('prefill', 'decode'):
+        turns = [match for match in BENCHMARK_TURN_REGEX.finditer(section) if match.group(1).lower() == phase]
+        if not turns:
+            continue
+        tokens = sum(int(match.group(2)) for match in turns)
+        duration_ms = sum(float(match.group(3)) * DURATION_MS_PER_UNIT[match.group(4)] for match in turns)
+        info[f'{phase}_tokens'] = tokens
+        info[f'{phase}_ms'] = round(duration_ms, 2)
+        info[f'{phase}_tokens_per_sec'] = round(tokens / duration_ms * 1000.0, 2) if duration_ms > 0 else 0.0
+    return info or None
+
+
+def format_benchmark_info(benchmark: dict[str, Any]) -> str:
+    """Server-reported timings as BenchmarkInfo text, so they ride through the cache like CLI ones."""
+    lines = [BENCHMARK_MARKER]
+    if 'ttft_ms' in benchmark:
+        lines.append(f"  Time to first token: {float(benchmark['ttft_ms']):.3f} ms")
+    for phase in ('Prefill', 'Decode'):
+        tokens, duration_ms = benchmark.get(f'{phase.lower()}_tokens'), benchmark.get(f'{phase.lower()}_ms')
+        if tokens is not None and duration_ms is not None:
+            lines.append(f'  {phase} Turn 1: Processed {int(tokens)} tokens in {float(duration_ms):.3f} ms duration.')
+    return '\n'.join(lines)
+
+
+def split_benchmark_info(raw_output: str) -> tuple[str, dict[str, float] | None]:
+    text, marker, section = raw_output.partition(BENCHMARK_MARKER)
+    return text.rstrip(), parse_benchmark_info(section) if marker else None
+
+
 def extract_main_output_text(raw_output: str) -> str:
-    pre_benchmark = raw_output.split('BenchmarkInfo:', 1)[0]
+    pre_benchmark = raw_output.split(BENCHMARK_MARKER, 1)[0]
     lines = [line.rstrip() for line in pre_benchmark.splitlines()]
 
     response_lines: list[str] = []
@@ -244,16 +389,733 @@ def run_model_once(
         detail = stderr or stdout or f'process exited with code {completed.returncode}'
         raise RuntimeError(detail)
 
-    return extract_main_output_text(completed.stdout), latency_ms
+    # BenchmarkInfo rides along after the answer so cached results keep their timings;
+    # evaluate_case splits it off again.
+    output = extract_main_output_text(completed.stdout)
+    _, marker, section = completed.stdout.partition(BENCHMARK_MARKER)
+    if marker and section.strip():
+        output = f'{output}\n\n{BENCHMARK_MARKER}\n{section.strip()}'
+    return output, latency_ms
+
+
+class ModelServer:
+    """Resident evaluator process speaking the --server_mode JSON-lines protocol.
+
+    The engine is loaded once on start; each request carries a rendered prompt and
+    the reply's latency_ms covers inference only. A timed-out or crashed server is
+    killed and relaunched on the next request. With prefix_cache, the shared prefix is
+    sent separately so a server advertising prefix_cache prefills it only once.
+    """
+
+    def __init__(
+        self,
+        binary_path: str,
+        backend: str,
+        model_path: str,
+        timeout_sec: int,
+        startup_timeout_sec: int,
+        prefix_cache: bool = False,
+    ) -> None:
+        self.binary_path = binary_path
+        self.backend = backend
+        self.model_path = model_path
+        self.timeout_sec = timeout_sec
+        self.startup_timeout_sec = startup_timeout_sec
+        self.prefix_cache = prefix_cache
+        self.active_backend: str | None = None
+        self.supports_prefix = False
+        self.supports_tokenize = False
+        self.prefix_reused = 0
+        self.prefix_prefilled = 0
+        self._process: subprocess.Popen[str] | None = None
+        self._lines: queue.Queue[str | None] = queue.Queue()
+        self._stderr_tail: collections.deque[str] = collections.deque(maxlen=20)
+        self._next_id = 0
+
+    def start(self) -> None:
+        if self._process is not None and self._process.poll() is None:
+            return
+        cmd = [
+            self.binary_path,
+            f'--backend={self.backend}',
+            f'--model_path={self.model_path}',
+            '--server_mode',
+            *(f'--{name}={value}' for name, value in SERVER_SAMPLER_FLAGS.items()),
+        ]
+        self._lines = queue.Queue()
+        self._stderr_tail.clear()
+        self._process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            bufsize=1,
+        )
+        threading.Thread(
+            target=self._pump_stdout, args=(self._process, self._lines), daemon=True
+        ).start()
+        threading.Thread(
+            target=self._pump_stderr, args=(self._process,), daemon=True
+        ).start()
+
+        ready = self._read_message(self.startup_timeout_sec)
+        if ready.get('event') != 'ready':
+            self.close()
+            raise RuntimeError(f'Model server did not report ready: {ready}')
+        self.active_backend = str(ready.get('backend') or '') or None
+        self.supports_prefix = bool(ready.get('prefix_cache'))
+        self.supports_tokenize = bool(ready.get('tokenize'))
+
+    def infer(self, input_prompt: str, shared_prefix: str = '') -> tuple[str, int]:
+        self.start()
+        self._next_id += 1
+        request_id = self._next_id
+        request: dict[str, Any] = {'id': request_id, 'prompt': input_prompt}
+        if (
+            self.prefix_cache
+            and self.supports_prefix
+            and shared_prefix
+            and input_prompt.startswith(shared_prefix)
+            and len(input_prompt) > len(shared_prefix)
+        ):
+            request = {'id': request_id, 'prefix': shared_prefix, 'prompt': input_prompt[len(shared_prefix):]}
+        response = self._request(request)
+        if 'prefix_cached' in response:
+            if response['prefix_cached']:
+                self.prefix_reused += 1
+            else:
+                self.prefix_prefilled += 1
+        output = str(response.get('output', ''))
+        if response.get('benchmark'):
+            # Same layout as run_model_once: evaluate_case splits the timings off again.
+            output = f"{output}\n\n{format_benchmark_info(response['benchmark'])}"
+        return output, int(response.get('latency_ms', 0))
+
+    def count_tokens(self, text: str) -> int | None:
+        """Token count from the model's own tokenizer, or None if the server has no tokenize op."""
+        self.start()
+        if not self.supports_tokenize:
+            return None
+        self._next_id += 1
+        response = self._request({'id': self._next_id, 'op': 'tokenize', 'text': text})
+        return int(response['tokens'])
+
+    def _request(self, request: dict[str, Any]) -> dict[str, Any]:
+        assert self._process is not None and self._process.stdin is not None
+        try:
+            self._process.stdin.write(json.dumps(request, ensure_ascii=False) + '\n')
+            self._process.stdin.flush()
+            response = self._read_message(self.timeout_sec)
+        except (OSError, RuntimeError, TimeoutError):
+            self.close()
+            raise
+
+        if response.get('id') != request['id']:
+            self.close()
+            raise RuntimeError(f'Model server answered out of order: {response}')
+        if response.get('error'):
+            raise RuntimeError(str(response['error']))
+        return response
+
+    def close(self) -> None:
+        process = self._process
+        self._process = None
+        if process is None:
+            return
+        if process.poll() is None:
+            try:
+                if process.stdin is not None:
+                    process.stdin.close()
+                process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+                process.wait()
+
+    def __enter__(self) -> ModelServer:
+        self.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def _read_message(self, timeout_sec: int) -> dict[str, Any]:
+        deadline = time.monotonic() + timeout_sec
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f'Model server did not answer within {timeout_sec}s')
+            try:
+                line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                detail = '\n'.join(self._stderr_tail).strip()
+                raise RuntimeError(detail or 'Model server exited unexpectedly')
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(message, dict):
+                return message
+
+    @staticmethod
+    def _pump_stdout(process: subprocess.Popen[str], lines: queue.Queue[str | None]) -> None:
+        assert process.stdout is not None
+        for line in process.stdout:
+            lines.put(line.strip())
+        lines.put(None)
+
+    def _pump_stderr(self, process: subprocess.Popen[str]) -> None:
+        assert process.stderr is not None
+        for line in process.stderr:
+            if line.strip():
+                self._stderr_tail.append(line.rstrip())
+
+
+def evaluate_case(
+    case: Case,
+    prompt_template: str,
+    infer: InferFn,
+) -> CaseResult:
+    normalized_input = normalize_input(case.input_text)
+    actual = ''
+    passed = False
+    latency_ms = 0
+    error: str | None = None
+    benchmark: dict[str, float] | None = None
+
+    try:
+        if normalized_input:
+            rendered_prompt = render_prompt(prompt_template, normalized_input)
+            shared_prefix, _ = split_prompt_template(prompt_template)
+            if not rendered_prompt.startswith(shared_prefix):
+                shared_prefix = ''
+            raw_output, latency_ms = infer(rendered_prompt, shared_prefix)
+            raw_output, benchmark = split_benchmark_info(raw_output)
+            actual = clean_model_output(raw_output, bullet_mode=False)
+        else:
+            actual = ''
+        passed = compare_output(case.expected, actual, case.match)
+    except Exception as exc:  # noqa: BLE001
+        error = str(exc)
+
+    return CaseResult(
+        id=case.id,
+        input_text=case.input_text,
+        expected=case.expected,
+        match=case.match,
+        actual=actual,
+        passed=passed,
+        latency_ms=latency_ms,
+        error=error,
+        category=case.category,
+        benchmark=benchmark,
+    )
+
+
+def resolve_worker_count(
+    requested: int,
+    max_resident_mb: int,
+    worker_memory_mb: int,
+    model_path: str,
+) -> int:
+    workers = max(1, requested)
+    if max_resident_mb <= 0:
+        return workers
+    per_worker_mb = worker_memory_mb
+    if per_worker_mb <= 0:
+        # Mapped weights dominate each evaluator's resident set.
+        try:
+            per_worker_mb = max(1, os.path.getsize(model_path) // (1024 * 1024))
+        except OSError:
+            return workers
+    return max(1, min(workers, max_resident_mb // per_worker_mb))
+
+
+def run_cases(
+    cases: list[Case],
+    prompt_template: str,
+    infers: list[InferFn],
+    verbose: bool = False,
+    deadline: float | None = None,
+    on_result: Callable[[CaseResult], None] | None = None,
+) -> list[CaseResult]:
+    """Evaluates cases across one infer callable per worker, preserving case order.
+
+    With a deadline (time.monotonic()), cases not yet started by then are skipped, so
+    the results are a prefix-like subset of cases in submission order. on_result is
+    called on the calling thread as each case completes.
+    """
+    if len(infers) <= 1:
+        results: list[CaseResult] = []
+        for idx, case in enumerate(cases, start=1):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if verbose:
+                print(f'[{idx}/{len(cases)}] running {case.id}', flush=True)
+            result = evaluate_case(case, prompt_template, infers[0])
+            if on_result is not None:
+                on_result(result)
+            results.append(result)
+        return results
+
+    available: queue.Queue[InferFn] = queue.Queue()
+    for infer in infers:
+        available.put(infer)
+
+    def run_one(case: Case) -> CaseResult | None:
+        if deadline is not None and time.monotonic() >= deadline:
+            return None
+        infer = available.get()
+        try:
+            return evaluate_case(case, prompt_template, infer)
+        finally:
+            available.put(infer)
+
+    ordered: list[CaseResult | None] = [None] * len(cases)
+    pool = ThreadPoolExecutor(max_workers=len(infers))
+    try:
+        futures = {pool.submit(run_one, case): idx for idx, case in enumerate(cases)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            if result is None:
+                continue
+            ordered[futures[future]] = result
+            if on_result is not None:
+                on_result(result)
+            if verbose:
+                print(f'[{done}/{len(cases)}] finished {result.id}', flush=True)
+    finally:
+        # On interrupt, drop queued cases instead of running them all before exiting.
+        pool.shutdown(wait=True, cancel_futures=True)
+    return [result for result in ordered if result is not None]
+
+
+def run_paired_cases(
+    cases: list[Case],
+    template_a: str,
+    template_b: str,
+    infers: list[InferFn],
+) -> Iterator[tuple[CaseResult, CaseResult]]:
+    """Yields (A, B) results per case in case order, both scored back to back on one worker.
+
+    The prompt that goes first alternates per case so warm-up effects do not always
+    land on the same side. Closing the generator cancels cases not yet started.
+    """
+
+    def run_pair(idx: int, case: Case, infer: InferFn) -> tuple[CaseResult, CaseResult]:
+        if idx % 2 == 0:
+            result_a = evaluate_case(case, template_a, infer)
+            result_b = evaluate_case(case, template_b, infer)
+        else:
+            result_b = evaluate_case(case, template_b, infer)
+            result_a = evaluate_case(case, template_a, infer)
+        return result_a, result_b
+
+    if len(infers) <= 1:
+        for idx, case in enumerate(cases):
+            yield run_pair(idx, case, infers[0])
+        return
+
+    available: queue.Queue[InferFn] = queue.Queue()
+    for infer in infers:
+        available.put(infer)
+
+    def run_one(idx: int, case: Case) -> tuple[CaseResult, CaseResult]:
+        infer = available.get()
+        try:
+            return run_pair(idx, case, infer)
+        finally:
+            available.put(infer)
+
+    pool = ThreadPoolExecutor(max_workers=len(infers))
+    try:
+        futures = [pool.submit(run_one, idx, case) for idx, case in enumerate(cases)]
+        for future in futures:
+            yield future.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def throughput_per_sec(total_cases: int, wall_clock_ms: int) -> float:
+    return (total_cases / (wall_clock_ms / 1000.0)) if wall_clock_ms > 0 else 0.0
+
+
+@dataclass
+class EvalConfig:
+    binary_path: str
+    model_path: str
+    backend: str = 'auto'
+    timeout_sec: int = 30
+    persistent: bool = False
+    startup_timeout_sec: int = 300
+    workers: int = 1
+    max_resident_mb: int = 0
+    worker_memory_mb: int = 0
+    cache_file: str = ''
+    cache_max_mb: int = 256
+    prefix_cache: bool = False
+
+    @property
+    def pipeline(self) -> str:
+        return 'server_mode' if self.persistent else 'litert_lm_main'
+
+
+class Evaluator:
+    """In-process evaluation API over a pool of model connections and the result cache.
+
+    One Evaluator can score any number of prompt templates, so callers pay evaluator
+    start-up once and get CaseResult objects back; report files are left to the caller.
+    """
+
+    def __init__(self, config: EvalConfig) -> None:
+        self.config = config
+        self.workers = resolve_worker_count(
+            requested=config.workers,
+            max_resident_mb=config.max_resident_mb,
+            worker_memory_mb=config.worker_memory_mb,
+            model_path=config.model_path,
+        )
+        self._servers: list[ModelServer] = []
+        infers: list[InferFn] = []
+        if config.persistent:
+            for _ in range(self.workers):
+                server = ModelServer(
+                    binary_path=config.binary_path,
+                    backend=config.backend,
+                    model_path=config.model_path,
+                    timeout_sec=config.timeout_sec,
+                    startup_timeout_sec=config.startup_timeout_sec,
+                    prefix_cache=config.prefix_cache,
+                )
+                self._servers.append(server)
+                infers.append(server.infer)
+        else:
+            def infer(rendered_prompt: str, shared_prefix: str = '') -> tuple[str, int]:
+                return run_model_once(
+                    binary_path=config.binary_path,
+                    backend=config.backend,
+                    model_path=config.model_path,
+                    input_prompt=rendered_prompt,
+                    timeout_sec=config.timeout_sec,
+                )
+
+            infers = [infer] * self.workers
+
+        # Latency comparisons (paired runs, tail guardrails) need latencies measured now;
+        # a cache hit would pit a fresh latency against one stored by an earlier session.
+        fresh_infers = infers
+        self.cache: ResultCache | None = None
+        if config.cache_file:
+            self.cache = ResultCache(config.cache_file, max_bytes=config.cache_max_mb * 1024 * 1024)
+            cache_context = {
+                'model': self.cache.file_fingerprint(config.model_path),
+                'binary': self.cache.file_fingerprint(config.binary_path),
+                'backend': config.backend,
+                'pipeline': config.pipeline,
+                'sampler': SAMPLER_BY_PIPELINE[config.pipeline],
+            }
+            if config.persistent and config.prefix_cache:
+                # Prefilling in two steps may not be bit-identical to one pass; keep the results apart.
+                cache_context['prefix_cache'] = True
+            fresh_infers = [cached_infer(infer, self.cache, cache_context, reuse=False) for infer in infers]
+            infers = [cached_infer(infer, self.cache, cache_context) for infer in infers]
+        self._infers = infers
+        self._fresh_infers = fresh_infers
+
+    def run(
+        self,
+        prompt_template: str,
+        cases: list[Case],
+        verbose: bool = False,
+        deadline: float | None = None,
+        on_result: Callable[[CaseResult], None] | None = None,
+        reuse_cache: bool = True,
+    ) -> list[CaseResult]:
+        return run_cases(
+            cases,
+            prompt_template,
+            self._infers if reuse_cache else self._fresh_infers,
+            verbose=verbose,
+            deadline=deadline,
+            on_result=on_result,
+        )
+
+    def run_paired(
+        self,
+        template_a: str,
+        template_b: str,
+        cases: list[Case],
+    ) -> Iterator[tuple[CaseResult, CaseResult]]:
+        return run_paired_cases(cases, template_a, template_b, self._fresh_infers)
+
+    def cache_stats(self) -> dict[str, Any]:
+        return self.cache.stats() if self.cache is not None else {'enabled': False}
+
+    def count_prompt_tokens(self, prompt_template: str, require_tokenizer: bool = False) -> tuple[int, str]:
+        """Tokens every case prefills for this template besides its input, and how they were counted.
+
+        Uses the model tokenizer through a resident server when one offers it, otherwise
+        estimate_token_count; compare counts only when their sources match. Callers that
+        accept or reject prompts on the count pass require_tokenizer to refuse the estimate.
+        """
+        text = render_prompt(prompt_template, '')
+        for server in self._servers[:1]:
+            tokens = server.count_tokens(text)
+            if tokens is not None:
+                return tokens, 'tokenizer'
+        if require_tokenizer:
+            raise RuntimeError(
+                'Prompt token counts need the model tokenizer: run with --persistent '
+                'on a binary whose server supports the tokenize op.'
+            )
+        return estimate_token_count(text), 'estimate'
+
+    def prefix_cache_stats(self) -> dict[str, Any]:
+        return {
+            'enabled': self.config.persistent and self.config.prefix_cache,
+            'supported': any(server.supports_prefix for server in self._servers),
+            'reused': sum(server.prefix_reused for server in self._servers),
+            'prefilled': sum(server.prefix_prefilled for server in self._servers),
+        }
+
+    def run_config(self) -> dict[str, Any]:
+        return {
+            'binary_path': os.path.abspath(self.config.binary_path),
+            'model_path': os.path.abspath(self.config.model_path),
+            'backend': self.config.backend,
+            'timeout_sec': self.config.timeout_sec,
+            'pipeline': self.config.pipeline,
+            'sampler': SAMPLER_BY_PIPELINE[self.config.pipeline],
+            'persistent': self.config.persistent,
+            'prefix_cache': self.config.prefix_cache,
+            'workers': self.workers,
+        }
+
+    def close(self) -> None:
+        for server in self._servers:
+            server.close()
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+    def __enter__(self) -> Evaluator:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
+# Upper bounds (inclusive) of the latency histogram buckets; the last bucket is open-ended.
+LATENCY_HISTOGRAM_BOUNDS_MS = (250, 500, 1000, 2000, 4000, 8000, 16000)
+
+
+def latency_percentile(values: list[int], pct: float) -> int:
+    """Nearest-rank percentile, so the value is always an observed latency."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_stats(latencies: list[int]) -> dict[str, Any]:
+    total = len(latencies)
+    mean = sum(latencies) / total if total else 0.0
+    variance = sum((value - mean) ** 2 for value in latencies) / total if total else 0.0
+    histogram: dict[str, int] = {}
+    lower = 0
+    for bound in LATENCY_HISTOGRAM_BOUNDS_MS:
+        histogram[f'{lower}-{bound}'] = sum(1 for value in latencies if lower <= value <= bound)
+        lower = bound + 1
+    histogram[f'>{LATENCY_HISTOGRAM_BOUNDS_MS[-1]}'] = sum(
+        1 for value in latencies if value > LATENCY_HISTOGRAM_BOUNDS_MS[-1]
+    )
+    return {
+        'count': total,
+        'avg_ms': int(mean),
+        'p50_ms': latency_percentile(latencies, 50),
+        'p90_ms': latency_percentile(latencies, 90),
+        'p99_ms': latency_percentile(latencies, 99),
+        'max_ms': max(latencies, default=0),
+        'stddev_ms': round(variance ** 0.5, 1),
+        'histogram': histogram,
+    }
+
+
+def latency_by_category(results: list[CaseResult]) -> dict[str, dict[str, Any]]:
+    grouped: dict[str, list[int]] = {}
+    for result in results:
+        grouped.setdefault(result.category or 'uncategorized', []).append(result.latency_ms)
+    return {category: latency_stats(grouped[category]) for category in sorted(grouped)}
+
+
+def benchmark_summary(benchmarks: list[dict[str, float] | None]) -> dict[str, Any]:
+    """Aggregates per-case BenchmarkInfo; cases without one are left out of every figure."""
+    rows = [row for row in benchmarks if row]
+
+    def average(key: str) -> float:
+        values = [float(row[key]) for row in rows if key in row]
+        return round(sum(values) / len(values), 2) if values else 0.0
+
+    def rate(phase: str) -> float:
+        tokens = sum(float(row.get(f'{phase}_tokens', 0)) for row in rows)
+        duration_ms = sum(float(row.get(f'{phase}_ms', 0)) for row in rows)
+        return round(tokens / duration_ms * 1000.0, 2) if duration_ms > 0 else 0.0
+
+    return {
+        'cases': len(rows),
+        'avg_init_ms': average('init_ms'),
+        'avg_ttft_ms': average('ttft_ms'),
+        'p90_ttft_ms': latency_percentile([int(row['ttft_ms']) for row in rows if 'ttft_ms' in row], 90),
+        'avg_prefill_tokens': average('prefill_tokens'),
+        'avg_prefill_ms': average('prefill_ms'),
+        'prefill_tokens_per_sec': rate('prefill'),
+        'avg_decode_tokens': average('decode_tokens'),
+        'avg_decode_ms': average('decode_ms'),
+        'decode_tokens_per_sec': rate('decode'),
+    }
+
+
+def summarize_results(
+    results: list[CaseResult],
+    wall_clock_ms: int,
+    resumed_cases: int = 0,
+) -> dict[str, Any]:
+    """Throughput only counts cases evaluated within wall_clock_ms, not resumed ones."""
+    total = len(results)
+    pass_count = sum(1 for result in results if result.passed)
+    total_latency_ms = sum(result.latency_ms for result in results)
+    latency = latency_stats([result.latency_ms for result in results])
+    return {
+        'total_cases': total,
+        'pass_count': pass_count,
+        'fail_count': total - pass_count,
+        'pass_rate': (pass_count / total * 100.0) if total else 0.0,
+        'avg_latency_ms': int(total_latency_ms / total) if total else 0,
+        'p50_latency_ms': latency['p50_ms'],
+        'p90_latency_ms': latency['p90_ms'],
+        'p99_latency_ms': latency['p99_ms'],
+        'max_latency_ms': latency['max_ms'],
+        'stddev_latency_ms': latency['stddev_ms'],
+        'total_latency_ms': total_latency_ms,
+        'wall_clock_ms': wall_clock_ms,
+        'throughput_cases_per_sec': round(throughput_per_sec(total - resumed_cases, wall_clock_ms), 3),
+        'latency_histogram': latency['histogram'],
+        'latency_by_category': latency_by_category(results),
+        'benchmark': benchmark_summary([result.benchmark for result in results]),
+    }
+
+
+def case_result_to_dict(result: CaseResult) -> dict[str, Any]:
+    return {
+        'id': result.id,
+        'input': result.input_text,
+        'expected': result.expected,
+        'match': result.match,
+        'actual': result.actual,
+        'passed': result.passed,
+        'latency_ms': result.latency_ms,
+        'error': result.error,
+        'category': result.category,
+        'benchmark': result.benchmark,
+    }
+
+
+def case_result_from_dict(payload: dict[str, Any]) -> CaseResult:
+    return CaseResult(
+        id=str(payload.get('id')),
+        input_text=str(payload.get('input', '')),
+        expected=str(payload.get('expected', '')),
+        match=str(payload.get('match', 'exact')),
+        actual=str(payload.get('actual', '')),
+        passed=bool(payload.get('passed')),
+        latency_ms=int(payload.get('latency_ms', 0) or 0),
+        error=payload.get('error'),
+        category=str(payload.get('category', '') or ''),
+        benchmark=payload.get('benchmark') or None,
+    )
+
+
+class CaseCheckpoint:
+    """Append-only JSONL of finished cases, tagged with the config hash they ran under.
+
+    Each case is flushed as soon as it completes, so an interrupted run loses at most
+    the cases in flight. Without resume the file is started over. Cases that errored or
+    timed out are kept for this run's report but never written, so --resume retries them.
+    """
+
+    def __init__(self, path: str, config_hash: str, resume: bool) -> None:
+        parent = os.path.dirname(os.path.abspath(path))
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.path = path
+        self.config_hash = config_hash
+        self._results: dict[str, CaseResult] = {}
+        if resume and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by a kill mid-write; that case just reruns.
+                        continue
+                    if isinstance(row, dict) and row.get('config_hash') == config_hash:
+                        result = case_result_from_dict(row['result'])
+                        if result.error is None:
+                            self._results[result.id] = result
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+
+    @property
+    def done_ids(self) -> set[str]:
+        return {case_id for case_id, result in self._results.items() if result.error is None}
+
+    def append(self, result: CaseResult) -> None:
+        self._results[result.id] = result
+        if result.error is not None:
+            return
+        self._file.write(
+            json.dumps(
+                {'config_hash': self.config_hash, 'result': case_result_to_dict(result)},
+                ensure_ascii=False,
+            )
+            + '\n'
+        )
+        self._file.flush()
+
+    def results_for(self, cases: list[Case]) -> list[CaseResult]:
+        return [self._results[case.id] for case in cases if case.id in self._results]
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def checkpoint_config_hash(
+    run_config: dict[str, Any],
+    prompt_template: str,
+    cache: ResultCache | None = None,
+) -> str:
+    """Model and binary are keyed by content, so a rebuilt binary or replaced model reruns every case."""
+    fingerprint = cache.file_fingerprint if cache is not None else sha256_file
+    payload = {
+        key: run_config[key]
+        for key in ('backend', 'timeout_sec', 'pipeline', 'sampler', 'cases_file')
+    }
+    payload['model'] = fingerprint(run_config['model_path'])
+    payload['binary'] = fingerprint(run_config['binary_path'])
+    payload['prefix_cache'] = run_config['persistent'] and run_config['prefix_cache']
+    payload['prompt_sha256'] = hashlib.sha256(prompt_template.encode('utf-8')).hexdigest()
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:16]
 
 
 def write_text_report(
     path: str,
     run_config: dict[str, Any],
     results: list[CaseResult],
-    pass_count: int,
-    fail_count: int,
-    total_latency_ms: int,
+    summary: dict[str, Any],
+    cache_stats: dict[str, Any],
 ) -> None:
     with open(path, 'w', encoding='utf-8') as f:
         f.write('PROMPT EVAL REPORT\n')
@@ -261,36 +1123,129 @@ def write_text_report(
         f.write(f"binary: {run_config['binary_path']}\n")
         f.write(f"model_path: {run_config['model_path']}\n")
         f.write(f"backend: {run_config['backend']}\n")
-        f.write('sampling: LiteRT-LM CLI defaults\n')
-        f.write('max_num_tokens: LiteRT-LM CLI default\n')
+        f.write(f"pipeline: {run_config['pipeline']}\n")
+        f.write(f"workers: {run_config['workers']}\n")
+        f.write(f"sampling: {SAMPLER_BY_PIPELINE[run_config['pipeline']]}\n")
         f.write(f"cases_file: {run_config['cases_file']}\n")
         f.write(f"prompt_file: {run_config['prompt_file']}\n")
+        sampling = run_config.get('sampling')
+        if sampling:
+            f.write(
+                f"sample: strategy={sampling['strategy']} seed={sampling['seed']} "
+                f"selected={sampling['selected_cases']}/{sampling['population_cases']} "
+                f"time_budget_sec={sampling['time_budget_sec']}\n"
+            )
         f.write('\n')
 
         for result in results:
             status = 'PASS' if result.passed else 'FAIL'
             f.write(f"[{status}] {result.id} (latency_ms={result.latency_ms}, match={result.match})\n")
+            if result.benchmark:
+                f.write(
+                    'benchmark: '
+                    + ' '.join(f'{key}={value}' for key, value in result.benchmark.items())
+                    + '\n'
+                )
             f.write(f"input: {result.input_text}\n")
             f.write(f"expected: {result.expected}\n")
             f.write(f"actual: {result.actual}\n")
             f.write(f"error: {result.error or 'none'}\n")
             f.write('\n')
 
-        total = len(results)
-        pass_rate = (pass_count / total * 100.0) if total > 0 else 0.0
-        avg_latency = int(total_latency_ms / total) if total > 0 else 0
-
         f.write('[summary]\n')
-        f.write(f'total_cases: {total}\n')
-        f.write(f'pass_count: {pass_count}\n')
-        f.write(f'fail_count: {fail_count}\n')
-        f.write(f'pass_rate: {pass_rate:.2f}%\n')
-        f.write(f'avg_latency_ms: {avg_latency}\n')
-        f.write(f'total_latency_ms: {total_latency_ms}\n')
+        f.write(f"total_cases: {summary['total_cases']}\n")
+        f.write(f"pass_count: {summary['pass_count']}\n")
+        f.write(f"fail_count: {summary['fail_count']}\n")
+        f.write(f"pass_rate: {summary['pass_rate']:.2f}%\n")
+        f.write(f"avg_latency_ms: {summary['avg_latency_ms']}\n")
+        f.write(
+            f"latency_ms: p50={summary['p50_latency_ms']} p90={summary['p90_latency_ms']} "
+            f"p99={summary['p99_latency_ms']} max={summary['max_latency_ms']} "
+            f"stddev={summary['stddev_latency_ms']}\n"
+        )
+        f.write(f"total_latency_ms: {summary['total_latency_ms']}\n")
+        f.write(f"wall_clock_ms: {summary['wall_clock_ms']}\n")
+        f.write(f"throughput_cases_per_sec: {summary['throughput_cases_per_sec']:.3f}\n")
+        checkpoint = run_config.get('checkpoint')
+        if checkpoint:
+            f.write(f"resumed_cases: {checkpoint['resumed_cases']}\n")
+        if cache_stats.get('enabled'):
+            f.write(f"cache_hits: {cache_stats['hits']}\n")
+            f.write(f"cache_misses: {cache_stats['misses']}\n")
+
+        benchmark = summary['benchmark']
+        if benchmark['cases']:
+            f.write('\n[benchmark_info]\n')
+            f.write(f"cases: {benchmark['cases']}\n")
+            if run_config['pipeline'] == 'server_mode':
+                # Measured by the server per request, not LiteRT-LM's own BenchmarkInfo.
+                f.write(
+                    'source: server_mode (engine init paid once at start-up; no ttft with --prefix-cache; '
+                    'token counts exclude the chat template)\n'
+                )
+            f.write(f"avg_init_ms: {benchmark['avg_init_ms']}\n")
+            f.write(f"ttft_ms: avg={benchmark['avg_ttft_ms']} p90={benchmark['p90_ttft_ms']}\n")
+            f.write(
+                f"prefill: avg_tokens={benchmark['avg_prefill_tokens']} avg_ms={benchmark['avg_prefill_ms']} "
+                f"tokens_per_sec={benchmark['prefill_tokens_per_sec']}\n"
+            )
+            f.write(
+                f"decode: avg_tokens={benchmark['avg_decode_tokens']} avg_ms={benchmark['avg_decode_ms']} "
+                f"tokens_per_sec={benchmark['decode_tokens_per_sec']}\n"
+            )
+
+        f.write('\n[latency_histogram_ms]\n')
+        for bucket, count in summary['latency_histogram'].items():
+            f.write(f"{bucket}: {count}\n")
+        f.write('\n[latency_by_category]\n')
+        for category, stats in summary['latency_by_category'].items():
+            f.write(
+                f"{category}: n={stats['count']} avg={stats['avg_ms']} p50={stats['p50_ms']} "
+                f"p90={stats['p90_ms']} p99={stats['p99_ms']} max={stats['max_ms']} "
+                f"stddev={stats['stddev_ms']}\n"
+            )
+
+
+def write_reports(
+    report_file: str,
+    json_report_file: str,
+    run_config: dict[str, Any],
+    results: list[CaseResult],
+    wall_clock_ms: int,
+    cache_stats: dict[str, Any],
+) -> dict[str, Any]:
+    for path in (report_file, json_report_file):
+        parent = os.path.dirname(os.path.abspath(path))
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+
+    summary = summarize_results(
+        results,
+        wall_clock_ms,
+        resumed_cases=run_config.get('checkpoint', {}).get('resumed_cases', 0),
+    )
+    write_text_report(
+        path=report_file,
+        run_config=run_config,
+        results=results,
+        summary=summary,
+        cache_stats=cache_stats,
+    )
+
+    report_payload = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'config': run_config,
+        'summary': summary,
+        'cache': cache_stats,
+        'cases': [case_result_to_dict(r) for r in results],
+    }
+    with open(json_report_file, 'w', encoding='utf-8') as f:
+        json.dump(report_payload, f, ensure_ascii=False, indent=2)
+    return summary
 
 
 def main() -> int:
-    parser = argparse.ArgumentParser(description='Run prompt evaluation cases sequentially.')
+    parser = argparse.ArgumentParser(description='Run prompt evaluation cases.')
     parser.add_argument('--binary-path', required=True)
     parser.add_argument('--model-path', required=True)
     parser.add_argument('--prompt-file', required=True)
@@ -299,124 +1254,173 @@ def main() -> int:
     parser.add_argument('--report-file', required=True)
     parser.add_argument('--json-report-file', required=True)
     parser.add_argument('--timeout-sec', type=int, default=30)
-    parser.add_argument('--max-cases', type=int, default=0)
+    parser.add_argument('--max-cases', type=int, default=0, help='Sample size (0 = all cases).')
+    parser.add_argument(
+        '--sample-strategy',
+        choices=SAMPLE_STRATEGIES,
+        default='head',
+        help='head = first N rows; stratified by category; random; weighted by case difficulty.',
+    )
+    parser.add_argument('--sample-seed', type=int, default=0)
+    parser.add_argument(
+        '--time-budget-sec',
+        type=float,
+        default=0.0,
+        help='Stop starting new cases after this many seconds, in sample order (0 = no budget).',
+    )
+    parser.add_argument(
+        '--persistent',
+        action='store_true',
+        help='Keep one evaluator process resident (requires a --server_mode capable binary).',
+    )
+    parser.add_argument(
+        '--prefix-cache',
+        action='store_true',
+        help='With --persistent, prefill the prompt text before {input} once and send only the per-case rest.',
+    )
+    parser.add_argument('--startup-timeout-sec', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=1, help='Concurrent evaluator processes.')
+    parser.add_argument(
+        '--max-resident-mb',
+        type=int,
+        default=0,
+        help='Cap workers so their combined footprint stays below this (0 = no cap).',
+    )
+    parser.add_argument(
+        '--worker-memory-mb',
+        type=int,
+        default=0,
+        help='Per-worker footprint estimate (default: model file size).',
+    )
+    parser.add_argument(
+        '--cache-file',
+        default='',
+        help='SQLite result cache; identical (model, binary, backend, prompt) runs are reused.',
+    )
+    parser.add_argument('--cache-max-mb', type=int, default=256)
+    parser.add_argument(
+        '--checkpoint-file',
+        default='',
+        help='Per-case JSONL checkpoint (default: <json-report-file stem>.checkpoint.jsonl).',
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Skip cases already in the checkpoint for the same config hash.',
+    )
     parser.add_argument('--verbose', action='store_true')
     args = parser.parse_args()
 
     prompt_template = load_prompt_template(args.prompt_file)
 
-    cases = load_cases(args.cases_file)
-    if args.max_cases > 0:
-        cases = cases[:args.max_cases]
-
-    results: list[CaseResult] = []
-    pass_count = 0
-    total_latency_ms = 0
-
-    for idx, case in enumerate(cases, start=1):
-        if args.verbose:
-            print(f'[{idx}/{len(cases)}] running {case.id}', flush=True)
+    all_cases = load_cases(args.cases_file)
+    cases = select_cases(
+        all_cases,
+        strategy=args.sample_strategy,
+        size=args.max_cases,
+        seed=args.sample_seed,
+        # A budgeted run stops part-way, so it must run in sample order to stay representative.
+        keep_order=args.time_budget_sec <= 0,
+    )
+    deadline = time.monotonic() + args.time_budget_sec if args.time_budget_sec > 0 else None
+
+    evaluator = Evaluator(
+        EvalConfig(
+            binary_path=args.binary_path,
+            model_path=args.model_path,
+            backend=args.backend,
+            timeout_sec=args.timeout_sec,
+            persistent=args.persistent,
+            startup_timeout_sec=args.startup_timeout_sec,
+            workers=args.workers,
+            max_resident_mb=args.max_resident_mb,
+            worker_memory_mb=args.worker_memory_mb,
+            cache_file=args.cache_file,
+            cache_max_mb=args.cache_max_mb,
+            prefix_cache=args.prefix_cache,
+        )
+    )
+    if evaluator.workers < args.workers:
+        print(
+            f'Capping workers at {evaluator.workers} (requested {args.workers}) to stay within '
+            f'--max-resident-mb={args.max_resident_mb}',
+            flush=True,
+        )
 
-        normalized_input = normalize_input(case.input_text)
-        actual = ''
-        passed = False
-        latency_ms = 0
-        error: str | None = None
+    run_config = evaluator.run_config()
+    run_config.update(
+        {
+            'prompt_file': os.path.abspath(args.prompt_file),
+            'cases_file': os.path.abspath(args.cases_file),
+            'max_cases': args.max_cases,
+        }
+    )
+    checkpoint = CaseCheckpoint(
+        args.checkpoint_file or os.path.splitext(args.json_report_file)[0] + '.checkpoint.jsonl',
+        config_hash=checkpoint_config_hash(run_config, prompt_template, evaluator.cache),
+        resume=args.resume,
+    )
+    done_ids = checkpoint.done_ids
+    pending = [case for case in cases if case.id not in done_ids]
+    resumed_cases = len(cases) - len(pending)
+    if args.resume:
+        print(f'Resuming: {resumed_cases}/{len(cases)} cases already in {checkpoint.path}', flush=True)
 
-        try:
-            if normalized_input:
-                rendered_prompt = render_prompt(prompt_template, normalized_input)
-                raw_output, latency_ms = run_model_once(
-                    binary_path=args.binary_path,
-                    backend=args.backend,
-                    model_path=args.model_path,
-                    input_prompt=rendered_prompt,
-                    timeout_sec=args.timeout_sec,
-                )
-                actual = clean_model_output(raw_output, bullet_mode=False)
-            else:
-                actual = ''
-            passed = compare_output(case.expected, actual, case.match)
-        except Exception as exc:  # noqa: BLE001
-            error = str(exc)
-
-        total_latency_ms += latency_ms
-        if passed:
-            pass_count += 1
-
-        results.append(
-            CaseResult(
-                id=case.id,
-                input_text=case.input_text,
-                expected=case.expected,
-                match=case.match,
-                actual=actual,
-                passed=passed,
-                latency_ms=latency_ms,
-                error=error,
+    started = time.perf_counter()
+    try:
+        with evaluator:
+            evaluator.run(
+                prompt_template,
+                pending,
+                verbose=args.verbose,
+                deadline=deadline,
+                on_result=checkpoint.append,
             )
+            cache_stats = evaluator.cache_stats()
+            prefix_stats = evaluator.prefix_cache_stats()
+    except KeyboardInterrupt:
+        print(
+            f'Interrupted with {len(checkpoint.done_ids)} cases saved to {checkpoint.path}; '
+            'rerun with --resume to continue.',
+            file=sys.stderr,
         )
-
-    fail_count = len(results) - pass_count
-
-    run_config = {
-        'binary_path': os.path.abspath(args.binary_path),
-        'model_path': os.path.abspath(args.model_path),
-        'backend': args.backend,
-        'prompt_file': os.path.abspath(args.prompt_file),
-        'cases_file': os.path.abspath(args.cases_file),
-        'timeout_sec': args.timeout_sec,
-        'max_cases': args.max_cases,
-        'pipeline': 'litert_lm_main',
-    }
-
-    report_dir = os.path.dirname(os.path.abspath(args.report_file))
-    if report_dir:
-        os.makedirs(report_dir, exist_ok=True)
-    json_dir = os.path.dirname(os.path.abspath(args.json_report_file))
-    if json_dir:
-        os.makedirs(json_dir, exist_ok=True)
-
-    write_text_report(
-        path=args.report_file,
+        return 130
+    finally:
+        checkpoint.close()
+    wall_clock_ms = int((time.perf_counter() - started) * 1000)
+    results = checkpoint.results_for(cases)
+
+    run_config.update(
+        {
+            'prefix_cache_stats': prefix_stats,
+            'checkpoint': {
+                'file': os.path.abspath(checkpoint.path),
+                'config_hash': checkpoint.config_hash,
+                'resumed_cases': resumed_cases,
+            },
+            'sampling': {
+                'strategy': args.sample_strategy,
+                'seed': args.sample_seed,
+                'time_budget_sec': args.time_budget_sec,
+                'population_cases': len(all_cases),
+                'selected_cases': len(cases),
+                'evaluated_cases': len(results),
+                'case_ids': [result.id for result in results],
+            },
+        }
+    )
+    summary = write_reports(
+        report_file=args.report_file,
+        json_report_file=args.json_report_file,
         run_config=run_config,
         results=results,
-        pass_count=pass_count,
-        fail_count=fail_count,
-        total_latency_ms=total_latency_ms,
+        wall_clock_ms=wall_clock_ms,
+        cache_stats=cache_stats,
     )
 
-    report_payload = {
-        'timestamp': datetime.now().isoformat(timespec='seconds'),
-        'config': run_config,
-        'summary': {
-            'total_cases': len(results),
-            'pass_count': pass_count,
-            'fail_count': fail_count,
-            'pass_rate': (pass_count / len(results) * 100.0) if results else 0.0,
-            'avg_latency_ms': int(total_latency_ms / len(results)) if results else 0,
-            'total_latency_ms': total_latency_ms,
-        },
-        'cases': [
-            {
-                'id': r.id,
-                'input': r.input_text,
-                'expected': r.expected,
-                'match': r.match,
-                'actual': r.actual,
-                'passed': r.passed,
-                'latency_ms': r.latency_ms,
-                'error': r.error,
-            }
-            for r in results
-        ],
-    }
-
-    with open(args.json_report_file, 'w', encoding='utf-8') as f:
-        json.dump(report_payload, f, ensure_ascii=False, indent=2)
-
     print(
-        f"Completed {len(results)} cases. pass={pass_count} fail={fail_count} "
+        f"Completed {summary['total_cases']} cases. pass={summary['pass_count']} "
+        f"fail={summary['fail_count']} throughput={summary['throughput_cases_per_sec']:.2f}/s "
         f"report={os.path.abspath(args.report_file)} json={os.path.abspath(args.json_report_file)}"
     )
     return 0
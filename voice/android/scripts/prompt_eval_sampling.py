@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import random
+from typing import Callable, TypeVar
+
+T = TypeVar('T')
+
+
+def allocate_proportional(strata_sizes: dict[str, int], size: int) -> dict[str, int]:
+    """Splits size across strata proportionally (largest remainder), at least one each."""
+    total = sum(strata_sizes.values())
+    if size >= total:
+        return dict(strata_sizes)
+    quotas = {key: size * count / total for key, count in strata_sizes.items()}
+    allocation = {key: min(strata_sizes[key], max(1, int(quota))) for key, quota in quotas.items()}
+    remaining = size - sum(allocation.values())
+    while remaining < 0:
+        # The one-per-stratum floor overshot size; take it back from the largest strata.
+        largest = max(allocation, key=lambda key: allocation[key])
+        if allocation[largest] <= 1:
+            break
+        allocation[largest] -= 1
+        remaining += 1
+    by_remainder = sorted(quotas, key=lambda key: quotas[key] - int(quotas[key]), reverse=True)
+    while remaining > 0:
+        progressed = False
+        for key in by_remainder:
+            if remaining <= 0:
+                break
+            if allocation[key] < strata_sizes[key]:
+                allocation[key] += 1
+                remaining -= 1
+                progressed = True
+        if not progressed:
+            break
+    return allocation
+
+
+def stratified_sample(
+    items: list[T],
+    size: int,
+    seed: int,
+    category_of: Callable[[T], str],
+) -> list[T]:
+    """Seeded per-category sample of size items, returned in original order.
+
+    Each category takes a prefix of one seeded shuffle, so with the same seed a smaller
+    sample is contained in a larger one.
+    """
+    if size <= 0 or size >= len(items):
+        return list(items)
+    strata: dict[str, list[int]] = {}
+    for index, item in enumerate(items):
+        strata.setdefault(category_of(item), []).append(index)
+
+    rng = random.Random(seed)
+    allocation = allocate_proportional({key: len(indexes) for key, indexes in strata.items()}, size)
+    chosen: list[int] = []
+    for key in sorted(strata):
+        indexes = strata[key]
+        rng.shuffle(indexes)
+        chosen.extend(indexes[: allocation[key]])
+    return [items[index] for index in sorted(chosen)]
+
+
+SAMPLE_STRATEGIES = ('head', 'random', 'stratified', 'weighted')
+
+
+def stratified_order(items: list[T], seed: int, category_of: Callable[[T], str]) -> list[T]:
+    """Seeded permutation in which every prefix keeps the category proportions."""
+    rng = random.Random(seed)
+    strata: dict[str, list[int]] = {}
+    for index, item in enumerate(items):
+        strata.setdefault(category_of(item), []).append(index)
+
+    keyed: list[tuple[float, str, int]] = []
+    for key in sorted(strata):
+        indexes = strata[key]
+        rng.shuffle(indexes)
+        for rank, index in enumerate(indexes):
+            keyed.append(((rank + 0.5) / len(indexes), key, index))
+    keyed.sort()
+    return [items[index] for _, _, index in keyed]
+
+
+def weighted_order(items: list[T], seed: int, weight_of: Callable[[T], float]) -> list[T]:
+    """Seeded weighted permutation without replacement (Efraimidis-Spirakis keys)."""
+    rng = random.Random(seed)
+    keyed = [(rng.random() ** (1.0 / max(weight_of(item), 1e-9)), index) for index, item in enumerate(items)]
+    keyed.sort(reverse=True)
+    return [items[index] for _, index in keyed]
+
+
+def sample_order(
+    items: list[T],
+    strategy: str,
+    seed: int,
+    category_of: Callable[[T], str],
+    weight_of: Callable[[T], float],
+) -> list[T]:
+    """Evaluation order for a strategy; any prefix of it is a valid sample."""
+    if strategy == 'head':
+        return list(items)
+    if strategy == 'random':
+        shuffled = list(items)
+        random.Random(seed).shuffle(shuffled)
+        return shuffled
+    if strategy == 'stratified':
+        return stratified_order(items, seed, category_of)
+    if strategy == 'weighted':
+        return weighted_order(items, seed, weight_of)
+    raise ValueError(f'Unknown sample strategy "{strategy}". Use {"|".join(SAMPLE_STRATEGIES)}')
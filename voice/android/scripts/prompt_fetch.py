@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+DEFAULT_CACHE_DIR = ".cache/prompt_fetch"
+DEFAULT_TTL_SEC = 3600.0
+
+
+@dataclass
+class FetchResult:
+    body: str
+    # fresh: served from cache without network; revalidated: 304 from origin;
+    # downloaded: new body from origin; stale: origin unreachable, last-known-good copy.
+    origin: str
+    fetched_at: float
+
+
+class CachedFetcher:
+    """HTTP GET with an on-disk cache keyed by URL.
+
+    Entries younger than ttl_sec are served without touching the network. Older ones
+    are revalidated with If-None-Match / If-Modified-Since, so an unchanged payload
+    costs one empty 304. If the origin is unreachable (or offline is set) the last
+    copy that passed validation is served with a warning.
+    """
+
+    def __init__(self, cache_dir: str, ttl_sec: float = DEFAULT_TTL_SEC, timeout_sec: float = 20.0, offline: bool = False) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.ttl_sec = ttl_sec
+        self.timeout_sec = timeout_sec
+        self.offline = offline
+
+    def _entry_path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()[:24]}.json"
+
+    def _load(self, url: str) -> dict | None:
+        try:
+            entry = json.loads(self._entry_path(url).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        return entry if isinstance(entry, dict) and entry.get("url") == url else None
+
+    def _store(self, entry: dict) -> None:
+        path = self._entry_path(entry["url"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(entry, indent=2), encoding="utf-8")
+        tmp_path.replace(path)
+
+    def _stale(self, entry: dict, reason: str) -> FetchResult:
+        fetched_at = float(entry.get("fetched_at", 0.0))
+        print(
+            f"[WARN] {reason}; using cached copy of {entry['url']} from "
+            f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(fetched_at))}",
+            file=sys.stderr,
+            flush=True,
+        )
+        return FetchResult(body=str(entry["body"]), origin="stale", fetched_at=fetched_at)
+
+    def fetch(self, url: str, validate: Callable[[str], object] | None = None) -> FetchResult:
+        """Returns the body for url; validate() raising keeps a bad payload out of the cache."""
+        entry = self._load(url)
+        now = time.time()
+        if entry is not None:
+            if self.offline:
+                return self._stale(entry, "offline")
+            if now - float(entry.get("checked_at", 0.0)) < self.ttl_sec:
+                return FetchResult(body=str(entry["body"]), origin="fresh", fetched_at=float(entry["fetched_at"]))
+        elif self.offline:
+            raise RuntimeError(f"Offline and no cached copy of {url} in {self.cache_dir}")
+
+        request = urllib.request.Request(url)
+        if entry is not None:
+            if entry.get("etag"):
+                request.add_header("If-None-Match", str(entry["etag"]))
+            if entry.get("last_modified"):
+                request.add_header("If-Modified-Since", str(entry["last_modified"]))
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout_sec) as response:
+                status = getattr(response, "status", 200)
+                if status not in (None, 200):
+                    raise urllib.error.HTTPError(url, status, f"HTTP {status}", response.headers, None)
+                body = response.read().decode("utf-8")
+                etag = response.headers.get("ETag") if response.headers else None
+                last_modified = response.headers.get("Last-Modified") if response.headers else None
+        except urllib.error.HTTPError as exc:
+            if exc.code == 304 and entry is not None:
+                entry["checked_at"] = now
+                self._store(entry)
+                return FetchResult(body=str(entry["body"]), origin="revalidated", fetched_at=float(entry["fetched_at"]))
+            if entry is not None:
+                return self._stale(entry, f"download failed (HTTP {exc.code})")
+            raise RuntimeError(f"Download failed (HTTP {exc.code}): {url}") from exc
+        except (urllib.error.URLError, OSError) as exc:
+            if entry is not None:
+                return self._stale(entry, f"download failed ({exc})")
+            raise RuntimeError(f"Download failed ({exc}): {url}") from exc
+
+        if validate is not None:
+            try:
+                validate(body)
+            except Exception as exc:  # noqa: BLE001
+                if entry is not None:
+                    return self._stale(entry, f"downloaded payload is invalid ({exc})")
+                raise
+        self._store(
+            {
+                "url": url,
+                "body": body,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": now,
+                "checked_at": now,
+            }
+        )
+        return FetchResult(body=body, origin="downloaded", fetched_at=now)
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""Successive-halving tournament between many challenger prompts and the incumbent.
+
+Every challenger in --prompts-dir is scored on a small, category-stratified prefix of
+the train split; the better 1/--halving-rate advance and the prefix grows by the same
+factor, until --finalists remain. Because the prefixes are nested and outcomes go
+through the shared ledger, a survivor only pays for the cases it has not seen yet.
+
+Finalists are then scored on the full train split and judged against the incumbent
+with the same rules as prompt_ab_optimize.py: improvement threshold, category,
+tail-latency and prompt-size guardrails, then holdout. Recommendation-only: no
+prompt file is changed.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from prompt_ab_optimize import (
+    SCORE_MODES,
+    EvalResult,
+    OutcomeLedger,
+    category_pass_stats,
+    compare_score,
+    evaluate_prompt,
+    format_stats,
+    guardrail_verdict,
+    infer_category,
+    ledger_config_key,
+    load_jsonl,
+    load_prompt_text_file,
+    prepare_runtime,
+    reads_latency_tails,
+    split_train_holdout,
+    winner_by_score,
+)
+from prompt_eval_runner import EvalConfig, Evaluator, load_prompt_template
+from prompt_eval_sampling import stratified_order
+
+
+@dataclass
+class Candidate:
+    name: str
+    path: Path
+    prompt_tokens: int = 0
+    eliminated_at_rung: int | None = None
+
+
+def prompt_content_key(path: Path) -> str:
+    """Hash of the prompt text alone, so files differing only in version dedupe."""
+    return hashlib.sha256(load_prompt_text_file(path).encode('utf-8')).hexdigest()
+
+
+def discover_candidates(prompts_dir: Path, incumbent_path: Path) -> list[Candidate]:
+    """Prompt files in prompts_dir, minus any with the incumbent's content.
+
+    Candidates are named by file name, so foo.json and foo.txt stay distinct.
+    """
+    candidates: list[Candidate] = []
+    seen_keys = {prompt_content_key(incumbent_path)}
+    for path in sorted(prompts_dir.iterdir()):
+        if path.suffix.lower() not in ('.json', '.txt') or not path.is_file():
+            continue
+        content_key = prompt_content_key(path)
+        if content_key in seen_keys:
+            print(f'[SKIP] {path.name}: same prompt text as the incumbent or an earlier candidate', flush=True)
+            continue
+        seen_keys.add(content_key)
+        candidates.append(Candidate(name=path.name, path=path.resolve()))
+    return candidates
+
+
+def summary_row(result: EvalResult) -> dict[str, Any]:
+    return {
+        'total_cases': result.summary.total_cases,
+        'pass_count': result.summary.pass_count,
+        'pass_rate': round(result.summary.pass_rate, 2),
+        'p90_latency_ms': result.summary.p90_latency_ms,
+        'avg_latency_ms': result.summary.avg_latency_ms,
+        'evaluated_cases': result.evaluated_cases,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='Prompt tournament: successive halving over many challengers, A/B rules for the finalists.'
+    )
+    parser.add_argument('--prompts-dir', required=True, help='Directory of challenger prompt .json/.txt files.')
+    parser.add_argument('--incumbent-file', default='scripts/prompt_a.json')
+    parser.add_argument('--dataset-file', default='scripts/dataset.jsonl')
+    parser.add_argument('--eval-script', default='scripts/prompt_eval.sh')
+    parser.add_argument('--run-root', default='.cache/prompt_tournament')
+    parser.add_argument('--ledger-file', default='.cache/prompt_ab/ledger.jsonl')
+
+    parser.add_argument('--initial-cases', type=int, default=40, help='Train cases per challenger in the first rung.')
+    parser.add_argument('--halving-rate', type=int, default=2, help='Keep 1/N of challengers and grow cases by N.')
+    parser.add_argument('--finalists', type=int, default=2)
+    parser.add_argument('--order-seed', type=int, default=0)
+    parser.add_argument('--score-mode', choices=SCORE_MODES, default='pass')
+
+    parser.add_argument('--min-improvement-pass-rate-pp', type=float, default=1.0)
+    parser.add_argument('--max-category-drop-pp', type=float, default=3.0)
+    parser.add_argument('--max-p99-latency-increase-pct', type=float, default=0.0)
+    parser.add_argument(
+        '--max-prompt-token-growth',
+        type=float,
+        default=0.0,
+        help='Token-count guardrail in percent over the incumbent (0 = off); needs --persistent for the model tokenizer.',
+    )
+    parser.add_argument('--use-holdout', action='store_true')
+    parser.add_argument('--min-holdout-pass-rate', type=float, default=90.0)
+    parser.add_argument('--holdout-mod', type=int, default=5)
+    parser.add_argument('--holdout-remainder', type=int, default=0)
+
+    parser.add_argument('--backend', default='auto')
+    parser.add_argument('--timeout-sec', type=int, default=30)
+    parser.add_argument('--model-path', default='')
+    parser.add_argument('--litertlm-dir', default='')
+    parser.add_argument('--binary-path', default='')
+    parser.add_argument('--persistent', action='store_true')
+    parser.add_argument('--prefix-cache', action='store_true')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--max-resident-mb', type=int, default=0)
+    parser.add_argument('--cache-file', default='.cache/prompt_eval/results.sqlite')
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--always-skip-setup', action='store_true')
+    parser.add_argument('--always-skip-download', action='store_true')
+    args = parser.parse_args()
+
+    if args.halving_rate < 2:
+        raise ValueError('halving-rate must be >= 2')
+    if args.finalists < 1:
+        raise ValueError('finalists must be >= 1')
+    if args.max_prompt_token_growth > 0 and not args.persistent:
+        raise ValueError('max-prompt-token-growth needs --persistent to count tokens with the model tokenizer')
+
+    repo_root = Path.cwd()
+    prompts_dir = (repo_root / args.prompts_dir).resolve()
+    incumbent_path = (repo_root / args.incumbent_file).resolve()
+    dataset_path = (repo_root / args.dataset_file).resolve()
+    eval_script = (repo_root / args.eval_script).resolve()
+    if not prompts_dir.is_dir():
+        raise FileNotFoundError(f'Prompts directory not found: {prompts_dir}')
+    if not incumbent_path.exists():
+        raise FileNotFoundError(f'Incumbent prompt not found: {incumbent_path}')
+    if not dataset_path.exists():
+        raise FileNotFoundError(f'Dataset file not found: {dataset_path}')
+    if not eval_script.exists():
+        raise FileNotFoundError(f'Eval script not found: {eval_script}')
+
+    candidates = discover_candidates(prompts_dir, incumbent_path)
+    if not candidates:
+        raise ValueError(f'No challenger prompts in {prompts_dir}')
+
+    run_dir = (repo_root / args.run_root).resolve() / f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    log_path = run_dir / 'tournament_log.jsonl'
+
+    all_rows = load_jsonl(dataset_path)
+    if args.use_holdout:
+        train_rows, holdout_rows = split_train_holdout(
+            all_rows,
+            holdout_mod=args.holdout_mod,
+            holdout_remainder=args.holdout_remainder,
+        )
+    else:
+        train_rows, holdout_rows = all_rows, []
+    category_by_id = {str(row.get('id')): infer_category(row) for row in all_rows}
+    # Nested, category-balanced prefixes: growing a budget only adds cases.
+    train_order = stratified_order(train_rows, seed=args.order_seed, category_of=infer_category)
+
+    binary_path, model_path = prepare_runtime(
+        eval_script=eval_script,
+        model_path=args.model_path or None,
+        litertlm_dir=args.litertlm_dir or None,
+        binary_path=args.binary_path or None,
+        skip_setup=args.always_skip_setup,
+        skip_download=args.always_skip_download,
+    )
+    eval_config = EvalConfig(
+        binary_path=binary_path,
+        model_path=model_path,
+        backend=args.backend,
+        timeout_sec=args.timeout_sec,
+        persistent=args.persistent,
+        prefix_cache=args.prefix_cache,
+        workers=args.workers,
+        max_resident_mb=args.max_resident_mb,
+        cache_file='' if args.no_cache else str((repo_root / args.cache_file).resolve()),
+    )
+    evaluator = Evaluator(eval_config)
+    ledger = OutcomeLedger(
+        (repo_root / args.ledger_file).resolve(),
+        config_key=ledger_config_key(eval_config, evaluator.cache),
+    )
+    incumbent = Candidate(name=f'incumbent:{incumbent_path.name}', path=incumbent_path)
+    evaluated_cases = 0
+    # Tails ranked or guarded across candidates must all be measured in this session.
+    session_latency = reads_latency_tails(args.score_mode, args.max_p99_latency_increase_pct)
+
+    def evaluate(candidate: Candidate, rows: list[dict[str, Any]], label: str) -> EvalResult:
+        nonlocal evaluated_cases
+        result = evaluate_prompt(
+            evaluator=evaluator,
+            ledger=ledger,
+            prompt_file=candidate.path,
+            rows=rows,
+            output_dir=run_dir,
+            label=label,
+            max_cases=0,
+            write_report_files=False,
+            session_latency=session_latency,
+        )
+        evaluated_cases += result.evaluated_cases
+        return result
+
+    def log(record: dict[str, Any]) -> None:
+        with log_path.open('a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    verdicts: list[dict[str, Any]] = []
+    winner: Candidate | None = None
+    token_source = ''
+    try:
+        for candidate in [incumbent, *candidates]:
+            candidate.prompt_tokens, token_source = evaluator.count_prompt_tokens(
+                load_prompt_template(str(candidate.path)),
+                require_tokenizer=args.max_prompt_token_growth > 0,
+            )
+
+        alive = list(candidates)
+        budget = min(max(1, args.initial_cases), len(train_order))
+        rung = 0
+        while True:
+            rung += 1
+            rows = train_order[:budget]
+            results = {candidate.name: evaluate(candidate, rows, f'rung{rung}') for candidate in alive}
+            alive.sort(key=lambda candidate: compare_score(results[candidate.name].summary, args.score_mode), reverse=True)
+            for rank, candidate in enumerate(alive, start=1):
+                log(
+                    {
+                        'stage': 'rung',
+                        'rung': rung,
+                        'budget': budget,
+                        'rank': rank,
+                        'candidate': candidate.name,
+                        **summary_row(results[candidate.name]),
+                    }
+                )
+            print(
+                f'[rung {rung}] cases={budget} '
+                + ' '.join(
+                    f'{candidate.name}={results[candidate.name].summary.pass_rate:.1f}%' for candidate in alive
+                ),
+                flush=True,
+            )
+            if len(alive) <= args.finalists or budget >= len(train_order):
+                break
+            keep = max(args.finalists, math.ceil(len(alive) / args.halving_rate))
+            for candidate in alive[keep:]:
+                candidate.eliminated_at_rung = rung
+            alive = alive[:keep]
+            budget = min(len(train_order), budget * args.halving_rate)
+        finalists = alive[: args.finalists]
+        for candidate in alive[args.finalists :]:
+            candidate.eliminated_at_rung = rung
+
+        train_incumbent = evaluate(incumbent, train_order, 'final_train')
+        incumbent_stats = category_pass_stats(train_incumbent.cases, category_by_id)
+        holdout_incumbent: EvalResult | None = None
+        eligible: list[tuple[Candidate, EvalResult]] = []
+        for candidate in finalists:
+            train_result = evaluate(candidate, train_order, 'final_train')
+            candidate_stats = category_pass_stats(train_result.cases, category_by_id)
+            train_winner = winner_by_score(train_incumbent.summary, train_result.summary, args.score_mode)
+            delta_pp = train_result.summary.pass_rate - train_incumbent.summary.pass_rate
+            threshold_ok = delta_pp >= args.min_improvement_pass_rate_pp
+            guardrail_ok, guardrail_reason = guardrail_verdict(
+                a_stats=incumbent_stats,
+                b_stats=candidate_stats,
+                a_summary=train_incumbent.summary,
+                b_summary=train_result.summary,
+                a_tokens=incumbent.prompt_tokens,
+                b_tokens=candidate.prompt_tokens,
+                max_category_drop_pp=args.max_category_drop_pp,
+                max_p99_latency_increase_pct=args.max_p99_latency_increase_pct,
+                max_prompt_token_growth=args.max_prompt_token_growth,
+            )
+
+            holdout_ok = True
+            holdout_record: dict[str, Any] | None = None
+            if args.use_holdout and train_winner == 'B' and threshold_ok and guardrail_ok:
+                if holdout_incumbent is None:
+                    holdout_incumbent = evaluate(incumbent, holdout_rows, 'final_holdout')
+                holdout_result = evaluate(candidate, holdout_rows, 'final_holdout')
+                holdout_winner = winner_by_score(holdout_incumbent.summary, holdout_result.summary, args.score_mode)
+                holdout_ok = holdout_winner == 'B' and holdout_result.summary.pass_rate >= args.min_holdout_pass_rate
+                holdout_record = {
+                    'winner': holdout_winner,
+                    'incumbent': summary_row(holdout_incumbent),
+                    'candidate': summary_row(holdout_result),
+                    'ok_for_switch': holdout_ok,
+                }
+
+            if train_winner != 'B':
+                reason = 'incumbent wins train score tie-break order.'
+            elif not threshold_ok:
+                reason = (
+                    f'improvement {delta_pp:.2f}pp is below threshold '
+                    f'{args.min_improvement_pass_rate_pp:.2f}pp.'
+                )
+            elif not guardrail_ok:
+                reason = f'rejected by guardrail: {guardrail_reason}'
+            elif not holdout_ok:
+                reason = 'failed holdout validation.'
+            else:
+                reason = 'beats the incumbent on train, guardrails and holdout.'
+                eligible.append((candidate, train_result))
+
+            verdict = {
+                'candidate': candidate.name,
+                'prompt_file': str(candidate.path),
+                'prompt_tokens': candidate.prompt_tokens,
+                'train': summary_row(train_result),
+                'category_stats': format_stats(candidate_stats),
+                'train_winner': train_winner,
+                'delta_pass_rate_pp': round(delta_pp, 2),
+                'guardrail': {'ok': guardrail_ok, 'reason': guardrail_reason},
+                'holdout': holdout_record,
+                'reason': reason,
+            }
+            verdicts.append(verdict)
+            log({'stage': 'final', **verdict})
+            print(f'[final] {candidate.name}: {reason}', flush=True)
+
+        if eligible:
+            winner = max(eligible, key=lambda pair: compare_score(pair[1].summary, args.score_mode))[0]
+    finally:
+        evaluator.close()
+
+    naive_cases = (len(candidates) + 1) * len(train_rows) + (len(candidates) + 1) * len(holdout_rows)
+    recommendation = f'SWITCH_TO:{winner.name}' if winner else 'KEEP_INCUMBENT'
+    summary = {
+        'recommendation': recommendation,
+        'winner_prompt_file': str(winner.path) if winner else None,
+        'incumbent': {
+            'prompt_file': str(incumbent_path),
+            'prompt_tokens': incumbent.prompt_tokens,
+            'token_source': token_source,
+            'train': summary_row(train_incumbent),
+            'category_stats': format_stats(incumbent_stats),
+        },
+        'protocol': {
+            'dataset_file': str(dataset_path),
+            'prompts_dir': str(prompts_dir),
+            'initial_cases': args.initial_cases,
+            'halving_rate': args.halving_rate,
+            'finalists': args.finalists,
+            'order_seed': args.order_seed,
+            'score_mode': args.score_mode,
+            'min_improvement_pass_rate_pp': args.min_improvement_pass_rate_pp,
+            'max_category_drop_pp': args.max_category_drop_pp,
+            'max_p99_latency_increase_pct': args.max_p99_latency_increase_pct,
+            'session_latency': session_latency,
+            'max_prompt_token_growth_pct': args.max_prompt_token_growth,
+            'use_holdout': args.use_holdout,
+            'min_holdout_pass_rate': args.min_holdout_pass_rate,
+        },
+        'eliminated': {
+            candidate.name: candidate.eliminated_at_rung
+            for candidate in candidates
+            if candidate.eliminated_at_rung is not None
+        },
+        'finalists': verdicts,
+        'cost': {
+            'evaluated_cases': evaluated_cases,
+            'full_runs_equivalent_cases': naive_cases,
+        },
+    }
+    summary_path = run_dir / 'summary.json'
+    summary_path.write_text(json.dumps(summary, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+
+    recommendation_lines = [
+        '# Prompt Tournament Recommendation',
+        '',
+        f'- recommendation: **{recommendation}**',
+        '- policy: recommendation-only (no prompt files auto-updated)',
+        f'- challengers: {len(candidates)}; finalists: {", ".join(verdict["candidate"] for verdict in verdicts)}',
+        f'- cases evaluated: {evaluated_cases} (full A/B runs would take {naive_cases})',
+        f'- prompt token counts: {token_source}',
+        '',
+        '## Finalists',
+    ]
+    for verdict in verdicts:
+        recommendation_lines.append(
+            f"- `{verdict['candidate']}`: train {verdict['train']['pass_rate']:.2f}% "
+            f"({verdict['delta_pass_rate_pp']:+.2f}pp), {verdict['prompt_tokens']} tokens — {verdict['reason']}"
+        )
+    (run_dir / 'recommendation.md').write_text('\n'.join(recommendation_lines) + '\n', encoding='utf-8')
+
+    print(f'Recommendation: {recommendation}')
+    print(f'Cases evaluated: {evaluated_cases} (full A/B runs: {naive_cases})')
+    print(f'Summary JSON: {summary_path}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from prompt_ab_optimize import OutcomeLedger, SequentialTest, case_key, ledger_config_key  # noqa: E402
+from prompt_eval_runner import EvalConfig  # noqa: E402
+
+
+def test_ledger_skips_error_outcomes(tmp_path: Path) -> None:
+    rows = [
+        {'id': 'ok', 'input': 'um hello', 'expected': 'Hello.'},
+        {'id': 'timeout', 'input': 'uh bye', 'expected': 'Bye.'},
+    ]
+    outcomes = [
+        {'id': 'ok', 'passed': True, 'latency_ms': 120, 'error': None},
+        {'id': 'timeout', 'passed': False, 'latency_ms': 0, 'error': 'Model server did not answer within 30s'},
+    ]
+    ledger_path = tmp_path / 'ledger.jsonl'
+    OutcomeLedger(ledger_path, config_key='cfg').record('prompt', rows, outcomes)
+
+    known, missing = OutcomeLedger(ledger_path, config_key='cfg').partition('prompt', rows)
+
+    assert list(known) == [case_key(rows[0])]
+    assert [row['id'] for row in missing] == ['timeout']
+
+
+def test_ledger_config_key_follows_file_content(tmp_path: Path) -> None:
+    model = tmp_path / 'model.litertlm'
+    binary = tmp_path / 'litert_lm_main'
+    model.write_bytes(b'weights-v1')
+    binary.write_bytes(b'binary-v1')
+    config = EvalConfig(binary_path=str(binary), model_path=str(model), persistent=True)
+
+    before = ledger_config_key(config)
+    model.write_bytes(b'weights-v2')
+    after = ledger_config_key(config)
+    with_prefix = ledger_config_key(
+        EvalConfig(binary_path=str(binary), model_path=str(model), persistent=True, prefix_cache=True)
+    )
+
+    assert before != after
+    assert with_prefix != after
+
+
+def make_sequential(min_pairs: int = 1, min_improvement_pp: float = 1.0) -> SequentialTest:
+    # confidence 0.95: stop once |llr| >= log(19) ~ 2.944; each A-only pair adds
+    # log(0.25 / 0.5) ~ -0.693 and each B-only pair log(0.75 / 0.5) ~ 0.405.
+    return SequentialTest(
+        confidence=0.95,
+        alt_win_rate=0.75,
+        min_pairs=min_pairs,
+        min_improvement_pp=min_improvement_pp,
+    )
+
+
+def test_sequential_test_stops_at_sprt_boundaries() -> None:
+    keep = make_sequential()
+    keep_stops = [keep.observe(a_passed=True, b_passed=False) for _ in range(5)]
+    promote = make_sequential()
+    promote_stops = [promote.observe(a_passed=False, b_passed=True) for _ in range(8)]
+
+    assert keep_stops == [None, None, None, None, 'KEEP_A']
+    assert promote_stops == [None] * 7 + ['PROMOTE_B']
+    assert promote.state()['llr'] >= promote.state()['upper_bound']
+
+
+def test_sequential_test_ignores_concordant_pairs_and_waits_for_min_pairs() -> None:
+    test = make_sequential(min_pairs=10)
+    for _ in range(3):
+        assert test.observe(a_passed=True, b_passed=True) is None
+        assert test.observe(a_passed=False, b_passed=False) is None
+    assert test.llr == 0.0
+
+    stops = [test.observe(a_passed=True, b_passed=False) for _ in range(5)]
+
+    assert stops == [None, None, None, None, 'KEEP_A']
+    assert test.pairs == 11
+
+
+def test_sequential_test_promotes_only_past_the_improvement_threshold() -> None:
+    test = make_sequential(min_improvement_pp=5.0)
+    for _ in range(392):
+        test.observe(a_passed=True, b_passed=True)
+    stops = [test.observe(a_passed=False, b_passed=True) for _ in range(8)]
+
+    # The SPRT boundary is crossed, but +2pp is below the 5pp promotion threshold.
+    assert test.llr >= test.bounds()[1]
+    assert stops[-1] is None
+
+
+def test_sequential_test_rejects_invalid_confidence() -> None:
+    with pytest.raises(ValueError):
+        SequentialTest(confidence=0.4, alt_win_rate=0.75, min_pairs=1, min_improvement_pp=1.0)
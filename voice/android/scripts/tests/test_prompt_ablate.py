@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from prompt_ablate import EDIT_KINDS, candidate_edits, parse_prompt_blocks, render_prompt_blocks  # noqa: E402
+
+PROMPT = """Task: clean up dictation.
+
+Hard constraints:
+1) Keep names.
+2) Remove fillers.
+3) Fix punctuation:
+   - commas
+   - periods
+
+Examples:
+- um hi -> Hi.
+"""
+
+
+def test_parse_prompt_blocks_round_trips() -> None:
+    blocks = parse_prompt_blocks(PROMPT)
+
+    assert [block.header for block in blocks] == ['', 'Hard constraints:', 'Examples:']
+    assert blocks[1].items[2] == ['3) Fix punctuation:', '   - commas', '   - periods']
+    assert render_prompt_blocks(blocks) == PROMPT
+
+
+def test_candidate_edits_renumber_and_reparse() -> None:
+    edits = dict(candidate_edits(parse_prompt_blocks(PROMPT), EDIT_KINDS))
+
+    assert '1) Remove fillers.\n2) Fix punctuation:' in edits['drop "Keep names."']
+    assert '1) Keep names; Remove fillers.\n2) Fix punctuation:' in edits['merge "Keep names." + "Remove fillers."']
+    assert '3) Fix punctuation: commas; periods\n' in edits['flatten "Fix punctuation:"']
+    assert 'Hard constraints' not in edits['drop section "Hard constraints"']
+    for text in edits.values():
+        assert text != PROMPT
+        assert render_prompt_blocks(parse_prompt_blocks(text)) == text
+
+
+def test_candidate_edits_respect_kinds() -> None:
+    edits = candidate_edits(parse_prompt_blocks(PROMPT), ('merge',))
+
+    assert [description for description, _ in edits] == ['merge "Keep names." + "Remove fillers."']
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from prompt_eval_android import DeviceRun, merge_device_results, shard_lines  # noqa: E402
+
+
+def device_run(serial: str, case_ids: list[str], failed: set[str], latency_ms: int, elapsed_ms: int) -> DeviceRun:
+    cases = [{"id": case_id, "passed": case_id not in failed, "latency_ms": latency_ms} for case_id in case_ids]
+    result = {
+        "suite_version": "v1",
+        "model_id": "gemma",
+        "summary": {"total_elapsed_ms": elapsed_ms},
+        "cases": cases,
+    }
+    return DeviceRun(serial=serial, result=result, report_text="")
+
+
+def test_merge_device_results_restores_dataset_order() -> None:
+    lines = [f"case-{index}" for index in range(5)]
+    shards = shard_lines(lines, 2)
+    runs = [
+        device_run("dev-a", shards[0], failed={"case-2"}, latency_ms=100, elapsed_ms=3000),
+        device_run("dev-b", shards[1], failed=set(), latency_ms=200, elapsed_ms=4000),
+    ]
+
+    merged = merge_device_results("run-1", runs)
+
+    assert shards == [["case-0", "case-2", "case-4"], ["case-1", "case-3"]]
+    assert [case["id"] for case in merged["cases"]] == lines
+    assert [case["serial"] for case in merged["cases"]] == ["dev-a", "dev-b", "dev-a", "dev-b", "dev-a"]
+    assert merged["run_id"] == "run-1"
+    assert merged["model_id"] == "gemma"
+    assert merged["summary"]["pass_count"] == 4
+    assert merged["summary"]["fail_count"] == 1
+    assert merged["summary"]["pass_rate"] == 80.0
+    assert merged["summary"]["total_elapsed_ms"] == 4000
+    assert merged["summary"]["avg_latency_ms"] == 140
+
+
+def test_merge_device_results_reports_each_device() -> None:
+    runs = [
+        device_run("dev-a", ["case-0", "case-2"], failed={"case-2"}, latency_ms=100, elapsed_ms=2000),
+        device_run("dev-b", ["case-1"], failed=set(), latency_ms=200, elapsed_ms=0),
+    ]
+
+    devices = merge_device_results("run-1", runs)["devices"]
+
+    assert [device["serial"] for device in devices] == ["dev-a", "dev-b"]
+    assert [device["pass_rate"] for device in devices] == [50.0, 100.0]
+    assert [device["p90_latency_ms"] for device in devices] == [100, 200]
+    assert [device["throughput_cases_per_sec"] for device in devices] == [1.0, 0.0]
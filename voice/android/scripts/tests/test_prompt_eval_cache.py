@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import itertools
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import prompt_eval_cache  # noqa: E402
+from prompt_eval_cache import ResultCache, cached_infer  # noqa: E402
+
+
+@pytest.fixture
+def tick(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Strictly increasing last_used stamps, so LRU order never depends on clock resolution."""
+    clock = itertools.count(1)
+    monkeypatch.setattr(prompt_eval_cache.time, 'time', lambda: float(next(clock)))
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path: Path, tick: None) -> None:
+    # Every entry is a 64-char key plus a 36-char output: 100 bytes, so three fit.
+    cache = ResultCache(str(tmp_path / 'results.sqlite'), max_bytes=300)
+    keys = {name: ResultCache.make_key({'model': 'm'}, name) for name in ('one', 'two', 'three', 'four')}
+    for name in ('one', 'two', 'three'):
+        cache.put(keys[name], name.ljust(36, '.'), latency_ms=10)
+
+    assert cache.get(keys['one']) is not None
+    cache.put(keys['four'], 'four'.ljust(36, '.'), latency_ms=10)
+
+    assert cache.get(keys['two']) is None
+    assert [cache.get(keys[name]) is not None for name in ('one', 'three', 'four')] == [True, True, True]
+    assert cache.stats()['size_bytes'] == 300
+    cache.close()
+
+
+def test_cached_infer_reuse_false_measures_again(tmp_path: Path) -> None:
+    cache = ResultCache(str(tmp_path / 'results.sqlite'), max_bytes=1024 * 1024)
+    latencies = iter([100, 250])
+
+    def infer(rendered_prompt: str, shared_prefix: str = '') -> tuple[str, int]:
+        return rendered_prompt.upper(), next(latencies)
+
+    cached = cached_infer(infer, cache, {'model': 'm'})
+    fresh = cached_infer(infer, cache, {'model': 'm'}, reuse=False)
+
+    assert cached('hi') == ('HI', 100)
+    assert cached('hi') == ('HI', 100)
+    assert fresh('hi') == ('HI', 250)
+    assert cached('hi') == ('HI', 250)
+    cache.close()
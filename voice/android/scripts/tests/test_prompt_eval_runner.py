@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from prompt_eval_runner import (  # noqa: E402
+    Case,
+    CaseCheckpoint,
+    CaseResult,
+    checkpoint_config_hash,
+    format_benchmark_info,
+    split_benchmark_info,
+)
+
+
+def make_result(case_id: str, error: str | None = None) -> CaseResult:
+    return CaseResult(
+        id=case_id,
+        input_text='um hi',
+        expected='Hi.',
+        match='exact',
+        actual='' if error else 'Hi.',
+        passed=error is None,
+        latency_ms=100,
+        error=error,
+    )
+
+
+def test_server_benchmark_round_trips_through_benchmark_info_text() -> None:
+    server_benchmark = {'ttft_ms': 95.25, 'prefill_tokens': 41, 'prefill_ms': 80.5, 'decode_tokens': 12, 'decode_ms': 150}
+
+    text, benchmark = split_benchmark_info(f'Hello there.\n\n{format_benchmark_info(server_benchmark)}')
+
+    assert text == 'Hello there.'
+    assert benchmark == {
+        'ttft_ms': 95.25,
+        'prefill_tokens': 41,
+        'prefill_ms': 80.5,
+        'prefill_tokens_per_sec': 509.32,
+        'decode_tokens': 12,
+        'decode_ms': 150.0,
+        'decode_tokens_per_sec': 80.0,
+    }
+
+
+def test_checkpoint_resume_retries_errored_cases(tmp_path: Path) -> None:
+    path = str(tmp_path / 'run.checkpoint.jsonl')
+    checkpoint = CaseCheckpoint(path, config_hash='cfg', resume=False)
+    checkpoint.append(make_result('1'))
+    checkpoint.append(make_result('2', error='Model server did not answer within 30s'))
+    cases = [Case(id=case_id, input_text='um hi', expected='Hi.', match='exact') for case_id in ('1', '2')]
+    assert [result.id for result in checkpoint.results_for(cases)] == ['1', '2']
+    checkpoint.close()
+
+    resumed = CaseCheckpoint(path, config_hash='cfg', resume=True)
+    other_config = CaseCheckpoint(str(tmp_path / 'copy.jsonl'), config_hash='other', resume=True)
+
+    assert resumed.done_ids == {'1'}
+    assert resumed.results_for(cases)[0].actual == 'Hi.'
+    assert other_config.done_ids == set()
+    resumed.close()
+    other_config.close()
+
+
+def test_checkpoint_config_hash_follows_binary_content(tmp_path: Path) -> None:
+    binary = tmp_path / 'evaluator'
+    model = tmp_path / 'model.litertlm'
+    binary.write_bytes(b'build-1')
+    model.write_bytes(b'weights')
+    run_config = {
+        'binary_path': str(binary),
+        'model_path': str(model),
+        'backend': 'cpu',
+        'timeout_sec': 30,
+        'pipeline': 'server_mode',
+        'sampler': 'top_k=1',
+        'cases_file': 'cases.jsonl',
+        'persistent': True,
+        'prefix_cache': False,
+    }
+
+    before = checkpoint_config_hash(run_config, 'prompt {input}')
+    binary.write_bytes(b'build-2')
+
+    assert checkpoint_config_hash(run_config, 'prompt {input}') != before
+    assert checkpoint_config_hash({**run_config, 'prefix_cache': True}, 'prompt {input}') != checkpoint_config_hash(
+        run_config, 'prompt {input}'
+    )
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from prompt_eval_sampling import allocate_proportional, stratified_order, stratified_sample  # noqa: E402
+
+ITEMS = [('a', i) for i in range(60)] + [('b', i) for i in range(30)] + [('c', i) for i in range(10)]
+
+
+def category_of(item: tuple[str, int]) -> str:
+    return item[0]
+
+
+def test_allocate_proportional_keeps_every_stratum() -> None:
+    assert allocate_proportional({'a': 60, 'b': 30, 'c': 10}, 20) == {'a': 12, 'b': 6, 'c': 2}
+    assert allocate_proportional({'a': 98, 'b': 1, 'c': 1}, 10) == {'a': 8, 'b': 1, 'c': 1}
+    assert allocate_proportional({'a': 3, 'b': 2}, 10) == {'a': 3, 'b': 2}
+
+
+def test_stratified_sample_matches_category_proportions_in_original_order() -> None:
+    sample = stratified_sample(ITEMS, size=20, seed=3, category_of=category_of)
+
+    assert Counter(category_of(item) for item in sample) == {'a': 12, 'b': 6, 'c': 2}
+    assert sample == sorted(sample, key=ITEMS.index)
+    assert sample == stratified_sample(ITEMS, size=20, seed=3, category_of=category_of)
+    assert sample != stratified_sample(ITEMS, size=20, seed=4, category_of=category_of)
+
+
+def test_stratified_sample_nests_across_sizes() -> None:
+    small = stratified_sample(ITEMS, size=20, seed=3, category_of=category_of)
+    large = stratified_sample(ITEMS, size=40, seed=3, category_of=category_of)
+
+    assert set(small) <= set(large)
+
+
+def test_stratified_order_prefixes_keep_proportions() -> None:
+    order = stratified_order(ITEMS, seed=7, category_of=category_of)
+    totals = Counter(category_of(item) for item in ITEMS)
+
+    assert sorted(order) == sorted(ITEMS)
+    for prefix_size in range(1, len(order) + 1):
+        counts = Counter(category_of(item) for item in order[:prefix_size])
+        for category, total in totals.items():
+            assert abs(counts[category] - prefix_size * total / len(ITEMS)) < 1.0
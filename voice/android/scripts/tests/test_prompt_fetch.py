@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import sys
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from prompt_fetch import CachedFetcher  # noqa: E402
+
+
+class PromptOrigin:
+    """Local stand-in for raw.githubusercontent.com: serves body with an ETag and honours If-None-Match."""
+
+    def __init__(self) -> None:
+        self.body = '{"prompt": "v1"}'
+        self.etag = '"v1"'
+        self.requests: list[dict[str, str]] = []
+        origin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                origin.requests.append(dict(self.headers))
+                if self.headers.get("If-None-Match") == origin.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                payload = origin.body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("ETag", origin.etag)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/prompt_a.json"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def origin() -> Iterator[PromptOrigin]:
+    server = PromptOrigin()
+    yield server
+    server.close()
+
+
+def test_cached_fetcher_revalidates_with_etag(tmp_path: Path, origin: PromptOrigin) -> None:
+    fetcher = CachedFetcher(str(tmp_path), ttl_sec=0)
+
+    first = fetcher.fetch(origin.url)
+    second = fetcher.fetch(origin.url)
+    origin.body, origin.etag = '{"prompt": "v2"}', '"v2"'
+    third = fetcher.fetch(origin.url)
+
+    assert (first.origin, second.origin, third.origin) == ("downloaded", "revalidated", "downloaded")
+    assert second.body == first.body == '{"prompt": "v1"}'
+    assert third.body == '{"prompt": "v2"}'
+    assert "If-None-Match" not in origin.requests[0]
+    assert origin.requests[1]["If-None-Match"] == '"v1"'
+
+
+def test_cached_fetcher_serves_fresh_entries_without_a_request(tmp_path: Path, origin: PromptOrigin) -> None:
+    CachedFetcher(str(tmp_path), ttl_sec=0).fetch(origin.url)
+
+    result = CachedFetcher(str(tmp_path), ttl_sec=3600).fetch(origin.url)
+
+    assert result.origin == "fresh"
+    assert len(origin.requests) == 1
+
+
+def test_cached_fetcher_keeps_last_good_copy(tmp_path: Path, origin: PromptOrigin) -> None:
+    fetcher = CachedFetcher(str(tmp_path), ttl_sec=0)
+    fetcher.fetch(origin.url)
+
+    def validate(body: str) -> None:
+        if "prompt" not in body:
+            raise ValueError("missing prompt")
+
+    origin.body, origin.etag = "<html>rate limited</html>", '"broken"'
+    invalid = fetcher.fetch(origin.url, validate=validate)
+    offline = CachedFetcher(str(tmp_path), ttl_sec=0, offline=True).fetch(origin.url)
+    origin.close()
+    unreachable = fetcher.fetch(origin.url)
+
+    assert [result.origin for result in (invalid, offline, unreachable)] == ["stale", "stale", "stale"]
+    assert {result.body for result in (invalid, offline, unreachable)} == {'{"prompt": "v1"}'}
+    assert len(origin.requests) == 2
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from prompt_tournament import discover_candidates  # noqa: E402
+
+
+def write_prompt(path: Path, version: str, prompt: str) -> None:
+    path.write_text(json.dumps({'version': version, 'prompt': prompt}), encoding='utf-8')
+
+
+def test_discover_candidates_dedupes_same_text_with_timestamp_versions(tmp_path: Path) -> None:
+    incumbent = tmp_path / 'prompt_a.json'
+    write_prompt(incumbent, '2026-02-17T21:20:00Z', 'Clean the dictation.')
+    prompts_dir = tmp_path / 'prompts'
+    prompts_dir.mkdir()
+    write_prompt(prompts_dir / 'a_copy.json', '2026-03-01T08:15:00Z', 'Clean the dictation.')
+    write_prompt(prompts_dir / 'b_new.json', '2026-03-02T09:00:00Z', 'Clean the dictation. Keep names.')
+    write_prompt(prompts_dir / 'c_copy.json', '2026-03-03T10:30:00Z', 'Clean the dictation. Keep names.')
+
+    candidates = discover_candidates(prompts_dir, incumbent)
+
+    assert [candidate.name for candidate in candidates] == ['b_new.json']
+
+
+def test_discover_candidates_keeps_json_and_txt_with_same_stem_apart(tmp_path: Path) -> None:
+    incumbent = tmp_path / 'prompt_a.json'
+    write_prompt(incumbent, '2026-02-17T21:20:00Z', 'Clean the dictation.')
+    prompts_dir = tmp_path / 'prompts'
+    prompts_dir.mkdir()
+    write_prompt(prompts_dir / 'terse.json', '2026-03-01T08:15:00Z', 'Clean the dictation. Be terse.')
+    (prompts_dir / 'terse.txt').write_text('Clean the dictation. Keep it short.', encoding='utf-8')
+
+    candidates = discover_candidates(prompts_dir, incumbent)
+
+    names = [candidate.name for candidate in candidates]
+    assert names == ['terse.json', 'terse.txt']
+    assert len({candidate.path for candidate in candidates}) == 2